@@ -1,7 +1,10 @@
 from __future__ import annotations
 from typing import Literal
 from datetime import datetime, timezone
-from pydantic import BaseModel, StrictInt, StrictStr, Field, field_validator
+import numpy as np
+from pydantic import BaseModel, StrictInt, StrictStr, Field, field_validator, model_validator
+from app.graph.context import MAX_WINDOW
+from app.graph.semantic import Engine, decode_vector
 
 
 class EchoRequest(BaseModel):
@@ -29,8 +32,70 @@ class EchoResponse(BaseModel):
         )
 
 
-class SemanticQuery(BaseModel):
-    vector: list[float] = Field(min_length=1)  # we'll validate exact size
+class VectorInput(BaseModel):
+    """
+    A query vector, either as a JSON list or as `vector_b64`: base64 of the
+    little-endian float32 bytes, decoded straight into a NumPy buffer.
+    """
+
+    vector: list[float] | None = Field(default=None, min_length=1)  # we'll validate exact size
+    vector_b64: str | None = None
+
+    @model_validator(mode="after")
+    def one_vector(self) -> VectorInput:
+        if (self.vector is None) == (self.vector_b64 is None):
+            raise ValueError("pass exactly one of 'vector' or 'vector_b64'")
+        return self
+
+    def query_vector(self) -> list[float] | np.ndarray:
+        """The vector as sent: a list, or the decoded float32 array.
+
+        Raises:
+            ValueError: If `vector_b64` is not base64 of DIM float32 values.
+        """
+        if self.vector_b64 is not None:
+            return decode_vector(self.vector_b64)
+        assert self.vector is not None
+        return self.vector
+
+
+class SemanticQuery(VectorInput):
+    k: int = 5
+    efs: int = 200
+    doc: str | None = None
+    engine: Engine = "hnsw"
+
+
+class SemanticBatchItem(VectorInput):
+    k: int | None = None      # None -> the batch default
+    efs: int | None = None
+    doc: str | None = None
+    engine: Engine | None = None
+
+
+class SemanticBatchQuery(BaseModel):
+    queries: list[SemanticBatchItem] = Field(min_length=1, max_length=64)
+    # Shared defaults for items that leave a field unset
     k: int = 5
     efs: int = 200
     doc: str | None = None
+    engine: Engine = "hnsw"
+
+
+class HybridQuery(VectorInput):
+    q: str = Field(min_length=1)
+    k: int = 10
+    efs: int = 200
+    doc: str | None = None
+    mode: Literal["bm25", "substring"] = "bm25"
+    candidates: int | None = Field(default=None, ge=1)  # per source; default 4 * k
+    rrf_k: int = Field(default=60, ge=1)
+    lexical_weight: float = Field(default=1.0, ge=0.0)
+    vector_weight: float = Field(default=1.0, ge=0.0)
+
+
+class ContextQuery(BaseModel):
+    chunk_ids: list[int] = Field(min_length=1, max_length=64)  # search hits, best first
+    window: int = Field(default=1, ge=0, le=MAX_WINDOW)  # neighbours per side
+    max_chars: int | None = Field(default=None, ge=1)
+    max_tokens: int | None = Field(default=None, ge=1)  # ~4 characters per token
@@ -1,32 +1,74 @@
 from __future__ import annotations
 from contextlib import asynccontextmanager
-from typing import Mapping
-from fastapi import FastAPI, HTTPException, status
+from typing import Any, Literal
+import numpy as np
+from fastapi import FastAPI, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from opentelemetry import trace
 
 from app.core.tracing import init_tracing, get_tracer
 from app.api.schemas import IngestDocument
-from app.api.models import SemanticQuery
-from app.core.kuzu import ensure_database, get_conn
-from app.graph.read import list_chunks
+from app.api.models import ContextQuery, HybridQuery, SemanticBatchQuery, SemanticQuery, VectorInput
+from app.core import db
+from app.core.config import settings
+from app.core.db import QueryTimeout, Saturated
+from app.core import metrics
+from app.core.kuzu import PoolExhausted, connection, ensure_database, execute_all, get_pool, slow_queries
+from app.core.results import FastJSONResponse, dumps, payload
+from app.graph.read import START, decode_cursor, encode_cursor, iter_chunk_pages, last_key, list_chunk_rows
 from app.graph.schema import ensure_schema
-from app.graph.seed import _as_qr, seed_sample
-from app.graph.repo import document_exists, create_document, create_section, create_chunk
-from app.graph.search import search_chunks
-from app.graph.semantic import _one_hot, create_vector_index, drop_vector_index_if_exists, semantic_search
+from app.graph.repo import DocumentExists
+from app.graph.search import bm25_search_rows, search_chunk_rows
+from app.graph.hybrid import hybrid_search_rows
+from app.graph.context import assemble_context
+from app.graph.ingest_queue import set_ingest_queue
+from app.replica import get_replica, write
+from app.graph.semantic import DIM, Engine, Mode as EmbeddingMode, cache_stats, decode_vector, index_status, quantized_status, semantic_search_many, semantic_search_with_stats
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    ensure_database()
-    ensure_schema()
+    if settings.serve_role == "replica":
+        # Read-only worker of `python -m app.replica`: no DDL, writes are forwarded
+        await run_in_threadpool(get_replica().start)
+    else:
+        ensure_database()
+        ensure_schema()
     yield
+    if settings.serve_role == "replica":
+        get_replica().stop()
+    else:
+        await run_in_threadpool(set_ingest_queue, None)  # writes what is still queued
 
 app = FastAPI(title="Mini Graph-RAG (TerminusDB)", lifespan=lifespan)
+
+Shape = Literal["records", "columns"]
 init_tracing(app)
 tracer = get_tracer(__name__)
 
 
+@app.exception_handler(Saturated)
+@app.exception_handler(PoolExhausted)
+async def busy(request: Request, exc: Exception) -> JSONResponse:
+    """Too much database work in flight: ask the client to back off."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(DocumentExists)
+async def document_exists(request: Request, exc: DocumentExists) -> JSONResponse:
+    return JSONResponse(status_code=status.HTTP_409_CONFLICT, content={"detail": str(exc)})
+
+
+@app.exception_handler(QueryTimeout)
+async def query_timed_out(request: Request, exc: QueryTimeout) -> JSONResponse:
+    return JSONResponse(status_code=status.HTTP_504_GATEWAY_TIMEOUT, content={"detail": str(exc)})
+
+
 @app.get("/health")
 async def health() -> dict[str, str]:
     with tracer.start_as_current_span("health"):
@@ -36,62 +78,118 @@ async def health() -> dict[str, str]:
 
 
 @app.post("/seed")
-def seed(reset: bool = True):
+async def seed(reset: bool = True):
     """
     Seeds the DB with a small sample graph and returns verification counts.
     Use `reset=false` to keep existing data.
     """
-    return seed_sample(reset=reset)
+    return await db.call(write, "seed", reset=reset, timeout=None)
 
 
-@app.get("/chunks")
-def get_chunks(limit: int = 100, doc: str | None = None):
+@app.get("/chunks", response_class=FastJSONResponse)
+async def get_chunks(
+    limit: int | None = None,
+    doc: str | None = None,
+    after: str | None = None,
+    shape: Shape = "records",
+    fmt: Literal["json", "ndjson"] = Query("json", alias="format"),
+):
     """
-    List chunks with their section & document.
+    List chunks with their section & document, in (document, section, chunk) order.
     Optional: filter by document title via ?doc=Sample%20Doc
+    Paging: pass the `next` cursor of a page as ?after=... to get the following page
+    (`next` is null on the last page). Page size is ?limit (default 100; 0 or
+    less counts as not given, in both formats).
+    Use ?shape=columns for `columns` + `rows` (list of lists) instead of `items`.
+    Use ?format=ndjson to stream every chunk (or the first ?limit) as one JSON object per line.
     """
-    items = list_chunks(limit=limit, doc_title=doc)
-    return {"count": len(items), "items": items}
+    try:
+        start = decode_cursor(after) if after else START
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if limit is not None and limit <= 0:
+        limit = None
+
+    if fmt == "ndjson":
+        pages = iter_chunk_pages(doc_title=doc, after=start, max_rows=limit)
+
+        async def lines():
+            # One executor call per page: no thread is pinned between pages.
+            while (page := await db.call(next, pages, None)) is not None:
+                cols = page.columns
+                yield b"".join(dumps(dict(zip(cols, r))) + b"\n" for r in page.rows)
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    page_size = limit or 100
+    rows = await db.call(list_chunk_rows, limit=page_size, doc_title=doc, after=start)
+    key = last_key(rows)
+    cursor = encode_cursor(key) if key is not None and len(rows) == page_size else None
+    return FastJSONResponse(payload(rows, shape, next=cursor))
 
 
 @app.post("/ingest", status_code=status.HTTP_201_CREATED)
-def ingest(doc: IngestDocument):
+async def ingest(doc: IngestDocument, queue: bool = False):
     """
     Create a new Document with Sections/Chunks.
     If a Document with the same title exists -> 409 Conflict (no changes).
     Section/chunk order is taken from the input list order.
+    The whole document is written in a single transaction.
+    With ?queue=true: 202 Accepted and a job to poll at /ingest/jobs/{job_id};
+    queued documents are written together in batches.
     """
-    if document_exists(doc.title):
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail=f"Document with title '{doc.title}' already exists",
-        )
+    if queue:
+        return await _enqueue([doc], bulk=False)
+    return await db.call(write, "ingest", doc, timeout=None)
 
-    doc_id = create_document(doc.title)
-    section_ids: list[int] = []
-    chunk_ids: list[int] = []
 
-    for i, sec in enumerate(doc.sections):
-        sid = create_section(doc_id, sec.title, i)
-        section_ids.append(sid)
-        for j, text in enumerate(sec.chunks):
-            cid = create_chunk(sid, text, j)
-            chunk_ids.append(cid)
+@app.post("/ingest/bulk", status_code=status.HTTP_201_CREATED)
+async def ingest_bulk(docs: list[IngestDocument], queue: bool = False):
+    """
+    Create several Documents in one transaction.
+    Any title that already exists, or repeats within the batch -> 409 Conflict (no changes).
+    With ?queue=true: 202 Accepted and one job for the whole list (see /ingest).
+    """
+    if queue:
+        return await _enqueue(docs, bulk=True)
+    return await db.call(write, "ingest_bulk", docs, timeout=None)
 
-    return {
-        "document_id": doc_id,
-        "section_ids": section_ids,
-        "chunk_ids": chunk_ids,
-        "sections_created": len(section_ids),
-        "chunks_created": len(chunk_ids),
-    }
+
+async def _enqueue(docs: list[IngestDocument], bulk: bool) -> JSONResponse:
+    job = await db.call(write, "ingest_submit", docs, bulk, timeout=None)
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=job,
+        headers={"Location": f"/ingest/jobs/{job['job_id']}"},
+    )
 
 
-@app.get("/search")
-def search(q: str, doc: str | None = None, limit: int = 20, ci: bool = True):
+@app.get("/ingest/jobs/{job_id}")
+async def ingest_job(job_id: str):
+    """
+    Status of a queued ingest: queued, running, done (with the /ingest or
+    /ingest/bulk response as `result`), conflict (a title exists or repeats;
+    `error` carries the 409 message; nothing of this job is written) or failed.
+    """
+    job = await db.call(write, "ingest_job", job_id, timeout=None)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown ingest job '{job_id}'")
+    return job
+
+
+@app.get("/search", response_class=FastJSONResponse)
+async def search(
+    q: str,
+    doc: str | None = None,
+    limit: int = 20,
+    ci: bool = True,
+    mode: Literal["substring", "bm25"] = "substring",
+    shape: Shape = "records",
+):
     """
     Case-insensitive substring search in Chunk.text by default (ci=true).
     Pass ci=false for case-sensitive search.
+    Pass mode=bm25 for ranked whole-word search; rows carry a `score` and `ci` is ignored.
     Optional: restrict to a document via ?doc=Title
     """
     if not q:
@@ -99,79 +197,301 @@ def search(q: str, doc: str | None = None, limit: int = 20, ci: bool = True):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Query parameter 'q' is required",
         )
-    items = search_chunks(q=q, doc_title=doc, limit=limit, case_insensitive=ci)
-    return {"count": len(items), "items": items}
+    if mode == "bm25":
+        rows = await db.call(bm25_search_rows, q=q, doc_title=doc, limit=limit)
+    else:
+        rows = await db.call(search_chunk_rows, q=q, doc_title=doc, limit=limit, case_insensitive=ci)
+    return FastJSONResponse(payload(rows, shape))
+
+
+def _query_vector(body: VectorInput, where: str = "") -> list[float] | np.ndarray:
+    """Decode and size-check a request vector; any problem is a 400."""
+    try:
+        vector = body.query_vector()
+        if len(vector) != DIM:
+            raise ValueError(f"vector must be of length {DIM}, got {len(vector)}")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{where}{e}")
+    return vector
 
 
-@app.post("/search/semantic")
-def search_semantic(body: SemanticQuery):
+@app.post("/search/semantic", response_class=FastJSONResponse)
+async def search_semantic(body: SemanticQuery, shape: Shape = "records"):
     """Perform a semantic search over chunks using the provided vector.
 
     Args:
-        body (SemanticQuery): The semantic query parameters.
+        body (SemanticQuery): The semantic query parameters; the vector as a
+            JSON list (`vector`) or base64 little-endian float32 (`vector_b64`).
+        shape (Shape): "records" (default) or "columns".
+
+    Returns:
+        dict: The search results, plus `search`: the engine applied and the
+        candidates/rounds it took (see `semantic_search_with_stats`).
+    """
+    rows, stats = await db.call(
+        semantic_search_with_stats,
+        vector=_query_vector(body),
+        k=body.k,
+        efs=body.efs,
+        doc_title=body.doc,
+        engine=body.engine,
+    )
+    return FastJSONResponse(payload(rows, shape, search=stats))
+
+
+@app.post("/search/semantic/raw", response_class=FastJSONResponse)
+async def search_semantic_raw(
+    request: Request,
+    k: int = 5,
+    efs: int = 200,
+    doc: str | None = None,
+    engine: Engine = "hnsw",
+    shape: Shape = "records",
+):
+    """Semantic search with the vector as the raw request body.
+
+    The body is DIM little-endian float32 values (`application/octet-stream`),
+    viewed in place as a NumPy array; options go in the query string.
 
     Returns:
         dict: The search results.
     """
-    items = semantic_search(
-        vector=body.vector,
+    try:
+        vector = decode_vector(await request.body())
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    rows, stats = await db.call(
+        semantic_search_with_stats, vector=vector, k=k, efs=efs, doc_title=doc, engine=engine,
+    )
+    return FastJSONResponse(payload(rows, shape, search=stats))
+
+
+@app.post("/search/semantic/batch", response_class=FastJSONResponse)
+async def search_semantic_batch(body: SemanticBatchQuery, shape: Shape = "records"):
+    """Run up to 64 semantic searches in one request, in parallel.
+
+    Items may set their own `k`/`efs`/`doc`; unset fields fall back to the
+    batch-level values.
+
+    Args:
+        body (SemanticBatchQuery): The queries and shared defaults.
+        shape (Shape): "records" (default) or "columns", per result.
+
+    Returns:
+        dict: `results` (one payload per query, in order, each with
+        `elapsed_ms` and `search` stats) and aggregate `timings` in milliseconds.
+    """
+    queries = [
+        {
+            "vector": _query_vector(q, where=f"queries[{i}]: "),
+            "k": body.k if q.k is None else q.k,
+            "efs": body.efs if q.efs is None else q.efs,
+            "doc_title": body.doc if q.doc is None else q.doc,
+            "engine": body.engine if q.engine is None else q.engine,
+        }
+        for i, q in enumerate(body.queries)
+    ]
+    try:
+        results, timings = await db.call(semantic_search_many, queries)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return FastJSONResponse({
+        "count": len(results),
+        "results": [
+            payload(rows, shape, elapsed_ms=round(ms, 3), search=stats) for rows, ms, stats in results
+        ],
+        "timings": timings,
+    })
+
+
+@app.post("/search/hybrid", response_class=FastJSONResponse)
+async def search_hybrid(body: HybridQuery, shape: Shape = "records"):
+    """Lexical and vector search in one call, fused by reciprocal rank.
+
+    Both sources run concurrently on separate pooled connections. Each row
+    carries the fused `score` plus `lexical_rank`/`lexical_score` and
+    `vector_rank`/`vector_distance` (None when that source missed the chunk).
+
+    Args:
+        body (HybridQuery): Query text, vector and fusion parameters.
+        shape (Shape): "records" (default) or "columns".
+
+    Returns:
+        dict: The fused results and per-stage `timings` in milliseconds.
+    """
+    rows, timings = await db.call(
+        hybrid_search_rows,
+        q=body.q,
+        vector=_query_vector(body),
         k=body.k,
+        doc_title=body.doc,
+        mode=body.mode,
         efs=body.efs,
-        doc_title=body.doc
+        candidates=body.candidates,
+        rrf_k=body.rrf_k,
+        lexical_weight=body.lexical_weight,
+        vector_weight=body.vector_weight,
+    )
+    return FastJSONResponse(payload(rows, shape, timings=timings))
+
+
+@app.post("/context", response_class=FastJSONResponse)
+async def context(body: ContextQuery):
+    """Expand search hits into LLM context: each hit plus its neighbouring chunks.
+
+    One batched query walks `window` NextChunk edges either side of every hit
+    and joins each chunk's section and document. Overlapping windows are
+    merged into one passage, and chunks are taken nearest-first until
+    `max_chars` or `max_tokens` would be exceeded.
+
+    Args:
+        body (ContextQuery): Hit chunk ids (best first), window and budgets.
+
+    Returns:
+        dict: `passages` (document, hits, chunks in reading order, joined
+        `text`), `chars`, `tokens`, `truncated` and the `missing` hit ids.
+    """
+    out = await db.call(
+        assemble_context,
+        body.chunk_ids,
+        window=body.window,
+        max_chars=body.max_chars,
+        max_tokens=body.max_tokens,
     )
-    return {"count": len(items), "items": items}
+    return FastJSONResponse(out)
+
+
+def _show_indexes():
+    with connection() as conn:
+        return execute_all(conn, "CALL SHOW_INDEXES() RETURN *", name="show_indexes")
 
 
 @app.get("/debug/indexes")
-def debug_indexes():
+async def debug_indexes():
     """
     Show existing indexes.
     """
-    res = _as_qr(get_conn().execute("CALL SHOW_INDEXES() RETURN *"))
-    out = []
-    while res.has_next():
-        row = res.get_next()
-        if isinstance(row, Mapping):
-            out.append(dict(row))
-        else:
-            out.append({
-                "table name": row[0],
-                "index name": row[1],
-                "index type": row[2],
-                "property names": row[3],
-                "extension loaded": row[4],
-                "index definition": row[5],
-            })
-    return {"indexes": out}
+    rows = await db.call(_show_indexes)
+    rows.columns = [
+        "table name",
+        "index name",
+        "index type",
+        "property names",
+        "extension loaded",
+        "index definition",
+    ]
+    return {"indexes": rows.records()}
+
+
+@app.post("/debug/reindex_text")
+async def reindex_text() -> dict[str, int]:
+    """
+    Rebuild the BM25 inverted index from all chunks (for data written before it existed).
+    """
+    return {"indexed": await db.call(write, "reindex_text", timeout=None)}
+
+
+@app.post("/debug/relink_chunks")
+async def relink_chunks() -> dict[str, int]:
+    """
+    Rebuild the NextChunk chain of every document (for data written before ingest linked chunks).
+    """
+    return {"linked": await db.call(write, "relink_chunks", timeout=None)}
+
+
+@app.get("/debug/pool")
+def debug_pool():
+    """
+    Show connection pool size and usage counters.
+    """
+    return get_pool().stats()
+
+
+@app.get("/metrics")
+def get_metrics() -> Response:
+    """
+    Per-statement Kùzu query histograms (plan/execute/fetch/total seconds,
+    rows) and error counters, in the Prometheus text format.
+    """
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/debug/slow_queries")
+def debug_slow_queries():
+    """
+    Recent queries slower than SLOW_QUERY_MS, newest first: phase timings,
+    rows, parameter names and, for read-only statements, Kùzu's PROFILE plan.
+    """
+    return {"threshold_ms": settings.slow_query_ms, "queries": slow_queries()}
+
+
+@app.get("/debug/db")
+def debug_db():
+    """
+    Async database executor: workers, queue bound, query timeout and
+    admitted/rejected/timed-out call counters.
+    """
+    return db.stats()
+
+
+@app.get("/debug/ingest_queue")
+async def debug_ingest_queue():
+    """
+    Queued ingest: pending jobs, batch limits, and submitted/batches/documents/
+    conflicts/failed counters.
+    """
+    return await db.call(write, "ingest_stats", timeout=None)
+
+
+@app.get("/debug/replica")
+def debug_replica():
+    """
+    Serving role and, on a replica, the snapshot version served against the
+    newest published one.
+    """
+    if settings.serve_role != "replica":
+        return {"role": settings.serve_role}
+    return get_replica().stats()
+
+
+@app.get("/debug/cache")
+def debug_cache():
+    """
+    Semantic search cache: size, generation and hit/miss/eviction counters.
+    """
+    return cache_stats()
+
+
+@app.get("/debug/vector_index")
+async def debug_vector_index():
+    """
+    Vector index freshness (chunks with/without an embedding) and the last
+    embedding jobs: applied mode, rebuild count and duration.
+    """
+    return await db.call(index_status)
+
+
+@app.get("/debug/quantized")
+async def debug_quantized(queries: int = Query(50, ge=1, le=1000), k: int = Query(10, ge=1, le=100)):
+    """
+    Quantized embedding store (`engine=quantized`): bytes per vector against
+    float32, and recall@k of the codes alone and after exact rescoring,
+    measured on `queries` perturbed stored vectors.
+    """
+    return await db.call(quantized_status, queries=queries, k=k, timeout=None)
 
 
 @app.post("/debug/set_dummy_embeddings")
-def set_dummy_embeddings() -> dict[str, int]:
+async def set_dummy_embeddings(
+    batch_size: int = Query(4096, ge=1),
+    pending_only: bool = False,
+    mode: EmbeddingMode = "auto",
+) -> dict[str, Any]:
     """
     Assigns a simple one-hot embedding to every chunk: index = chunk_ord % DIM.
     Useful to prove the vector index end-to-end without external models.
+    Goes through the batched embedding writer; the response carries its stats.
+    Pass pending_only=true to embed only chunks that have no embedding yet.
     """
-    conn = get_conn()
-
-    drop_vector_index_if_exists(conn)
-
-    res = _as_qr(conn.execute("""
-        MATCH (d:Document)-[:ContainsDocSection]->(s:Section)-[:ContainsSectionChunk]->(c:Chunk)
-        RETURN c.id AS id, c.ord AS ord
-        ORDER BY id
-    """))
-    updated = 0
-    while res.has_next():
-        row = res.get_next()
-        chunk_id = row["id"] if isinstance(row, Mapping) else row[0]
-        ord_ = row["ord"] if isinstance(row, Mapping) else row[1]
-        vec = _one_hot(int(ord_))
-        conn.execute("""
-            MATCH (c:Chunk) WHERE c.id = $id
-            SET c.embedding = $vec
-        """, {"id": int(chunk_id), "vec": vec})
-        updated += 1
-
-    create_vector_index(conn)
-
-    return {"updated": updated}
+    return await db.call(write, "dummy_embeddings", batch_size, pending_only, mode, timeout=None)
+
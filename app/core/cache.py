@@ -0,0 +1,112 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Hashable
+import threading
+import time
+
+# Process-wide data generation. Writers bump it after they commit; cached
+# results remember the generation they were computed at and are ignored once
+# it moves on.
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def generation() -> int:
+    """Current data generation."""
+    return _generation
+
+
+def bump_generation() -> int:
+    """Mark all data-derived caches stale. Call after a committed write.
+
+    Returns:
+        int: The new generation.
+    """
+    global _generation
+    with _generation_lock:
+        _generation += 1
+        return _generation
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL and generation check.
+
+    An entry is served only while it is younger than `ttl` seconds and was
+    stored at the current `generation()`. `maxsize <= 0` disables the cache.
+    Cached values are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[Any, float, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expired = 0
+        self._stale = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        """Cached value for `key`, or None on a miss (counts hits/misses)."""
+        if self.maxsize <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            value, stored, gen = entry
+            if gen != _generation:
+                self._stale += 1
+            elif self.ttl is not None and now - stored > self.ttl:
+                self._expired += 1
+            else:
+                self._data.move_to_end(key)
+                self._hits += 1
+                return value
+            del self._data[key]
+            self._misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any, gen: int | None = None) -> None:
+        """Store `value`, evicting the least recently used entries past `maxsize`.
+
+        Args:
+            key (Hashable): Cache key.
+            value (Any): Value to cache.
+            gen (int | None, optional): Generation the value was computed at;
+                read it before computing so a concurrent write is not masked.
+                Defaults to the current generation.
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic(), _generation if gen is None else gen)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Size and counters; `stale` entries were dropped after a data write."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "size": len(self._data),
+                "generation": _generation,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expired": self._expired,
+                "stale": self._stale,
+            }
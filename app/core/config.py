@@ -8,9 +8,109 @@ class Settings(BaseModel):
 
     otlp_endpoint: StrictStr | None = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
 
+    # Span export (app.core.tracing): "auto" (OTLP when the endpoint is set,
+    # else console), "otlp", "console" or "off". TRACE_SAMPLE_RATIO of new
+    # traces are kept; TRACE_PARENT_BASED follows an incoming traceparent's
+    # decision. TRACE_PROCESSOR is "batch" (background export) or "simple".
+    tracing: StrictStr = os.getenv("TRACING", "auto")
+
+    trace_sample_ratio: float = float(os.getenv("TRACE_SAMPLE_RATIO", "1.0"))
+
+    trace_parent_based: bool = os.getenv("TRACE_PARENT_BASED", "1").lower() not in ("0", "false")
+
+    trace_processor: StrictStr = os.getenv("TRACE_PROCESSOR", "batch")
+
     kuzu_db_path: StrictStr = os.getenv(
         "KUZU_DB_PATH", "./var/mini-graph-rag.kuzu")
 
+    kuzu_pool_size: int = int(os.getenv("KUZU_POOL_SIZE", "8"))
+
+    kuzu_pool_timeout: float = float(os.getenv("KUZU_POOL_TIMEOUT", "30"))
+
+    # Async request handlers run database work on DB_WORKERS threads
+    # (app.core.db); up to DB_QUEUE more calls wait, beyond that -> 503.
+    db_workers: int = int(os.getenv("DB_WORKERS", os.getenv("KUZU_POOL_SIZE", "8")))
+
+    db_queue: int = int(os.getenv("DB_QUEUE", "64"))
+
+    # Per-query time limit for read endpoints in seconds (0 = none) -> 504.
+    query_timeout: float = float(os.getenv("QUERY_TIMEOUT", "10"))
+
+    # Embedding jobs larger than this fraction of the indexed rows rebuild the
+    # HNSW index instead of inserting into it (app.graph.semantic).
+    embedding_rebuild_ratio: float = float(os.getenv("EMBEDDING_REBUILD_RATIO", "0.1"))
+
+    # In-process cache for semantic search results; size 0 disables it.
+    semantic_cache_size: int = int(os.getenv("SEMANTIC_CACHE_SIZE", "1024"))
+
+    semantic_cache_ttl: float = float(os.getenv("SEMANTIC_CACHE_TTL", "300"))
+
+    # Memory-mapped copy of the embeddings for exact search; empty means
+    # "<KUZU_DB_PATH>.vectors" (app.graph.exact).
+    exact_store_path: StrictStr = os.getenv("EXACT_STORE_PATH", "")
+
+    # engine="auto" scans exactly when at most this many vectors are candidates.
+    exact_max_candidates: int = int(os.getenv("EXACT_MAX_CANDIDATES", "50000"))
+
+    # Filtered HNSW queries fetch k * SEMANTIC_OVERFETCH candidates, growing by
+    # that factor per round for up to SEMANTIC_FILTER_ROUNDS rounds before
+    # scanning the document's vectors exactly.
+    semantic_overfetch: int = int(os.getenv("SEMANTIC_OVERFETCH", "4"))
+
+    semantic_filter_rounds: int = int(os.getenv("SEMANTIC_FILTER_ROUNDS", "3"))
+
+    # engine="quantized": code type ("int8" or "pq"), PQ sub-vectors (must
+    # divide 384), and how many candidates per result are re-scored exactly.
+    quantized_kind: StrictStr = os.getenv("QUANTIZED_KIND", "int8")
+
+    pq_subvectors: int = int(os.getenv("PQ_SUBVECTORS", "48"))
+
+    quantized_rescore: int = int(os.getenv("QUANTIZED_RESCORE", "10"))
+
+    # Queued ingest (app.graph.ingest_queue): jobs arriving within
+    # INGEST_BATCH_WAIT seconds share one transaction, up to INGEST_BATCH_DOCS
+    # documents or INGEST_BATCH_CHUNKS chunks; at most INGEST_QUEUE_SIZE jobs
+    # wait (beyond that -> 503) and the last INGEST_JOBS_KEEP stay queryable.
+    ingest_batch_docs: int = int(os.getenv("INGEST_BATCH_DOCS", "64"))
+
+    ingest_batch_chunks: int = int(os.getenv("INGEST_BATCH_CHUNKS", "20000"))
+
+    ingest_batch_wait: float = float(os.getenv("INGEST_BATCH_WAIT", "0.05"))
+
+    ingest_queue_size: int = int(os.getenv("INGEST_QUEUE_SIZE", "1000"))
+
+    ingest_jobs_keep: int = int(os.getenv("INGEST_JOBS_KEEP", "10000"))
+
+    # "primary": this process owns the database read-write (the default).
+    # "replica": serve reads from the newest snapshot in REPLICA_DIR and send
+    # writes to the writer process (app.replica), polling for new snapshots
+    # every REPLICA_REFRESH seconds; the writer keeps REPLICA_KEEP of them,
+    # and older ones until no worker serves them and REPLICA_GRACE seconds
+    # have passed since they were superseded.
+    serve_role: StrictStr = os.getenv("SERVE_ROLE", "primary")
+
+    replica_dir: StrictStr = os.getenv("REPLICA_DIR", "")
+
+    replica_refresh: float = float(os.getenv("REPLICA_REFRESH", "1.0"))
+
+    replica_keep: int = int(os.getenv("REPLICA_KEEP", "3"))
+
+    replica_grace: float = float(os.getenv("REPLICA_GRACE", "30"))
+
+    # Seconds the writer waits before publishing, so that writes arriving
+    # meanwhile share one snapshot (each publish copies the database file).
+    replica_publish_delay: float = float(os.getenv("REPLICA_PUBLISH_DELAY", "0.01"))
+
+    # Queries slower than SLOW_QUERY_MS (0 = off) are logged and kept for
+    # /debug/slow_queries (the last SLOW_QUERY_KEEP). SLOW_QUERY_PROFILE=1 adds
+    # Kùzu's PROFILE plan for read-only statements, which re-runs each one on
+    # the request's connection, so it is off by default (app.core.kuzu).
+    slow_query_ms: float = float(os.getenv("SLOW_QUERY_MS", "500"))
+
+    slow_query_profile: bool = os.getenv("SLOW_QUERY_PROFILE", "0").lower() not in ("0", "false")
+
+    slow_query_keep: int = int(os.getenv("SLOW_QUERY_KEEP", "100"))
+
     ollama_url: AnyHttpUrl | StrictStr = os.getenv(
         "OLLAMA_URL", "http://localhost:11434"
     )
@@ -0,0 +1,179 @@
+from __future__ import annotations
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+import asyncio
+import contextvars
+import threading
+
+from app.core.config import settings
+from app.core.kuzu import connection, query, query_timeout
+from app.core.results import Rows
+from app.core.tracing import get_tracer
+
+tracer = get_tracer(__name__)
+
+T = TypeVar("T")
+
+# Async entry point for database work from request handlers:
+#
+#     rows = await db.run(SEARCH_CHUNKS, params)
+#     out = await db.call(ingest_document, doc, timeout=None)
+#
+# Work runs on a dedicated, sized thread pool (separate from the fan-out
+# pool in app.core.executor, so a handler waiting on fan-out never starves
+# it). At most `DB_WORKERS + DB_QUEUE` calls are admitted at once; beyond
+# that `Saturated` is raised immediately instead of queueing without bound.
+
+_DEFAULT: Any = object()
+
+
+class Saturated(RuntimeError):
+    """Every worker is busy and the wait queue is full."""
+
+
+class QueryTimeout(TimeoutError):
+    """A call ran past its time limit (Kùzu interrupted it, or it never started)."""
+
+
+class DBExecutor:
+    """
+    Bounded async front of a thread pool for Kùzu work.
+
+    Each admitted call holds a slot from submission until its thread
+    finishes, so the bound also covers calls whose caller already gave up.
+    """
+
+    def __init__(self, workers: int, queue: int, timeout: float | None = None) -> None:
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self.workers = workers
+        self.queue = max(queue, 0)
+        self.timeout = timeout or None
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kuzu-db")
+        self._lock = threading.Lock()
+        self._active = 0
+        self._counters = {"admitted": 0, "rejected": 0, "timeouts": 0, "errors": 0}
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._active >= self.workers + self.queue:
+                self._counters["rejected"] += 1
+                raise Saturated(
+                    f"database busy: {self._active} calls in flight "
+                    f"(workers={self.workers}, queue={self.queue})"
+                )
+            self._active += 1
+            self._counters["admitted"] += 1
+
+    def _release(self, _: Future[Any]) -> None:
+        with self._lock:
+            self._active -= 1
+
+    async def call(self, fn: Callable[..., T], *args: Any, timeout: float | None = _DEFAULT, **kwargs: Any) -> T:
+        """Run `fn(*args, **kwargs)` on the pool and await its result.
+
+        Args:
+            fn (Callable[..., T]): Blocking function that takes pooled connections.
+            *args (Any): Positional arguments for `fn`.
+            timeout (float | None, optional): Seconds per query, applied to
+                every connection `fn` takes; the whole call, queueing
+                included, may take up to twice that.
+                None disables it (use for writes). Defaults to `QUERY_TIMEOUT`.
+            **kwargs (Any): Keyword arguments for `fn`.
+
+        Raises:
+            Saturated: If the pool and its queue are full.
+            QueryTimeout: If a query or the wait for a worker took too long.
+
+        Returns:
+            T: Whatever `fn` returns; its exceptions propagate.
+        """
+        limit = self.timeout if timeout is _DEFAULT else (timeout or None)
+        self._admit()
+        ctx = contextvars.copy_context()
+
+        def job() -> T:
+            with query_timeout(limit):
+                return fn(*args, **kwargs)
+
+        try:
+            fut = self._pool.submit(ctx.run, job)
+        except BaseException:
+            self._release(None)  # type: ignore[arg-type]
+            raise
+        fut.add_done_callback(self._release)
+        try:
+            # Kùzu interrupts each query that runs past `limit`; waiting up to
+            # twice that also bounds time spent queued (a job cancelled while
+            # still pending never runs).
+            return await asyncio.wait_for(asyncio.wrap_future(fut), limit and 2 * limit)
+        except asyncio.TimeoutError as e:
+            self._count("timeouts")
+            raise QueryTimeout(f"query did not finish within {limit}s") from e
+        except RuntimeError as e:
+            if str(e).startswith("Interrupted"):
+                self._count("timeouts")
+                raise QueryTimeout(f"query interrupted after {limit}s") from e
+            self._count("errors")
+            raise
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue": self.queue,
+                "timeout": self.timeout,
+                "in_flight": self._active,
+                **self._counters,
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executor: DBExecutor | None = None
+_lock = threading.Lock()
+
+
+def get_db_executor() -> DBExecutor:
+    """Process-wide executor sized by `DB_WORKERS`, `DB_QUEUE`, `QUERY_TIMEOUT`."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = DBExecutor(
+                workers=settings.db_workers,
+                queue=settings.db_queue,
+                timeout=settings.query_timeout,
+            )
+    return _executor
+
+
+async def call(fn: Callable[..., T], *args: Any, timeout: float | None = _DEFAULT, **kwargs: Any) -> T:
+    """`DBExecutor.call` on the process-wide executor."""
+    return await get_db_executor().call(fn, *args, timeout=timeout, **kwargs)
+
+
+def _fetch(name: str, params: dict[str, Any] | None) -> Rows:
+    with connection() as conn:
+        return query(conn, name, params)
+
+
+async def run(name: str, params: dict[str, Any] | None = None, timeout: float | None = _DEFAULT) -> Rows:
+    """Run a registered statement (see `app.core.kuzu.statement`) and fetch all rows.
+
+    Raises:
+        Saturated: If the pool and its queue are full.
+        QueryTimeout: If the query ran past `timeout`.
+    """
+    with tracer.start_as_current_span("kuzu.db.run") as span:
+        span.set_attribute("db.statement", name)
+        return await call(_fetch, name, params, timeout=timeout)
+
+
+def stats() -> dict[str, Any]:
+    """Counters of the process-wide executor."""
+    return get_db_executor().stats()
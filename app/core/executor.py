@@ -0,0 +1,37 @@
+from __future__ import annotations
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+import contextvars
+import threading
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+_executor: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Shared worker threads for fanning queries out over pooled connections.
+
+    Sized like the connection pool: more workers would only wait for a slot.
+    """
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.kuzu_pool_size),
+                thread_name_prefix="kuzu-worker",
+            )
+    return _executor
+
+
+def submit(fn: Callable[..., T], *args: Any, **kwargs: Any) -> Future[T]:
+    """Run `fn` on the shared executor in a copy of the caller's context.
+
+    Copying the context keeps tracing spans opened in the worker nested
+    under the caller's span.
+    """
+    ctx = contextvars.copy_context()
+    return get_executor().submit(ctx.run, fn, *args, **kwargs)
@@ -1,8 +1,19 @@
 from __future__ import annotations
+from collections import deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
 from pathlib import Path
+from typing import Any, Iterator
+import logging
+import re
 import threading
+import time
+import warnings
+import weakref
 import kuzu
+from app.core import metrics
 from app.core.config import settings
+from app.core.results import Rows, fetch
 from app.core.tracing import get_tracer
 
 tracer = get_tracer(__name__)
@@ -24,13 +35,482 @@ def get_db() -> kuzu.Database:
     return _db
 
 
-def get_conn() -> kuzu.Connection:
-    """Get a Kuzu connection.
+# Kùzu runs one write transaction at a time per database; a second BEGIN
+# fails instead of waiting. Everything that writes from the API (the
+# `app.replica.write` operations and the ingest queue) takes this lock, which
+# also makes their title checks and inserts atomic.
+write_lock = threading.RLock()
+
+
+class PoolExhausted(TimeoutError):
+    """Raised when no connection became free within the acquire timeout."""
+
+
+class PoolClosed(RuntimeError):
+    """Raised by `acquire` on a pool that `close` (or `use_database`) retired."""
+
+
+# Time limit for each query on connections taken in this context, in seconds
+# (None/0 = none). Kùzu interrupts a query that runs past it with
+# RuntimeError("Interrupted."). Worker threads inherit it through
+# `contextvars.copy_context()` (see app.core.executor, app.core.db).
+_query_timeout: ContextVar[float | None] = ContextVar("kuzu_query_timeout", default=None)
+
+
+@contextmanager
+def query_timeout(seconds: float | None) -> Iterator[None]:
+    """Limit every query on connections taken inside the block to `seconds`."""
+    token = _query_timeout.set(seconds)
+    try:
+        yield
+    finally:
+        _query_timeout.reset(token)
+
+
+class ConnectionPool:
+    """
+    Bounded pool of Kuzu connections.
+
+    A connection is used by one thread at a time. `connection()` is re-entrant:
+    nested calls on the same thread get the connection the thread already
+    holds, so helpers can be composed (and share a transaction) without
+    taking a second slot.
+    """
+
+    def __init__(self, max_size: int, timeout: float | None = None) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be >= 1")
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle: list[kuzu.Connection] = []
+        self._created = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._closed = False
+        self._counters = {"acquired": 0, "reused": 0, "waited": 0, "timeouts": 0}
+
+    def acquire(self, timeout: float | None = None) -> kuzu.Connection:
+        """Take a connection from the pool, creating one if below `max_size`.
+
+        Args:
+            timeout (float | None, optional): Seconds to wait for a free
+                connection. Defaults to the pool timeout (None = wait forever).
+
+        Raises:
+            PoolExhausted: If no connection became free in time.
+            PoolClosed: If the pool is closed.
+
+        Returns:
+            kuzu.Connection: A connection owned by the caller until `release`.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        with self._cond:
+            if not self._closed and not self._idle and self._created >= self.max_size:
+                self._counters["waited"] += 1
+                if not self._cond.wait_for(lambda: bool(self._idle) or self._closed, timeout):
+                    self._counters["timeouts"] += 1
+                    raise PoolExhausted(
+                        f"no Kuzu connection free after {timeout}s (max_size={self.max_size})"
+                    )
+            if self._closed:
+                raise PoolClosed("connection pool is closed")
+            self._counters["acquired"] += 1
+            self._in_use += 1
+            if self._idle:
+                self._counters["reused"] += 1
+                return self._idle.pop()
+            self._created += 1
+        try:
+            return kuzu.Connection(get_db())
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn: kuzu.Connection) -> None:
+        """Return a connection to the pool (closing it if the pool is closed)."""
+        with self._cond:
+            self._in_use -= 1
+            if self._closed:
+                self._created -= 1
+                conn.close()
+                return
+            self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: float | None = None) -> Iterator[kuzu.Connection]:
+        """Context manager around `acquire`/`release` (re-entrant per thread)."""
+        held: kuzu.Connection | None = getattr(self._local, "conn", None)
+        if held is not None:
+            yield held
+            return
+
+        conn = self.acquire(timeout)
+        self._local.conn = conn
+        try:
+            conn.set_query_timeout(int((_query_timeout.get() or 0) * 1000))
+            yield conn
+        except BaseException:
+            # Never hand out a connection with a half-open transaction.
+            try:
+                conn.execute("ROLLBACK;")
+            except Exception:
+                pass
+            raise
+        finally:
+            self._local.conn = None
+            self.release(conn)
+
+    def stats(self) -> dict[str, Any]:
+        """Snapshot of pool size and usage counters."""
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "created": self._created,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                **self._counters,
+            }
+
+    def close(self) -> None:
+        """Drop idle connections. Connections in use are dropped on release,
+        and `acquire` raises from now on."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            for conn in self._idle:
+                conn.close()
+            self._created -= len(self._idle)
+            self._idle.clear()
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Get the process-wide connection pool.
 
     Returns:
+        ConnectionPool: Pool sized by `KUZU_POOL_SIZE`.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                max_size=settings.kuzu_pool_size,
+                timeout=settings.kuzu_pool_timeout,
+            )
+    return _pool
+
+
+def use_database(db: kuzu.Database) -> None:
+    """Serve from `db` from now on, with a fresh connection pool.
+
+    Used by read replicas (app.replica) to move to a newer snapshot. Queries
+    already running finish on the old database; its idle connections are
+    closed and the rest go away with their last borrower.
+    """
+    global _db, _pool
+    with _db_lock, _pool_lock:
+        old = _pool
+        _db = db
+        _pool = ConnectionPool(max_size=settings.kuzu_pool_size, timeout=settings.kuzu_pool_timeout)
+    if old is not None:
+        old.close()
+
+
+@contextmanager
+def connection(timeout: float | None = None) -> Iterator[kuzu.Connection]:
+    """Borrow a pooled Kuzu connection for the duration of the block.
+
+    Args:
+        timeout (float | None, optional): Seconds to wait for a free connection.
+
+    Yields:
         kuzu.Connection: Kuzu connection
     """
-    return kuzu.Connection(get_db())
+    with ExitStack() as stack:
+        while True:
+            try:
+                conn = stack.enter_context(get_pool().connection(timeout))
+                break
+            except PoolClosed:
+                continue  # `use_database` swapped pools since `get_pool`; take the new one
+        yield conn
+
+
+_statements: dict[str, str] = {}
+_prepared: weakref.WeakKeyDictionary[kuzu.Connection, dict[str, kuzu.PreparedStatement]] = (
+    weakref.WeakKeyDictionary()
+)
+_prepared_lock = threading.Lock()
+
+
+def statement(name: str, query: str) -> str:
+    """Register a named Cypher statement for `run`.
+
+    Args:
+        name (str): Registry key; must be unique per query text.
+        query (str): Cypher text. Vary behaviour through parameters, not string
+            formatting, so each name has exactly one plan.
+
+    Raises:
+        ValueError: If `name` is already registered with a different query.
+
+    Returns:
+        str: `name`, so modules can keep it as a constant.
+    """
+    existing = _statements.get(name)
+    if existing is not None and existing != query:
+        raise ValueError(f"statement '{name}' is already registered with a different query")
+    _statements[name] = query
+    return name
+
+
+def statements() -> dict[str, str]:
+    """Registered statements by name."""
+    return dict(_statements)
+
+
+def prepared(conn: kuzu.Connection, name: str, params: dict[str, Any] | None = None) -> kuzu.PreparedStatement:
+    """Get the prepared form of a registered statement for this connection.
+
+    Statements are prepared lazily, once per connection, using the first
+    call's parameters to fix their types.
+
+    Args:
+        conn (kuzu.Connection): Connection the statement will run on.
+        name (str): Registered statement name.
+        params (dict[str, Any] | None, optional): Parameters of the first call.
+
+    Returns:
+        kuzu.PreparedStatement: Reusable prepared statement.
+    """
+    cache = _prepared.get(conn)
+    if cache is None:
+        with _prepared_lock:
+            cache = _prepared.setdefault(conn, {})
+    ps = cache.get(name)
+    if ps is None:
+        # The binding flags separate prepare+execute as deprecated, but it is
+        # the only way to keep a parsed/planned statement across calls.
+        with _prepared_lock, warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            ps = conn.prepare(_statements[name], params or {})
+        if not ps.is_success():
+            raise RuntimeError(ps.get_error_message())
+        cache[name] = ps
+    return ps
+
+
+def invalidate(*names: str) -> None:
+    """Drop cached prepared statements so the next `run` re-prepares them.
+
+    Call after DDL that changes what a statement binds to (e.g. dropping an
+    index it queries).
+
+    Args:
+        *names (str): Statement names to drop; none means all.
+    """
+    with _prepared_lock:
+        for cache in _prepared.values():
+            if not names:
+                cache.clear()
+            for name in names:
+                cache.pop(name, None)
+
+
+# --- instrumented execution --------------------------------------------------
+#
+# Every query goes through `_instrumented`: registered statements via `run` /
+# `query`, ad-hoc text (DDL, COPY, transaction control) via `execute` /
+# `execute_all`. Each one gets a `kuzu.query` span and per-name histograms
+# (`/metrics`), split into phases:
+#
+#   plan     parse + bind + plan: the prepare call when a connection first
+#            sees a statement, plus Kùzu's reported compiling time (Kùzu
+#            does not report parsing and planning separately)
+#   execute  Kùzu's reported execution time
+#   fetch    decoding the result into Python rows (`get_all()`)
+#   total    wall time of the whole call
+#
+# Calls slower than SLOW_QUERY_MS are logged and kept for
+# `/debug/slow_queries`, with Kùzu's PROFILE plan for read-only statements.
+
+log = logging.getLogger(__name__)
+
+QUERY_SECONDS = metrics.register(metrics.Histogram(
+    "kuzu_query_seconds", "Kùzu query time by statement and phase.", ("query", "phase"),
+))
+QUERY_ROWS = metrics.register(metrics.Histogram(
+    "kuzu_query_rows", "Rows returned per Kùzu query.", ("query",), buckets=metrics.ROWS_BUCKETS,
+))
+QUERY_ERRORS = metrics.register(metrics.Counter(
+    "kuzu_query_errors_total", "Kùzu queries that raised, by statement.", ("query",),
+))
+
+_slow: deque[dict[str, Any]] = deque(maxlen=max(settings.slow_query_keep, 1))
+_slow_lock = threading.Lock()
+
+# PROFILE runs the statement a second time, so only plans of statements that
+# cannot write are captured.
+_WRITES = re.compile(
+    r"\b(CREATE|MERGE|SET|DELETE|REMOVE|COPY|DROP|ALTER|INSTALL|LOAD|CHECKPOINT)\b|CALL\s+(CREATE|DROP)_",
+    re.IGNORECASE,
+)
+_READS = re.compile(r"^\s*(MATCH|OPTIONAL|UNWIND|WITH|RETURN|CALL)\b", re.IGNORECASE)
+
+
+def _read_only(cypher: str) -> bool:
+    return bool(_READS.match(cypher)) and not _WRITES.search(cypher)
+
+
+def _ad_hoc_name(cypher: str) -> str:
+    # Bounded label set: the leading keyword ("match", "copy", "begin", ...)
+    head = cypher.lstrip().split(None, 1)
+    return head[0].lower().rstrip(";") if head else "empty"
+
+
+def _profile(conn: kuzu.Connection, cypher: str, params: dict[str, Any]) -> str | None:
+    try:
+        res = conn.execute(f"PROFILE {cypher}", params)
+        res = res[0] if isinstance(res, list) else res
+        return "\n".join(str(r[0]) for r in res.get_all())
+    except Exception as e:  # the plan is best effort; the query already succeeded
+        return f"PROFILE failed: {e}"
+
+
+def _record_slow(
+    conn: kuzu.Connection, name: str, cypher: str, params: dict[str, Any], timings: dict[str, float], rows: int
+) -> None:
+    entry: dict[str, Any] = {
+        "query": name,
+        "at": time.time(),
+        "rows": rows,
+        **{f"{phase}_ms": round(ms, 3) for phase, ms in timings.items()},
+        "params": sorted(params),
+        "cypher": cypher,
+        "plan": _profile(conn, cypher, params) if settings.slow_query_profile and _read_only(cypher) else None,
+    }
+    with _slow_lock:
+        _slow.append(entry)
+    log.warning(
+        "slow query %s: %.1f ms (plan %.1f, execute %.1f, fetch %.1f), %d rows%s",
+        name, timings["total"], timings["plan"], timings["execute"], timings["fetch"], rows,
+        f"\n{entry['plan']}" if entry["plan"] else "",
+    )
+
+
+def _instrumented(
+    conn: kuzu.Connection,
+    name: str,
+    params: dict[str, Any] | None,
+    cypher: str | None = None,
+    fetch_rows: bool = False,
+) -> tuple[kuzu.QueryResult, Rows | None]:
+    """Execute a registered statement (`cypher=None`) or ad-hoc text, measured."""
+    params = params or {}
+    with tracer.start_as_current_span("kuzu.query") as span:
+        span.set_attribute("db.statement", name)
+        t0 = time.perf_counter()
+        try:
+            if cypher is None:
+                target: str | kuzu.PreparedStatement = prepared(conn, name, params)
+                text = _statements[name]
+            else:
+                target = text = cypher
+            t1 = time.perf_counter()
+            res = conn.execute(target, params)
+            res = res[0] if isinstance(res, list) else res
+            t2 = time.perf_counter()
+            rows = fetch(res) if fetch_rows else None
+            t3 = time.perf_counter()
+        except Exception:
+            QUERY_ERRORS.inc(name)  # the span records the exception itself
+            raise
+
+        n = len(rows) if rows is not None else res.get_num_tuples()
+        timings = {
+            "plan": (t1 - t0) * 1000.0 + res.get_compiling_time(),
+            "execute": res.get_execution_time(),
+            "fetch": (t3 - t2) * 1000.0,
+            "total": (t3 - t0) * 1000.0,
+        }
+        for phase, ms in timings.items():
+            QUERY_SECONDS.observe(ms / 1000.0, name, phase)
+            span.set_attribute(f"kuzu.{phase}_ms", round(ms, 3))
+        QUERY_ROWS.observe(n, name)
+        span.set_attribute("kuzu.rows", n)
+        if 0 < settings.slow_query_ms <= timings["total"]:
+            _record_slow(conn, name, text, params, timings, n)
+        return res, rows
+
+
+def run(conn: kuzu.Connection, name: str, params: dict[str, Any] | None = None) -> kuzu.QueryResult:
+    """Execute a registered statement on `conn` via its cached prepared form.
+
+    Use `query` when the whole result set is read, so fetching is measured too.
+
+    Args:
+        conn (kuzu.Connection): Connection to run on.
+        name (str): Registered statement name.
+        params (dict[str, Any] | None, optional): Query parameters.
+
+    Returns:
+        kuzu.QueryResult: Query result.
+    """
+    return _instrumented(conn, name, params)[0]
+
+
+def query(conn: kuzu.Connection, name: str, params: dict[str, Any] | None = None) -> Rows:
+    """Execute a registered statement and fetch all its rows.
+
+    Args:
+        conn (kuzu.Connection): Connection to run on.
+        name (str): Registered statement name.
+        params (dict[str, Any] | None, optional): Query parameters.
+
+    Returns:
+        Rows: Column names and row values.
+    """
+    return _instrumented(conn, name, params, fetch_rows=True)[1]  # type: ignore[return-value]
+
+
+def execute(
+    conn: kuzu.Connection, cypher: str, params: dict[str, Any] | None = None, name: str | None = None
+) -> kuzu.QueryResult:
+    """Execute ad-hoc Cypher (DDL, COPY, transaction control, built text).
+
+    Args:
+        conn (kuzu.Connection): Connection to run on.
+        cypher (str): Query text.
+        params (dict[str, Any] | None, optional): Query parameters.
+        name (str | None, optional): Name for spans, metrics and the slow-query
+            log. Defaults to the leading keyword (`begin`, `copy`, ...); keep
+            names to a fixed set, never built from data.
+
+    Returns:
+        kuzu.QueryResult: Query result.
+    """
+    return _instrumented(conn, name or _ad_hoc_name(cypher), params, cypher)[0]
+
+
+def execute_all(
+    conn: kuzu.Connection, cypher: str, params: dict[str, Any] | None = None, name: str | None = None
+) -> Rows:
+    """`execute` and fetch all rows."""
+    return _instrumented(conn, name or _ad_hoc_name(cypher), params, cypher, fetch_rows=True)[1]  # type: ignore[return-value]
+
+
+def slow_queries() -> list[dict[str, Any]]:
+    """Recent calls over SLOW_QUERY_MS, newest first."""
+    with _slow_lock:
+        return list(reversed(_slow))
 
 
 def ensure_database() -> None:
@@ -38,4 +518,4 @@ def ensure_database() -> None:
     Ensure the Kuzu database is created.
     """
     with tracer.start_as_current_span("ensure_database"):
-        get_db()
\ No newline at end of file
+        get_db()
@@ -0,0 +1,122 @@
+from __future__ import annotations
+from bisect import bisect_left
+from typing import Iterable, TypeVar
+import threading
+
+# In-process metrics in the Prometheus text format, served at `/metrics`.
+# Each process keeps its own (a replica worker reports its own queries).
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from a prepared point lookup (~0.2 ms) to a scan that hits QUERY_TIMEOUT
+SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROWS_BUCKETS = (0, 1, 10, 100, 1000, 10_000, 100_000)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed buckets, per label set.
+
+    Label values must come from a small set (statement names, phases), since
+    every combination is kept for the life of the process.
+    """
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets: Iterable[float] = SECONDS_BUCKETS) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple[str, ...], list[float]] = {}  # bucket counts..., sum, count
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def count(self, *labels: str) -> int:
+        with self._lock:
+            s = self._series.get(labels)
+            return int(s[-1]) if s else 0
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((k, list(v)) for k, v in self._series.items())
+        for key, s in series:
+            cum = 0.0
+            for le, n in zip(self.buckets, s):
+                cum += n
+                bucket = _labels(self.labels, key, 'le="%s"' % _num(le))
+                out.append(f"{self.name}_bucket{bucket} {_num(cum)}")
+            bucket = _labels(self.labels, key, 'le="+Inf"')
+            out.append(f"{self.name}_bucket{bucket} {_num(s[-1])}")
+            out.append(f"{self.name}_sum{_labels(self.labels, key)} {_num(s[-2])}")
+            out.append(f"{self.name}_count{_labels(self.labels, key)} {_num(s[-1])}")
+        return out
+
+
+class Counter:
+    """Monotonic counter per label set."""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, by: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + by
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(labels, 0.0)
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        out.extend(f"{self.name}{_labels(self.labels, k)} {_num(v)}" for k, v in values)
+        return out
+
+
+M = TypeVar("M", Histogram, Counter)
+
+_registry: list[Histogram | Counter] = []
+
+
+def register(metric: M) -> M:
+    """Add `metric` to what `render` exposes."""
+    _registry.append(metric)
+    return metric
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    lines: list[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,104 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Mapping, Sequence, cast
+import json
+
+from fastapi.responses import Response
+from kuzu import QueryResult
+
+try:  # optional: `pip install mini-graph-rag[fast]`
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None  # type: ignore[assignment]
+
+
+@dataclass(slots=True)
+class Rows:
+    """
+    A whole result set fetched in one call: column names plus row lists.
+
+    Rows stay as the lists Kùzu hands back; dicts are only built if a caller
+    asks for `records()`.
+    """
+
+    columns: list[str]
+    rows: list[list[Any]]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def column(self, name: str) -> list[Any]:
+        """Values of a single column."""
+        i = self.columns.index(name)
+        return [r[i] for r in self.rows]
+
+    def records(self) -> list[dict[str, Any]]:
+        """Rows as dicts keyed by column name (projection order)."""
+        cols = self.columns
+        return [dict(zip(cols, r)) for r in self.rows]
+
+
+def fetch(res: QueryResult) -> Rows:
+    """Fetch a full result set with `get_all()` instead of a `get_next()` loop.
+
+    Args:
+        res (QueryResult): Result of `Connection.execute` / `run`.
+
+    Returns:
+        Rows: Column names and row values.
+    """
+    return Rows(columns=res.get_column_names(), rows=res.get_all())
+
+
+def first_scalar(res: QueryResult) -> Any:
+    """
+    Return the first column of the first row, regardless of whether rows are
+    sequence-like (tuple/list) or mapping-like (dict/record).
+    """
+    row = res.get_next()
+    if row is None:
+        return None
+    # Pylance sometimes thinks row is a Mapping[str, Any]
+    if isinstance(row, Mapping):
+        # take the first column’s value
+        return next(iter(row.values()), None)
+    # otherwise treat as a positional row (tuple/list)
+    seq = cast(Sequence[Any], row)
+    return seq[0] if len(seq) else None
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize to compact JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str).encode()
+
+
+def payload(rows: Rows, shape: str = "records", **extra: Any) -> dict[str, Any]:
+    """Build the usual `{"count", "items"}` body, or its columnar variant.
+
+    Args:
+        rows (Rows): Fetched result set.
+        shape (str, optional): "records" -> `items` is a list of objects;
+            "columns" -> `columns` + `rows` (list of lists), no per-row dicts.
+        **extra (Any): Additional top-level fields.
+
+    Returns:
+        dict[str, Any]: Response body.
+    """
+    if shape == "columns":
+        return {"count": len(rows), "columns": rows.columns, "rows": rows.rows, **extra}
+    return {"count": len(rows), "items": rows.records(), **extra}
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response that skips FastAPI's `jsonable_encoder` pass.
+
+    Only use it for bodies that are already plain JSON types (e.g. `payload`).
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,33 +1,75 @@
 from __future__ import annotations
+from typing import TYPE_CHECKING
 from opentelemetry import trace
-from opentelemetry.sdk.resources import Resource
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import (
-    BatchSpanProcessor,
-    ConsoleSpanExporter,
-    SimpleSpanProcessor,
-)
-from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import (
-    OTLPSpanExporter
-)
-from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
-from opentelemetry.instrumentation.logging import LoggingInstrumentor
 from .config import settings
 
+if TYPE_CHECKING:
+    from opentelemetry.sdk.trace.export import SpanExporter
+    from opentelemetry.sdk.trace.sampling import Sampler
+
+# TRACING picks the exporter: "otlp", "console", "off", or "auto" (otlp when
+# OTEL_EXPORTER_OTLP_ENDPOINT is set, console otherwise). With "off" no
+# provider is installed, so `get_tracer` hands out OpenTelemetry's no-op
+# tracer and the request is not instrumented at all.
+#
+# Spans leave through a BatchSpanProcessor: export runs on its own thread,
+# off the request path (tune with the standard OTEL_BSP_* variables).
+# TRACE_PROCESSOR=simple exports each span synchronously as it ends, for
+# debugging only.
+#
+# Only the API is imported at module level. The SDK, the exporter and the
+# instrumentation packages (the gRPC OTLP exporter alone pulls in grpcio and
+# protobuf) are imported by `init_tracing`, and only for the mode in use.
+
+
+def tracing_mode() -> str:
+    """Exporter in effect: "otlp", "console" or "off"."""
+    mode = settings.tracing.lower()
+    if mode == "auto":
+        return "otlp" if settings.otlp_endpoint else "console"
+    if mode not in ("otlp", "console", "off"):
+        raise ValueError(f"TRACING must be auto, otlp, console or off, not {settings.tracing!r}")
+    return mode
+
+
+def sampler() -> Sampler:
+    """Keep TRACE_SAMPLE_RATIO of new traces; with TRACE_PARENT_BASED, follow
+    the caller's sampling decision when a request carries one."""
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    ratio = TraceIdRatioBased(min(max(settings.trace_sample_ratio, 0.0), 1.0))
+    return ParentBased(ratio) if settings.trace_parent_based else ratio
+
+
+def _exporter(mode: str) -> SpanExporter:
+    if mode == "otlp":
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+
+        return OTLPSpanExporter(endpoint=settings.otlp_endpoint, insecure=True)
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    return ConsoleSpanExporter()
+
 
 def init_tracing(app) -> None:
-    resource = Resource.create({"service.name": settings.service_name})
-    provider = TracerProvider(resource=resource)
+    mode = tracing_mode()
+    if mode == "off":
+        return
+
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    from opentelemetry.instrumentation.logging import LoggingInstrumentor
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor
 
-    if settings.otlp_endpoint:
-        explorer = OTLPSpanExporter(
-            endpoint=settings.otlp_endpoint,
-            insecure=True)
+    resource = Resource.create({"service.name": settings.service_name})
+    provider = TracerProvider(resource=resource, sampler=sampler())
 
-        processor = BatchSpanProcessor(explorer)
+    exporter = _exporter(mode)
+    if settings.trace_processor == "simple":
+        processor = SimpleSpanProcessor(exporter)
     else:
-        explorer = ConsoleSpanExporter()
-        processor = SimpleSpanProcessor(explorer)
+        processor = BatchSpanProcessor(exporter)
 
     provider.add_span_processor(processor)
     trace.set_tracer_provider(provider)
@@ -0,0 +1,255 @@
+from __future__ import annotations
+from typing import Any, Callable, Iterable, Sequence
+
+from kuzu import Connection
+from app.core.kuzu import connection, execute, query, run, statement
+from app.core.results import Rows
+from app.core.tracing import get_tracer
+
+tracer = get_tracer(__name__)
+
+# Chunks of a document are chained in reading order (section ord, then chunk
+# ord) by NextChunk edges, across section boundaries. A hit's neighbours are
+# then a bounded walk along the chain, not a re-listing of its document.
+
+MAX_WINDOW = 5  # neighbours on each side of a hit
+
+_LINK = statement("link_chunks", """
+UNWIND $rows AS r
+MATCH (a:Chunk {id: r.a}), (b:Chunk {id: r.b})
+CREATE (a)-[:NextChunk]->(b)
+""")
+
+_CHAIN = statement("chunk_chain", """
+MATCH (d:Document)-[:ContainsDocSection]->(s:Section)-[:ContainsSectionChunk]->(c:Chunk)
+RETURN d.id AS document_id, c.id AS chunk_id
+ORDER BY d.id, s.ord, c.ord
+""")
+
+# One branch per direction; `hop` is the signed distance from the hit.
+_HIT = """
+UNWIND $ids AS hit
+MATCH (c:Chunk {id: hit})
+WITH hit, 0 AS hop, c
+"""
+
+_AFTER = """
+UNWIND $ids AS hit
+MATCH (:Chunk {id: hit})-[e:NextChunk*1..{n}]->(c:Chunk)
+WITH hit, length(e) AS hop, c
+"""
+
+_BEFORE = """
+UNWIND $ids AS hit
+MATCH (c:Chunk)-[e:NextChunk*1..{n}]->(:Chunk {id: hit})
+WITH hit, -length(e) AS hop, c
+"""
+
+_RETURN = """
+MATCH (d:Document)-[:ContainsDocSection]->(s:Section)-[:ContainsSectionChunk]->(c)
+RETURN hit, hop, d.id AS document_id, d.title AS document, s.id AS section_id,
+       s.title AS section, s.ord AS section_ord, c.id AS chunk_id, c.ord AS chunk_ord,
+       c.text AS text
+"""
+
+_CHUNK_FIELDS = ("section_id", "section", "section_ord", "chunk_id", "chunk_ord", "text")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: about four characters per token for English text."""
+    return (len(text) + 3) // 4
+
+
+def link_chunks(conn: Connection, chains: Iterable[Sequence[int]]) -> int:
+    """Create NextChunk edges along each chain of chunk ids.
+
+    Args:
+        conn (Connection): Connection, usually inside the caller's transaction.
+        chains (Iterable[Sequence[int]]): Chunk ids of one document each, in
+            reading order.
+
+    Returns:
+        int: Number of edges created.
+    """
+    rows = [{"a": int(a), "b": int(b)} for ids in chains for a, b in zip(ids, ids[1:])]
+    if rows:
+        run(conn, _LINK, {"rows": rows})
+    return len(rows)
+
+
+def relink(conn: Connection) -> int:
+    """Drop and recreate every NextChunk edge from the document structure.
+
+    For databases with chunks written before ingest linked them, or by the
+    per-row `create_chunk` helper.
+
+    Args:
+        conn (Connection): Connection to use (one transaction for the rebuild).
+
+    Returns:
+        int: Number of edges created.
+    """
+    execute(conn, "BEGIN TRANSACTION;")
+    try:
+        execute(conn, "MATCH (:Chunk)-[e:NextChunk]->(:Chunk) DELETE e;", name="drop_next_chunks")
+        chains: dict[int, list[int]] = {}
+        for doc_id, chunk_id in query(conn, _CHAIN).rows:
+            chains.setdefault(int(doc_id), []).append(int(chunk_id))
+        total = link_chunks(conn, chains.values())
+    except Exception:
+        execute(conn, "ROLLBACK;")
+        raise
+    execute(conn, "COMMIT;")
+    return total
+
+
+def _window_statement(window: int) -> str:
+    # Variable-length bounds must be literals, so each window size is its own
+    # statement (and plan).
+    branches = [_HIT]
+    if window:
+        branches += [_AFTER.replace("{n}", str(window)), _BEFORE.replace("{n}", str(window))]
+    return statement(f"context_window_{window}", "UNION ALL".join(b + _RETURN for b in branches))
+
+
+def context_window_rows(chunk_ids: Sequence[int], window: int = 1) -> Rows:
+    """Each hit plus up to `window` chunks either side of it, in one query.
+
+    Args:
+        chunk_ids (Sequence[int]): Hit chunk ids.
+        window (int, optional): Neighbours per side, 0 to MAX_WINDOW. Defaults to 1.
+
+    Raises:
+        ValueError: If `window` is out of range.
+
+    Returns:
+        Rows: One row per (hit, chunk in its window): `hit`, signed `hop`, the
+        document and section of the chunk, and the chunk itself. Hits that do
+        not exist have no rows.
+    """
+    if not 0 <= window <= MAX_WINDOW:
+        raise ValueError(f"window must be between 0 and {MAX_WINDOW}")
+    name = _window_statement(window)
+    if not chunk_ids:
+        # An empty list parameter has no element type Kùzu can bind against.
+        return Rows(columns=[], rows=[])
+    with connection() as conn:
+        return query(conn, name, {"ids": [int(i) for i in chunk_ids]})
+
+
+def _nearest_first(
+    windows: dict[int, dict[int, dict[str, Any]]], hits: list[int], window: int
+) -> Iterable[tuple[int, dict[str, Any]]]:
+    # (hit, chunk row) pairs: all hits, then one step out from each, and so on.
+    for dist in range(window + 1):
+        for h in hits:
+            for hop in ((0,) if dist == 0 else (-dist, dist)):
+                r = windows[h].get(hop)
+                if r is not None:  # None past the start or end of the document
+                    yield h, r
+
+
+def assemble_context(
+    chunk_ids: Sequence[int],
+    window: int = 1,
+    max_chars: int | None = None,
+    max_tokens: int | None = None,
+    count_tokens: Callable[[str], int] = estimate_tokens,
+) -> dict[str, Any]:
+    """Expand search hits into deduplicated passages of neighbouring chunks.
+
+    Chunks are taken nearest-first: every hit, then the chunks one step away
+    from each hit (in hit order), then two steps, and so on. A chunk already
+    taken for another hit is not counted again, and windows that share a
+    chunk become one passage. Taking stops at the first chunk that would
+    exceed `max_chars` or `max_tokens` (counted on chunk text), so every hit
+    keeps a contiguous run around it.
+
+    Args:
+        chunk_ids (Sequence[int]): Hit chunk ids, best first. Repeats are ignored.
+        window (int, optional): Neighbours per side, 0 to MAX_WINDOW. Defaults to 1.
+        max_chars (int | None, optional): Character budget. Defaults to None (none).
+        max_tokens (int | None, optional): Token budget. Defaults to None (none).
+        count_tokens (Callable[[str], int], optional): Tokenizer for `max_tokens`.
+            Defaults to `estimate_tokens`.
+
+    Raises:
+        ValueError: If `window` is out of range.
+
+    Returns:
+        dict[str, Any]: `passages` in order of their best hit, each with
+        `document_id`, `document`, `hits`, `chunks` (reading order, with their
+        section) and joined `text`; totals `chars`, `tokens`, `truncated`;
+        and the `missing` hit ids.
+    """
+    hits = list(dict.fromkeys(int(i) for i in chunk_ids))
+    with tracer.start_as_current_span("kuzu.assemble_context") as span:
+        span.set_attribute("context.hits", len(hits))
+        span.set_attribute("context.window", window)
+        rows = context_window_rows(hits, window)
+
+        # hit -> hop -> chunk row
+        windows: dict[int, dict[int, dict[str, Any]]] = {}
+        for r in rows.records():
+            windows.setdefault(r["hit"], {})[r["hop"]] = r
+
+        taken: dict[int, dict[str, Any]] = {}
+        owner: dict[int, int] = {}  # hit -> representative hit of its passage
+        chars = tokens = 0
+        truncated = False
+
+        def root(h: int) -> int:
+            while owner[h] != h:
+                h = owner[h]
+            return h
+
+        found = [h for h in hits if 0 in windows.get(h, {})]
+        for h in found:
+            owner[h] = h
+        first: dict[int, int] = {}  # chunk id -> first hit that took it
+        for h, r in _nearest_first(windows, found, window):
+            cid = r["chunk_id"]
+            if cid in taken:
+                owner[root(h)] = root(first[cid])  # overlapping windows
+                continue
+            text = r["text"] or ""
+            n_chars, n_tokens = len(text), count_tokens(text)
+            if (max_chars is not None and chars + n_chars > max_chars) or (
+                max_tokens is not None and tokens + n_tokens > max_tokens
+            ):
+                truncated = True
+                break
+            taken[cid], first[cid] = r, h
+            chars, tokens = chars + n_chars, tokens + n_tokens
+
+        passages: dict[int, dict[str, Any]] = {}
+        for h in found:
+            r0 = windows[h][0]
+            p = passages.setdefault(root(h), {
+                "document_id": r0["document_id"],
+                "document": r0["document"],
+                "hits": [],
+                "chunks": [],
+            })
+            if r0["chunk_id"] in taken:
+                p["hits"].append(h)
+        for cid, r in taken.items():
+            passages[root(first[cid])]["chunks"].append({k: r[k] for k in _CHUNK_FIELDS})
+
+        out = []
+        for p in passages.values():
+            if not p["chunks"]:
+                continue  # the budget ran out before this hit
+            p["chunks"].sort(key=lambda c: (c["section_ord"], c["chunk_ord"]))
+            p["text"] = "\n\n".join(c["text"] or "" for c in p["chunks"])
+            out.append(p)
+
+        span.set_attribute("context.chunks", len(taken))
+        span.set_attribute("context.chars", chars)
+        return {
+            "passages": out,
+            "chars": chars,
+            "tokens": tokens,
+            "truncated": truncated,
+            "missing": [h for h in hits if h not in owner],
+        }
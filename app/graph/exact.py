@@ -0,0 +1,369 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+import json
+import os
+import threading
+
+import numpy as np
+
+# Brute-force cosine kNN over float32 matrices kept on disk and memory-mapped.
+# Rows are L2-normalised when written, so a query is one matrix-vector
+# product per segment plus `argpartition`. Row order has no meaning; each
+# segment's `ids` maps its rows to chunk ids.
+#
+# Layout: immutable segments (`s<n>.ids.npy` + `s<n>.vecs.npy`) listed by
+# `manifest.json`. A write adds one segment with just its rows; a row whose
+# id reappears in a newer segment is dead. Replacing the manifest (one
+# rename) publishes a write, so ids, vectors and row counts always change
+# together. The newest segments are merged, dropping dead rows, while a
+# segment is at least half the size of the one before it; each row is then
+# rewritten O(log n) times over its life instead of on every write.
+
+_MANIFEST = "manifest.json"
+_LEGACY = ("ids.npy", "vecs.npy", "meta.json")  # single-file layout of older builds
+_BLOCK = 65536  # rows copied per step when merging segments
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Row-wise L2 normalisation as float32; zero rows stay zero."""
+    v = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(v, axis=-1, keepdims=True)
+    return np.divide(v, norms, out=np.zeros_like(v), where=norms > 0)
+
+
+def positions(all_ids: np.ndarray, ids: np.ndarray, order: np.ndarray | None = None) -> np.ndarray:
+    """Row of each of `ids` in `all_ids`.
+
+    Args:
+        all_ids (np.ndarray): Ids by row, unique.
+        ids (np.ndarray): Ids to look up.
+        order (np.ndarray | None, optional): `np.argsort(all_ids)`, if cached.
+
+    Raises:
+        KeyError: If an id is missing.
+
+    Returns:
+        np.ndarray: Row indices, aligned with `ids`.
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    if not len(all_ids):
+        if len(ids):
+            raise KeyError(f"{len(ids)} ids not in the store")
+        return np.empty(0, dtype=np.intp)
+    if order is None:
+        order = np.argsort(all_ids, kind="stable")
+    at = order[np.searchsorted(all_ids, ids, sorter=order).clip(max=len(order) - 1)]
+    missing = all_ids[at] != ids
+    if missing.any():
+        raise KeyError(f"{int(missing.sum())} ids not in the store")
+    return at
+
+
+@dataclass(slots=True)
+class Segment:
+    """One immutable segment file pair; a name is never reused for other rows."""
+
+    name: str
+    ids: np.ndarray   # memory-mapped, int64
+    vecs: np.ndarray  # memory-mapped, float32 (rows, dim)
+    live: np.ndarray | None = None  # bool per row; None when every row is live
+
+    def rows(self) -> np.ndarray:
+        """Indices of live rows."""
+        return np.arange(len(self.ids)) if self.live is None else np.flatnonzero(self.live)
+
+
+@dataclass(frozen=True, slots=True)
+class View:
+    """The store as of one `version`: its segments and, for every live id (in
+    segment order), the segment and row holding it."""
+
+    segments: list[Segment]
+    ids: np.ndarray
+    where: np.ndarray
+    row: np.ndarray
+    version: int
+
+
+class ExactStore:
+    """
+    Memory-mapped embedding segments + chunk ids with exact cosine search.
+
+    Writers add segment files and swap the manifest and the in-memory
+    segment list under a lock; readers take a reference to the current list
+    and never see a half-written write.
+    """
+
+    def __init__(self, path: str | os.PathLike[str], dim: int) -> None:
+        self.path = Path(path)
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._segments: list[Segment] = []
+        self._next = 1  # number of the next segment file
+        self._ids: np.ndarray = np.empty(0, dtype=np.int64)  # live ids, segment order
+        self._where = np.empty(0, dtype=np.int64)  # segment of each live id
+        self._row = np.empty(0, dtype=np.int64)  # its row in that segment
+        self._loaded = False
+        self._version = 0
+        self._order: np.ndarray | None = None  # argsort of ids, for `vectors`
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def version(self) -> int:
+        """Bumped on every load or write; derived structures compare it."""
+        return self._version
+
+    def view(self) -> View:
+        """The current segments and live ids, consistent with each other.
+
+        Nothing is copied: derived structures (app.graph.quantized) walk the
+        segments and can keep per-segment results by `Segment.name`.
+        """
+        with self._lock:
+            return View(self._segments, self._ids, self._where, self._row, self._version)
+
+    def _segment(self, name: str) -> tuple[np.ndarray, np.ndarray]:
+        return (
+            np.load(self.path / f"{name}.ids.npy", mmap_mode="r"),
+            np.load(self.path / f"{name}.vecs.npy", mmap_mode="r"),
+        )
+
+    def load(self) -> bool:
+        """Map the segments the manifest lists.
+
+        Returns:
+            bool: False if there is no manifest, or it does not match the
+            segment files (the store stays empty and the caller rebuilds it).
+        """
+        with self._write_lock:
+            segments: list[Segment] = []
+            try:
+                meta = json.loads((self.path / _MANIFEST).read_text())
+                if meta["dim"] != self.dim:
+                    raise ValueError(f"store dim {meta['dim']} != {self.dim}")
+                for entry in meta["segments"]:
+                    ids, vecs = self._segment(entry["name"])
+                    if ids.shape != (entry["rows"],) or vecs.shape != (entry["rows"], self.dim):
+                        raise ValueError(f"segment {entry['name']} does not match the manifest")
+                    segments.append(Segment(entry["name"], ids, vecs))
+                nxt = int(meta["next"])
+            except (OSError, EOFError, ValueError, KeyError):
+                self._publish([], write_manifest=False)
+                return False
+            # Newest segment wins: mark ids that reappear later as dead.
+            later = np.empty(0, dtype=np.int64)
+            for g in reversed(segments):
+                dead = np.isin(g.ids, later)
+                g.live = ~dead if dead.any() else None
+                later = np.concatenate([later, g.ids])
+            self._next = nxt
+            self._publish(segments, write_manifest=False)
+            return True
+
+    def _write_segment(self, parts: Iterable[tuple[np.ndarray, np.ndarray]], rows: int) -> Segment:
+        # Caller holds the write lock. The files are not visible to readers
+        # until a manifest lists them.
+        self.path.mkdir(parents=True, exist_ok=True)
+        name = f"s{self._next:06d}"
+        self._next += 1
+        for suffix in (".ids.npy", ".vecs.npy"):
+            # A new inode: a replica snapshot may hard-link an old file of this name.
+            (self.path / f"{name}{suffix}").unlink(missing_ok=True)
+        ids = np.lib.format.open_memmap(self.path / f"{name}.ids.npy", mode="w+", dtype=np.int64, shape=(rows,))
+        vecs = np.lib.format.open_memmap(
+            self.path / f"{name}.vecs.npy", mode="w+", dtype=np.float32, shape=(rows, self.dim),
+        )
+        at = 0
+        for part_ids, part_vecs in parts:
+            n = len(part_ids)
+            ids[at:at + n] = part_ids
+            vecs[at:at + n] = part_vecs
+            at += n
+        assert at == rows, "segment parts do not add up to its row count"
+        ids.flush()
+        vecs.flush()
+        del ids, vecs
+        return Segment(name, *self._segment(name))
+
+    def _live_blocks(self, segments: list[Segment]) -> Iterable[tuple[np.ndarray, np.ndarray]]:
+        for g in segments:
+            rows = g.rows()
+            for i in range(0, len(rows), _BLOCK):
+                at = rows[i:i + _BLOCK]
+                yield np.asarray(g.ids[at]), np.asarray(g.vecs[at])
+
+    def _merge(self, segments: list[Segment]) -> list[Segment]:
+        # Merge the newest segment into the one before it while that one is
+        # at most twice its size (a binary-counter merge policy).
+        while len(segments) > 1 and len(segments[-2].ids) <= 2 * len(segments[-1].ids):
+            pair = segments[-2:]
+            rows = sum(len(g.rows()) for g in pair)
+            merged = [self._write_segment(self._live_blocks(pair), rows)] if rows else []
+            segments = segments[:-2] + merged
+        return segments
+
+    def _publish(self, segments: list[Segment], write_manifest: bool = True) -> None:
+        # Caller holds the write lock.
+        if write_manifest:
+            self.path.mkdir(parents=True, exist_ok=True)
+            meta = {
+                "dim": self.dim,
+                "next": self._next,
+                "segments": [{"name": g.name, "rows": len(g.ids)} for g in segments],
+            }
+            tmp = self.path / (_MANIFEST + ".tmp")
+            with open(tmp, "w") as f:
+                json.dump(meta, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path / _MANIFEST)
+        rows = [g.rows() for g in segments]
+        empty = np.empty(0, dtype=np.int64)
+        ids = np.concatenate([np.asarray(g.ids[r]) for g, r in zip(segments, rows)]) if rows else empty
+        where = np.concatenate([np.full(len(r), i, dtype=np.int64) for i, r in enumerate(rows)]) if rows else empty
+        with self._lock:
+            self._segments = segments
+            self._ids = ids
+            self._where = where
+            self._row = np.concatenate(rows) if rows else empty
+            self._loaded = True
+            self._version += 1
+            self._order = None
+        if write_manifest:
+            self._collect(segments)
+
+    def _collect(self, segments: list[Segment]) -> None:
+        # Remove segment files no manifest lists any more (merged away, or
+        # left by a crash) and the files of the single-file layout. Open
+        # mappings and replica hard links keep their data (POSIX).
+        keep = {g.name for g in segments}
+        for f in self.path.glob("s*.npy"):
+            if f.name.split(".")[0] not in keep:
+                f.unlink(missing_ok=True)
+        for name in _LEGACY:
+            (self.path / name).unlink(missing_ok=True)
+
+    def upsert(self, ids: np.ndarray, vectors: Iterable[np.ndarray]) -> None:
+        """Add or replace rows for `ids` (in order, split across `vectors` parts).
+
+        Only the new rows are written, as a new segment; the rows they
+        replace are marked dead (a scan of the ids, not the vectors). Merges
+        rewrite the newest segments now and then (see the module comment).
+
+        Args:
+            ids (np.ndarray): Chunk ids, unique.
+            vectors (Iterable[np.ndarray]): Row blocks whose lengths add up to
+                `len(ids)`; normalised here.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return
+        with self._write_lock:
+            blocks: list[tuple[np.ndarray, np.ndarray]] = []
+            at = 0
+            for block in vectors:
+                n = len(block)
+                blocks.append((ids[at:at + n], normalize(block)))
+                at += n
+            new = self._write_segment(blocks, at)
+            segments = []
+            for g in self._segments:
+                dead = np.isin(g.ids, ids)
+                if dead.any():
+                    live = ~dead if g.live is None else g.live & ~dead
+                    g = Segment(g.name, g.ids, g.vecs, live)
+                if g.live is None or g.live.any():
+                    segments.append(g)
+            self._publish(self._merge([*segments, new]))
+
+    def replace(self, parts: Iterable[tuple[np.ndarray, np.ndarray]]) -> None:
+        """Replace the whole store with `(ids, vectors)` parts (one segment)."""
+        parts = [(np.asarray(i, dtype=np.int64), normalize(v)) for i, v in parts]
+        rows = sum(len(i) for i, _ in parts)
+        with self._write_lock:
+            self._publish([self._write_segment(parts, rows)] if rows else [])
+
+    def reset(self) -> None:
+        """Empty the store (e.g. after every chunk was deleted)."""
+        self.replace([])
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        allowed: np.ndarray | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Exact top-k by cosine distance (`1 - cos`), nearest first.
+
+        Args:
+            query (np.ndarray): Query vector, length `dim`.
+            k (int): Results wanted.
+            allowed (np.ndarray | None, optional): Restrict to these chunk ids.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Chunk ids and distances.
+        """
+        with self._lock:
+            segments = self._segments
+        q = normalize(np.asarray(query, dtype=np.float32))
+        found_ids, found_dist = [], []
+        for g in segments:
+            rows = g.live
+            if allowed is not None:
+                match = np.isin(g.ids, allowed)
+                rows = match if rows is None else rows & match
+            if rows is None:
+                ids, dist = np.asarray(g.ids), 1.0 - g.vecs @ q
+            else:
+                rows = np.flatnonzero(rows)
+                ids, dist = np.asarray(g.ids[rows]), 1.0 - g.vecs[rows] @ q
+            if 0 < k < len(dist):
+                top = np.argpartition(dist, k - 1)[:k]
+                ids, dist = ids[top], dist[top]
+            found_ids.append(ids)
+            found_dist.append(dist)
+        if k <= 0 or not found_ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        ids, dist = np.concatenate(found_ids), np.concatenate(found_dist).astype(np.float32)
+        top = np.lexsort((ids, dist))[:k]
+        return ids[top], dist[top]
+
+    def vectors(self, ids: np.ndarray) -> np.ndarray:
+        """Normalised rows for `ids`, in the given order (only those rows are read).
+
+        Raises:
+            KeyError: If an id is not in the store.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        with self._lock:
+            if self._order is None:
+                self._order = np.argsort(self._ids, kind="stable")
+            all_ids, order = self._ids, self._order
+            segments, where, row = self._segments, self._where, self._row
+        at = positions(all_ids, ids, order)
+        out = np.empty((len(ids), self.dim), dtype=np.float32)
+        for i in np.unique(where[at]):
+            sel = where[at] == i
+            out[sel] = segments[i].vecs[row[at[sel]]]
+        return out
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            segments, rows, loaded = self._segments, len(self._ids), self._loaded
+        return {
+            "path": str(self.path),
+            "loaded": loaded,
+            "rows": rows,
+            "segments": len(segments),
+            "dead_rows": sum(len(g.ids) for g in segments) - rows,
+            "bytes": int(sum(g.vecs.nbytes + g.ids.nbytes for g in segments)),
+        }
@@ -0,0 +1,159 @@
+from __future__ import annotations
+import re
+from collections import Counter
+from typing import Any, Iterable, Sequence
+
+from kuzu import Connection
+from app.core.kuzu import execute, query, run, statement
+
+# Inverted index kept next to the graph and written in the ingest transaction:
+#   (:Chunk)-[:HasTerm {tf, dl}]->(:Term {term, df}),  (:TextStats {chunks, tokens})
+# Kùzu's FTS extension is not used: in 0.11 its index is not updated
+# correctly by multi-row (UNWIND) inserts, which is how ingest writes chunks.
+
+K1 = 1.2
+B = 0.75
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Very common English words carry almost no BM25 weight but make up a large
+# share of postings, so they are neither indexed nor queried.
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have he her his i if in into is it its
+no not of on or our she so such than that the their them then there these they
+this to was we were what when which who will with you your
+""".split())
+
+_UPSERT_TERMS = statement("fulltext_upsert_terms", """
+UNWIND $rows AS r
+MERGE (t:Term {term: r.term})
+    ON CREATE SET t.df = r.df
+    ON MATCH SET t.df = t.df + r.df
+""")
+
+_CREATE_POSTINGS = statement("fulltext_create_postings", """
+UNWIND $rows AS r
+MATCH (c:Chunk {id: r.cid}), (t:Term {term: r.term})
+CREATE (c)-[:HasTerm {tf: r.tf, dl: r.dl}]->(t)
+""")
+
+_UPDATE_STATS = statement("fulltext_update_stats", """
+MERGE (x:TextStats {id: 0})
+    ON CREATE SET x.chunks = $chunks, x.tokens = $tokens
+    ON MATCH SET x.chunks = x.chunks + $chunks, x.tokens = x.tokens + $tokens
+""")
+
+_ALL_CHUNKS = statement("fulltext_all_chunks", """
+MATCH (c:Chunk) WHERE c.id > $after
+RETURN c.id, c.text
+ORDER BY c.id
+LIMIT $lim
+""")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-cased word tokens minus stop words; used for chunks and queries alike."""
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def index_chunks(conn: Connection, chunks: Iterable[tuple[int, str]]) -> int:
+    """Add chunks to the inverted index on `conn` (inside the caller's transaction).
+
+    Args:
+        conn (Connection): Connection, normally with an open transaction.
+        chunks (Iterable[tuple[int, str]]): `(chunk_id, text)` pairs not indexed yet.
+
+    Returns:
+        int: Number of postings written.
+    """
+    postings: list[dict[str, Any]] = []
+    df: Counter[str] = Counter()
+    n_chunks = n_tokens = 0
+    for cid, text in chunks:
+        tokens = tokenize(text)
+        n_chunks += 1
+        n_tokens += len(tokens)
+        tf = Counter(tokens)
+        df.update(tf.keys())
+        postings.extend(
+            {"cid": cid, "term": term, "tf": n, "dl": len(tokens)}
+            for term, n in tf.items()
+        )
+
+    if n_chunks == 0:
+        return 0
+    if df:
+        run(conn, _UPSERT_TERMS, {"rows": [{"term": t, "df": n} for t, n in df.items()]})
+        run(conn, _CREATE_POSTINGS, {"rows": postings})
+    run(conn, _UPDATE_STATS, {"chunks": n_chunks, "tokens": n_tokens})
+    return len(postings)
+
+
+def query_terms(q: str) -> list[str]:
+    """Distinct query tokens, in first-seen order."""
+    return list(dict.fromkeys(tokenize(q)))
+
+
+def _bm25_query(match_doc: str) -> str:
+    return f"""
+MATCH (x:TextStats {{id: 0}})
+UNWIND $terms AS q
+MATCH (t:Term {{term: q}})<-[h:HasTerm]-(c:Chunk)
+WITH c, x,
+     ln((x.chunks - t.df + 0.5) / (t.df + 0.5) + 1.0) AS idf,
+     h.tf * 1.0 AS tf,
+     h.dl / (x.tokens * 1.0 / x.chunks) AS rel_len
+WITH c, SUM(idf * tf * ($k1 + 1.0) / (tf + $k1 * (1.0 - $b + $b * rel_len))) AS score
+MATCH {match_doc}-[:ContainsDocSection]->(s:Section)-[:ContainsSectionChunk]->(c)
+RETURN
+    d.id    AS document_id,
+    d.title AS document,
+    s.id    AS section_id,
+    s.title AS section,
+    c.id    AS chunk_id,
+    c.ord   AS chunk_ord,
+    c.text  AS text,
+    score   AS score
+ORDER BY score DESC, c.id
+LIMIT $lim
+"""
+
+
+BM25_SEARCH = statement("bm25_search", _bm25_query("(d:Document)"))
+BM25_SEARCH_BY_DOC = statement("bm25_search_by_doc", _bm25_query("(d:Document {title: $t})"))
+
+
+def bm25_params(terms: Sequence[str], limit: int) -> dict[str, Any]:
+    """Parameters shared by both BM25 statements."""
+    return {"terms": list(terms), "lim": int(limit), "k1": K1, "b": B}
+
+
+def rebuild(conn: Connection, batch: int = 5000) -> int:
+    """Drop and rebuild the whole inverted index from `Chunk.text`.
+
+    For databases with chunks written before the index existed.
+
+    Args:
+        conn (Connection): Connection to use (one transaction for the rebuild).
+        batch (int, optional): Chunks read per query. Defaults to 5000.
+
+    Returns:
+        int: Number of chunks indexed.
+    """
+    execute(conn, "BEGIN TRANSACTION;")
+    try:
+        execute(conn, "MATCH (t:Term) DETACH DELETE t;", name="drop_terms")
+        execute(conn, "MATCH (x:TextStats) DELETE x;", name="drop_text_stats")
+        after, total = -1, 0
+        while True:
+            rows = query(conn, _ALL_CHUNKS, {"after": after, "lim": batch}).rows
+            if not rows:
+                break
+            index_chunks(conn, ((int(r[0]), r[1] or "") for r in rows))
+            total += len(rows)
+            after = int(rows[-1][0])
+    except Exception:
+        execute(conn, "ROLLBACK;")
+        raise
+    execute(conn, "COMMIT;")
+    return total
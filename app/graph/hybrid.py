@@ -0,0 +1,152 @@
+from __future__ import annotations
+import time
+from typing import Any, Callable, Literal, Sequence
+
+import numpy as np
+
+from app.core.executor import submit
+from app.core.results import Rows
+from app.core.tracing import get_tracer
+from app.graph.search import bm25_search_rows, search_chunk_rows
+from app.graph.semantic import semantic_search_rows
+
+tracer = get_tracer(__name__)
+
+RRF_K = 60  # usual reciprocal-rank-fusion constant
+
+# Columns of a fused row, in order. Per-source fields are None when the chunk
+# was found by the other source only.
+COLUMNS = [
+    "document_id",
+    "document",
+    "section_id",
+    "section",
+    "chunk_id",
+    "chunk_ord",
+    "text",
+    "score",
+    "lexical_rank",
+    "lexical_score",
+    "vector_rank",
+    "vector_distance",
+]
+
+_CONTEXT = ["document_id", "document", "section_id", "section", "chunk_id", "chunk_ord", "text"]
+
+
+def _timed(fn: Callable[[], Rows]) -> tuple[Rows, float]:
+    t0 = time.perf_counter()
+    rows = fn()
+    return rows, (time.perf_counter() - t0) * 1000.0
+
+
+def fuse(
+    lexical: Rows,
+    vector: Rows,
+    k: int,
+    rrf_k: int = RRF_K,
+    lexical_weight: float = 1.0,
+    vector_weight: float = 1.0,
+) -> Rows:
+    """Weighted reciprocal-rank fusion of a lexical and a vector result list.
+
+    A chunk at 1-based rank r in a list contributes `weight / (rrf_k + r)`;
+    contributions are summed per chunk. Ties go to the lower chunk id.
+
+    Args:
+        lexical (Rows): Lexical rows, best first (`score` column optional).
+        vector (Rows): Vector rows, best first, with a `distance` column.
+        k (int): Number of fused rows to keep.
+        rrf_k (int, optional): Rank damping constant. Defaults to RRF_K.
+        lexical_weight (float, optional): Weight of the lexical list. Defaults to 1.0.
+        vector_weight (float, optional): Weight of the vector list. Defaults to 1.0.
+
+    Returns:
+        Rows: Fused rows with `COLUMNS`.
+    """
+    fused: dict[int, dict[str, Any]] = {}
+
+    def add(rows: Rows, weight: float, rank_col: str, score_col: str, src_col: str) -> None:
+        for rank, rec in enumerate(rows.records(), start=1):
+            cur = fused.get(rec["chunk_id"])
+            if cur is None:
+                cur = {c: rec[c] for c in _CONTEXT}
+                cur.update(score=0.0, lexical_rank=None, lexical_score=None,
+                           vector_rank=None, vector_distance=None)
+                fused[rec["chunk_id"]] = cur
+            cur["score"] += weight / (rrf_k + rank)
+            cur[rank_col] = rank
+            cur[score_col] = rec.get(src_col)
+
+    add(lexical, lexical_weight, "lexical_rank", "lexical_score", "score")
+    add(vector, vector_weight, "vector_rank", "vector_distance", "distance")
+
+    best = sorted(fused.values(), key=lambda r: (-r["score"], r["chunk_id"]))[:k]
+    return Rows(columns=list(COLUMNS), rows=[[r[c] for c in COLUMNS] for r in best])
+
+
+def hybrid_search_rows(
+    q: str,
+    vector: Sequence[float] | np.ndarray,
+    k: int = 10,
+    doc_title: str | None = None,
+    mode: Literal["bm25", "substring"] = "bm25",
+    efs: int = 200,
+    candidates: int | None = None,
+    rrf_k: int = RRF_K,
+    lexical_weight: float = 1.0,
+    vector_weight: float = 1.0,
+) -> tuple[Rows, dict[str, float]]:
+    """Run lexical and vector search concurrently and fuse them.
+
+    Args:
+        q (str): Lexical query.
+        vector (Sequence[float] | np.ndarray): Query embedding (length DIM).
+        k (int, optional): Rows to return. Defaults to 10.
+        doc_title (str | None, optional): Restrict both sources to one document.
+        mode (str, optional): Lexical path, "bm25" (scored) or "substring"
+            (regex, rank only). Defaults to "bm25".
+        efs (int, optional): HNSW beam width. Defaults to 200.
+        candidates (int | None, optional): Rows fetched from each source.
+            Defaults to 4 * k.
+        rrf_k (int, optional): Rank damping constant. Defaults to RRF_K.
+        lexical_weight (float, optional): Defaults to 1.0.
+        vector_weight (float, optional): Defaults to 1.0.
+
+    Returns:
+        tuple[Rows, dict[str, float]]: Fused rows and stage timings in ms
+        (`lexical_ms`, `vector_ms`, `fusion_ms`, `total_ms`).
+    """
+    if k <= 0:
+        k = 10
+    depth = max(int(candidates or 4 * k), k)
+
+    if mode == "substring":
+        def lex() -> Rows:
+            return search_chunk_rows(q=q, doc_title=doc_title, limit=depth)
+    else:
+        def lex() -> Rows:
+            return bm25_search_rows(q=q, doc_title=doc_title, limit=depth)
+
+    def vec() -> Rows:
+        return semantic_search_rows(vector=vector, k=depth, efs=efs, doc_title=doc_title)
+
+    with tracer.start_as_current_span("kuzu.hybrid_search") as span:
+        t0 = time.perf_counter()
+        # Each worker takes its own pooled connection.
+        lex_f, vec_f = submit(_timed, lex), submit(_timed, vec)
+        lex_rows, lex_ms = lex_f.result()
+        vec_rows, vec_ms = vec_f.result()
+        t1 = time.perf_counter()
+        rows = fuse(lex_rows, vec_rows, k, rrf_k, lexical_weight, vector_weight)
+        t2 = time.perf_counter()
+        span.set_attribute("hybrid.lexical_rows", len(lex_rows))
+        span.set_attribute("hybrid.vector_rows", len(vec_rows))
+
+    timings = {
+        "lexical_ms": round(lex_ms, 3),
+        "vector_ms": round(vec_ms, 3),
+        "fusion_ms": round((t2 - t1) * 1000.0, 3),
+        "total_ms": round((t2 - t0) * 1000.0, 3),
+    }
+    return rows, timings
@@ -0,0 +1,175 @@
+from __future__ import annotations
+from typing import Any, Sequence
+
+from kuzu import Connection
+from app.api.schemas import IngestDocument
+from app.core.cache import bump_generation
+from app.core.kuzu import connection, execute, query, run, statement
+from app.core.tracing import get_tracer
+from app.graph.context import link_chunks
+from app.graph.fulltext import index_chunks
+from app.graph.repo import DocumentExists, existing_titles
+
+tracer = get_tracer(__name__)
+
+# Each statement writes a whole level of the tree from one list parameter.
+# `i` is the caller's position so ids come back in input order.
+_CREATE_DOCUMENTS = statement("ingest_documents", """
+UNWIND $rows AS r
+CREATE (d:Document {title: r.title})
+RETURN r.i AS i, d.id AS id
+ORDER BY i
+""")
+
+_CREATE_TITLES = statement("ingest_document_titles", """
+UNWIND $rows AS r
+CREATE (t:DocumentTitle {title: r.title, doc: r.doc})
+""")
+
+_CREATE_SECTIONS = statement("ingest_sections", """
+UNWIND $rows AS r
+MATCH (d:Document {id: r.doc})
+CREATE (s:Section {title: r.title, ord: r.ord}),
+       (d)-[:ContainsDocSection]->(s)
+RETURN r.i AS i, s.id AS id
+ORDER BY i
+""")
+
+_CREATE_CHUNKS = statement("ingest_chunks", """
+UNWIND $rows AS r
+MATCH (s:Section {id: r.sec})
+CREATE (c:Chunk {text: r.text, ord: r.ord}),
+       (s)-[:ContainsSectionChunk]->(c)
+RETURN r.i AS i, c.id AS id
+ORDER BY i
+""")
+
+
+def _unwind_ids(conn: Connection, name: str, rows: list[dict[str, Any]]) -> list[int]:
+    """Run an UNWIND statement and return the created ids in input order.
+
+    Args:
+        conn (Connection): Connection with an open transaction.
+        name (str): One of the `_CREATE_*` statement names.
+        rows (list[dict[str, Any]]): List parameter; each row carries its index as `i`.
+
+    Returns:
+        list[int]: Created ids, one per input row.
+    """
+    if not rows:
+        # An empty list parameter has no element type Kùzu can bind against.
+        return []
+    ids = [int(r[1]) for r in query(conn, name, {"rows": rows}).rows]
+    assert len(ids) == len(rows), "Bulk insert returned fewer ids than rows"
+    return ids
+
+
+def _check_titles(docs: Sequence[IngestDocument]) -> None:
+    """Raise DocumentExists for the first title that is taken or repeats."""
+    taken = existing_titles([d.title for d in docs])
+    seen: set[str] = set()
+    for d in docs:
+        if d.title in taken or d.title in seen:
+            raise DocumentExists(d.title)
+        seen.add(d.title)
+
+
+def _write(conn: Connection, docs: Sequence[IngestDocument]) -> list[dict[str, Any]]:
+    # Inside the write transaction, so no other writer can take a title
+    # between this check and the insert; DocumentTitle's key backs it up.
+    _check_titles(docs)
+    doc_ids = _unwind_ids(
+        conn, _CREATE_DOCUMENTS,
+        [{"i": i, "title": d.title} for i, d in enumerate(docs)],
+    )
+    run(conn, _CREATE_TITLES, {"rows": [{"title": d.title, "doc": i} for i, d in zip(doc_ids, docs)]})
+
+    sec_rows: list[dict[str, Any]] = []
+    for doc_id, d in zip(doc_ids, docs):
+        for j, sec in enumerate(d.sections):
+            sec_rows.append({"i": len(sec_rows), "doc": doc_id, "title": sec.title, "ord": j})
+    sec_ids = _unwind_ids(conn, _CREATE_SECTIONS, sec_rows)
+
+    chunk_rows: list[dict[str, Any]] = []
+    texts: list[str] = []
+    it = iter(sec_ids)
+    for d in docs:
+        for sec in d.sections:
+            sid = next(it)
+            for k, text in enumerate(sec.chunks):
+                chunk_rows.append({"i": len(chunk_rows), "sec": sid, "text": text, "ord": k})
+                texts.append(text)
+    chunk_ids = _unwind_ids(conn, _CREATE_CHUNKS, chunk_rows)
+    index_chunks(conn, zip(chunk_ids, texts))
+
+    # Slice the flat id lists back into per-document results.
+    out: list[dict[str, Any]] = []
+    chains: list[list[int]] = []
+    s_pos = c_pos = 0
+    for doc_id, d in zip(doc_ids, docs):
+        n_sec = len(d.sections)
+        n_chunk = sum(len(sec.chunks) for sec in d.sections)
+        out.append({
+            "document_id": doc_id,
+            "section_ids": sec_ids[s_pos:s_pos + n_sec],
+            "chunk_ids": chunk_ids[c_pos:c_pos + n_chunk],
+            "sections_created": n_sec,
+            "chunks_created": n_chunk,
+        })
+        chains.append(out[-1]["chunk_ids"])
+        s_pos += n_sec
+        c_pos += n_chunk
+    # Chunk ids are in reading order, so each document's slice is its chain.
+    link_chunks(conn, chains)
+    return out
+
+
+def ingest_documents(docs: Sequence[IngestDocument]) -> list[dict[str, Any]]:
+    """Write several documents with their sections and chunks in one transaction.
+
+    Three UNWIND statements (documents, sections, chunks) replace the
+    per-row `create_*` calls, the chunks are added to the full-text index
+    and chained by NextChunk edges, and the whole batch commits once. On any
+    error the transaction is rolled back and nothing is written.
+
+    Titles are checked in the same transaction (create-if-absent): a title
+    that exists or repeats within `docs` fails the whole call.
+
+    Args:
+        docs (Sequence[IngestDocument]): Documents to create.
+
+    Raises:
+        DocumentExists: For the first taken or repeated title; nothing is written.
+
+    Returns:
+        list[dict[str, Any]]: One result per input document, in input order,
+        shaped like the `/ingest` response.
+    """
+    if not docs:
+        return []
+
+    with tracer.start_as_current_span("kuzu.ingest_documents") as span:
+        span.set_attribute("ingest.documents", len(docs))
+        with connection() as conn:
+            execute(conn, "BEGIN TRANSACTION;")
+            try:
+                out = _write(conn, docs)
+            except Exception:
+                execute(conn, "ROLLBACK;")
+                raise
+            execute(conn, "COMMIT;")
+        bump_generation()
+        span.set_attribute("ingest.chunks", sum(r["chunks_created"] for r in out))
+        return out
+
+
+def ingest_document(doc: IngestDocument) -> dict[str, Any]:
+    """Write a single document in one transaction. See `ingest_documents`.
+
+    Args:
+        doc (IngestDocument): The document to create.
+
+    Returns:
+        dict[str, Any]: Created ids and counts.
+    """
+    return ingest_documents([doc])[0]
@@ -0,0 +1,285 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Literal, Sequence
+import logging
+import queue
+import threading
+import time
+import uuid
+
+from app.api.schemas import IngestDocument
+from app.core.config import settings
+from app.core.db import Saturated
+from app.core.kuzu import write_lock
+from app.core.tracing import get_tracer
+from app.graph.ingest import ingest_documents
+from app.graph.repo import DocumentExists, existing_titles
+
+log = logging.getLogger(__name__)
+tracer = get_tracer(__name__)
+
+# Queued ingest: `submit` returns a job at once; one background thread drains
+# the queue, packing the jobs that arrive within INGEST_BATCH_WAIT seconds
+# (up to INGEST_BATCH_DOCS documents / INGEST_BATCH_CHUNKS chunks) into a
+# single `ingest_documents` transaction. Title conflicts are decided per job,
+# in submission order, against the database and the jobs ahead of it in the
+# batch: a conflicting job fails alone with the `/ingest` 409 message.
+
+Status = Literal["queued", "running", "done", "conflict", "failed"]
+
+
+class QueueFull(Saturated):
+    """INGEST_QUEUE_SIZE jobs are already waiting."""
+
+
+@dataclass
+class Job:
+    id: str
+    docs: list[IngestDocument]
+    bulk: bool
+    status: Status = "queued"
+    result: Any = None
+    error: str | None = None
+    batch: int | None = None  # jobs written in the same transaction
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    @property
+    def chunks(self) -> int:
+        return sum(len(s.chunks) for d in self.docs for s in d.sections)
+
+    def view(self) -> dict[str, Any]:
+        """JSON-ready status for `/ingest/jobs/{id}`."""
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "documents": len(self.docs),
+            "chunks": self.chunks,
+            "result": self.result,
+            "error": self.error,
+            "batch_jobs": self.batch,
+            "submitted_at": self.submitted_at,
+            "queued_ms": _ms(self.submitted_at, self.started_at),
+            "write_ms": _ms(self.started_at, self.finished_at),
+        }
+
+    def finish(self, status: Status, result: Any = None, error: str | None = None) -> None:
+        self.status, self.result, self.error = status, result, error
+        self.finished_at = time.time()
+
+
+def _ms(start: float | None, end: float | None) -> float | None:
+    return None if start is None or end is None else round((end - start) * 1000.0, 3)
+
+
+def _in_place(fn: Callable[..., Any], *args: Any) -> Any:
+    with write_lock:
+        return fn(*args)
+
+
+class IngestQueue:
+    """
+    Bounded job queue with a single coalescing writer thread.
+
+    `run(fn, *args)` executes each database write; the default calls it in
+    place under `write_lock`. The replica writer (app.replica) passes one
+    that holds its write lock and publishes a snapshot afterwards.
+    """
+
+    def __init__(
+        self,
+        max_docs: int | None = None,
+        max_chunks: int | None = None,
+        max_wait: float | None = None,
+        max_pending: int | None = None,
+        keep: int | None = None,
+        run: Callable[..., Any] = _in_place,
+    ) -> None:
+        self.max_docs = max_docs or settings.ingest_batch_docs
+        self.max_chunks = max_chunks or settings.ingest_batch_chunks
+        self.max_wait = settings.ingest_batch_wait if max_wait is None else max_wait
+        self.keep = keep or settings.ingest_jobs_keep
+        self._run = run
+        self._pending: queue.Queue[Job | None] = queue.Queue(max_pending or settings.ingest_queue_size)
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._counters = {"submitted": 0, "batches": 0, "documents": 0, "conflicts": 0, "failed": 0}
+
+    def start(self) -> "IngestQueue":
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="ingest-queue", daemon=True)
+                self._thread.start()
+        return self
+
+    def submit(self, docs: Sequence[IngestDocument], bulk: bool = False) -> dict[str, Any]:
+        """Queue documents for writing.
+
+        Args:
+            docs (Sequence[IngestDocument]): One document, or a bulk list.
+            bulk (bool, optional): Report the result like `/ingest/bulk`
+                (`count`/`items`/`chunks_created`) instead of `/ingest`.
+
+        Raises:
+            QueueFull: If INGEST_QUEUE_SIZE jobs are waiting.
+
+        Returns:
+            dict[str, Any]: The job's status (see `Job.view`).
+        """
+        job = Job(id=uuid.uuid4().hex, docs=list(docs), bulk=bulk)
+        with self._lock:
+            try:
+                self._pending.put_nowait(job)
+            except queue.Full:
+                raise QueueFull(f"ingest queue is full ({self._pending.maxsize} jobs waiting)") from None
+            self._jobs[job.id] = job
+            self._counters["submitted"] += 1
+            while len(self._jobs) > self.keep:
+                oldest = next(iter(self._jobs.values()))
+                if oldest.finished_at is None:
+                    break
+                self._jobs.popitem(last=False)
+        self.start()
+        return job.view()
+
+    def job(self, job_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.view() if job is not None else None
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": self._pending.qsize(),
+                "jobs": len(self._jobs),
+                "max_docs": self.max_docs,
+                "max_chunks": self.max_chunks,
+                "max_wait": self.max_wait,
+                **self._counters,
+            }
+
+    def stop(self, timeout: float | None = 30.0) -> None:
+        """Write what is queued, then stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._pending.put(None)
+            thread.join(timeout)
+
+    def _loop(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._pending.get()
+            if first is None:
+                return
+            batch = [first]
+            docs, chunks = len(first.docs), first.chunks
+            deadline = time.monotonic() + self.max_wait
+            while docs < self.max_docs and chunks < self.max_chunks:
+                try:
+                    job = self._pending.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                batch.append(job)
+                docs, chunks = docs + len(job.docs), chunks + job.chunks
+            try:
+                self._flush(batch)
+            except Exception:  # keep draining whatever happens to one batch
+                log.exception("ingest queue: batch failed")
+
+    def _flush(self, batch: list[Job]) -> None:
+        with tracer.start_as_current_span("ingest.queue.flush") as span:
+            span.set_attribute("ingest.jobs", len(batch))
+            started = time.time()
+            for job in batch:
+                job.status, job.started_at = "running", started
+            try:
+                outcomes = self._run(self._write, batch)
+            except Exception as e:
+                if len(batch) == 1:
+                    outcomes = [(batch[0], "failed", None, f"{type(e).__name__}: {e}")]
+                else:
+                    # One bad job must not sink the others: retry them one by one
+                    outcomes = []
+                    for job in batch:
+                        try:
+                            outcomes += self._run(self._write, [job])
+                        except Exception as e:
+                            outcomes.append((job, "failed", None, f"{type(e).__name__}: {e}"))
+            # Only now (after `run` returned, i.e. after a replica snapshot is
+            # published) may a poller see the job finished.
+            with self._lock:
+                self._counters["batches"] += 1
+                for job, status, result, error in outcomes:
+                    job.finish(status, result, error)
+                    if status == "done":
+                        self._counters["documents"] += len(job.docs)
+                    elif status == "conflict":
+                        self._counters["conflicts"] += 1
+                    else:
+                        log.warning("ingest job %s failed: %s", job.id, error)
+                        self._counters["failed"] += 1
+            span.set_attribute("ingest.documents", sum(len(j.docs) for j, st, _, _ in outcomes if st == "done"))
+
+    def _write(self, batch: list[Job]) -> list[tuple[Job, Status, Any, str | None]]:
+        """Decide title conflicts, then write the accepted jobs in one transaction.
+
+        Returns:
+            list[tuple[Job, Status, Any, str | None]]: (job, status, result, error) per job.
+        """
+        taken = existing_titles([d.title for job in batch for d in job.docs])
+        outcomes: list[tuple[Job, Status, Any, str | None]] = []
+        accepted: list[Job] = []
+        for job in batch:
+            seen: set[str] = set()
+            clash = None
+            for doc in job.docs:
+                if doc.title in taken or doc.title in seen:
+                    clash = doc.title
+                    break
+                seen.add(doc.title)
+            if clash is not None:
+                outcomes.append((job, "conflict", None, str(DocumentExists(clash))))
+                continue
+            taken |= seen
+            accepted.append(job)
+
+        items = ingest_documents([d for job in accepted for d in job.docs])
+        at = 0
+        for job in accepted:
+            mine, at = items[at:at + len(job.docs)], at + len(job.docs)
+            job.batch = len(accepted)
+            if job.bulk:
+                result = {"count": len(mine), "items": mine, "chunks_created": sum(r["chunks_created"] for r in mine)}
+            else:
+                result = mine[0]
+            outcomes.append((job, "done", result, None))
+        return outcomes
+
+
+_queue: IngestQueue | None = None
+_queue_lock = threading.Lock()
+
+
+def get_ingest_queue() -> IngestQueue:
+    """Process-wide queue (created on first use)."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = IngestQueue()
+    return _queue
+
+
+def set_ingest_queue(q: IngestQueue | None) -> None:
+    """Replace the process-wide queue, stopping (and draining) the old one."""
+    global _queue
+    with _queue_lock:
+        old, _queue = _queue, q
+    if old is not None:
+        old.stop()
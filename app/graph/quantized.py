@@ -0,0 +1,326 @@
+from __future__ import annotations
+from typing import Any, Literal, Sequence
+import threading
+
+import numpy as np
+
+from app.graph.exact import ExactStore, View, normalize, positions
+
+# Compressed in-memory copy of the (normalised) embeddings for approximate
+# scoring. Only the codes live on the Python heap; exact rescoring reads the
+# few rows it needs from the memory-mapped float32 store. Training and
+# encoding read the float32 segments in blocks, never the whole matrix.
+
+Kind = Literal["int8", "pq"]
+
+_BLOCK = 1024  # rows per step when training, encoding and scoring; keeps temporaries in cache
+
+
+def _peak(x: np.ndarray) -> np.ndarray:
+    """Per-dimension max of `|x|`, a block of rows at a time."""
+    peak = np.zeros(x.shape[1], dtype=np.float32)
+    for i in range(0, len(x), _BLOCK):
+        np.maximum(peak, np.abs(np.asarray(x[i:i + _BLOCK], dtype=np.float32)).max(axis=0), out=peak)
+    return peak
+
+
+def _gather(parts: Sequence[np.ndarray], rows: np.ndarray) -> np.ndarray:
+    """Rows `rows` (sorted, numbered across `parts` in order) as one float32 array."""
+    out, start = [], 0
+    for x in parts:
+        lo, hi = np.searchsorted(rows, [start, start + len(x)])
+        if hi > lo:
+            out.append(np.asarray(x[rows[lo:hi] - start], dtype=np.float32))
+        start += len(x)
+    return np.concatenate(out)
+
+
+class Int8Codec:
+    """
+    Symmetric per-dimension scalar quantization: `x[:, d] ≈ code * scale[d]`.
+
+    One byte per dimension. Similarities are `codes @ (q * scale)`, computed
+    in float32 blocks.
+    """
+
+    kind: Kind = "int8"
+
+    def __init__(self, dim: int) -> None:
+        self.dim = dim
+        self.peak = np.zeros(dim, dtype=np.float32)  # trained range per dimension
+        self.scale = np.full(dim, 1.0 / 127.0, dtype=np.float32)
+
+    def fit(self, parts: Sequence[np.ndarray]) -> "Int8Codec":
+        peak = np.zeros(self.dim, dtype=np.float32)
+        for x in parts:
+            np.maximum(peak, _peak(x), out=peak)
+        self.peak = peak
+        self.scale = (np.where(peak > 0, peak, 1.0) / 127.0).astype(np.float32)
+        return self
+
+    def covers(self, x: np.ndarray) -> bool:
+        """Whether `x` lies within the trained range (encoding it would not clip)."""
+        return bool((_peak(x) <= self.peak).all())
+
+    def encode(self, x: np.ndarray) -> np.ndarray:
+        codes = np.empty((len(x), self.dim), dtype=np.int8)
+        for i in range(0, len(x), _BLOCK):
+            block = np.asarray(x[i:i + _BLOCK], dtype=np.float32)
+            codes[i:i + _BLOCK] = np.clip(np.rint(block / self.scale), -127, 127)
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return codes.astype(np.float32) * self.scale
+
+    def scores(self, codes: np.ndarray, q: np.ndarray) -> np.ndarray:
+        w = q * self.scale
+        out = np.empty(len(codes), dtype=np.float32)
+        for i in range(0, len(codes), _BLOCK):
+            out[i:i + _BLOCK] = codes[i:i + _BLOCK].astype(np.float32) @ w
+        return out
+
+    def bytes_per_vector(self) -> int:
+        return self.dim
+
+    def overhead_bytes(self) -> int:
+        return int(self.scale.nbytes)
+
+
+class PQCodec:
+    """
+    Product quantization: `m` sub-vectors, each replaced by the nearest of
+    up to 256 centroids learned with k-means. One byte per sub-vector;
+    similarities are sums over a per-query `(m, 256)` lookup table.
+    """
+
+    kind: Kind = "pq"
+
+    def __init__(self, dim: int, m: int = 48, iters: int = 12, sample: int = 10000, seed: int = 0) -> None:
+        if dim % m:
+            raise ValueError(f"dim {dim} is not divisible by m={m}")
+        self.dim = dim
+        self.m = m
+        self.sub = dim // m
+        self.iters = iters
+        self.sample = sample
+        self.seed = seed
+        self.centroids = np.zeros((m, 1, self.sub), dtype=np.float32)
+
+    def fit(self, parts: Sequence[np.ndarray]) -> "PQCodec":
+        rng = np.random.default_rng(self.seed)
+        total = sum(len(x) for x in parts)
+        if total > self.sample:
+            rows = np.sort(rng.choice(total, self.sample, replace=False))
+        else:
+            rows = np.arange(total)
+        x = _gather(parts, rows) if total else np.empty((0, self.dim), dtype=np.float32)
+        ks = max(1, min(256, len(x)))
+        self.centroids = np.zeros((self.m, ks, self.sub), dtype=np.float32)
+        for j in range(self.m):
+            part = x[:, j * self.sub:(j + 1) * self.sub]
+            if not len(part):
+                continue
+            c = part[rng.choice(len(part), ks, replace=False)].copy()
+            for _ in range(self.iters):
+                assign = _nearest(part, c)
+                sums = np.stack([np.bincount(assign, weights=part[:, d], minlength=ks)
+                                 for d in range(self.sub)], axis=1)
+                counts = np.bincount(assign, minlength=ks)[:, None]
+                c = np.where(counts > 0, sums / np.maximum(counts, 1), c)
+            self.centroids[j] = c
+        return self
+
+    def covers(self, x: np.ndarray) -> bool:
+        """Always True: new vectors map to their nearest centroids; drift
+        needs an explicit `QuantizedStore.build(refit=True)`."""
+        return True
+
+    def encode(self, x: np.ndarray) -> np.ndarray:
+        codes = np.empty((len(x), self.m), dtype=np.uint8)
+        for i in range(0, len(x), _BLOCK):
+            block = np.asarray(x[i:i + _BLOCK], dtype=np.float32)
+            for j in range(self.m):
+                codes[i:i + _BLOCK, j] = _nearest(block[:, j * self.sub:(j + 1) * self.sub], self.centroids[j])
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return np.concatenate([self.centroids[j][codes[:, j]] for j in range(self.m)], axis=1)
+
+    def scores(self, codes: np.ndarray, q: np.ndarray) -> np.ndarray:
+        lut = np.einsum("mkd,md->mk", self.centroids, q.reshape(self.m, self.sub)).ravel()
+        offsets = np.arange(self.m, dtype=np.intp) * self.centroids.shape[1]
+        out = np.empty(len(codes), dtype=np.float32)
+        for i in range(0, len(codes), _BLOCK):
+            out[i:i + _BLOCK] = lut[codes[i:i + _BLOCK] + offsets].sum(axis=1)
+        return out
+
+    def bytes_per_vector(self) -> int:
+        return self.m
+
+    def overhead_bytes(self) -> int:
+        return int(self.centroids.nbytes)
+
+
+def _nearest(x: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """Index of the nearest row of `c` for every row of `x` (squared L2)."""
+    d = (c * c).sum(axis=1)[None, :] - 2.0 * (x @ c.T)
+    return d.argmin(axis=1)
+
+
+def make_codec(kind: Kind, dim: int, pq_m: int = 48) -> Int8Codec | PQCodec:
+    if kind == "int8":
+        return Int8Codec(dim)
+    if kind == "pq":
+        return PQCodec(dim, m=pq_m)
+    raise ValueError(f"unknown quantization {kind!r}")
+
+
+class QuantizedStore:
+    """
+    Quantized codes for every vector of an `ExactStore`, refreshed when the
+    store changes.
+
+    Codes are kept per exact-store segment, and segments never change, so a
+    refresh encodes only the segments written since the last one (dead rows
+    keep their codes until their segment is merged away). The codec is
+    trained on the first build and retrained only by `build(refit=True)` or
+    when new int8 vectors fall outside the trained range, which re-encodes
+    everything; PQ keeps its codebook until told otherwise.
+    """
+
+    def __init__(self, exact: ExactStore, kind: Kind = "int8", pq_m: int = 48) -> None:
+        self.exact = exact
+        self.codec = make_codec(kind, exact.dim, pq_m)
+        self._lock = threading.Lock()
+        empty = np.empty(0, dtype=np.int64)
+        self._view = View([], empty, empty, empty, -1)
+        self._codes: list[np.ndarray] = []  # per segment of `_view`, every row
+        self._fitted = False
+
+    @property
+    def kind(self) -> Kind:
+        return self.codec.kind
+
+    def __len__(self) -> int:
+        return len(self._view.ids)
+
+    def build(self, refit: bool = False) -> None:
+        """Encode the exact store's new segments (training the codec if needed)."""
+        with self._lock:
+            view = self.exact.view()
+            known = {g.name: c for g, c in zip(self._view.segments, self._codes)}
+            new = [g for g in view.segments if g.name not in known]
+            if refit or not self._fitted or not all(self.codec.covers(g.vecs) for g in new):
+                self.codec.fit([g.vecs for g in view.segments])
+                self._fitted = len(view.ids) > 0
+                known = {}
+            self._codes = [known[g.name] if g.name in known else self.codec.encode(g.vecs) for g in view.segments]
+            self._view = view
+
+    def _current(self) -> tuple[View, list[np.ndarray]]:
+        if self._view.version != self.exact.version:
+            self.build()
+        with self._lock:
+            return self._view, self._codes
+
+    def scores(self, query: np.ndarray, ids: np.ndarray | None = None) -> np.ndarray:
+        """Approximate cosine similarity of `query` to `ids` (default: all, store order).
+
+        Raises:
+            KeyError: If an id is not in the store.
+        """
+        view, codes = self._current()
+        q = normalize(np.asarray(query, dtype=np.float32))
+        if ids is None:
+            parts = [self.codec.scores(c, q) for c in codes]
+            parts = [sim if g.live is None else sim[g.live] for g, sim in zip(view.segments, parts)]
+            return np.concatenate(parts) if parts else np.empty(0, dtype=np.float32)
+        at = positions(view.ids, ids)
+        where, row = view.where[at], view.row[at]
+        out = np.empty(len(at), dtype=np.float32)
+        for i in np.unique(where):
+            sel = where == i
+            out[sel] = self.codec.scores(codes[i][row[sel]], q)
+        return out
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        rescore: int = 0,
+        allowed: np.ndarray | None = None,
+    ) -> tuple[np.ndarray, np.ndarray, int]:
+        """Approximate top-`rescore` by code scores, then exact top-k from float32.
+
+        Args:
+            query (np.ndarray): Query vector.
+            k (int): Results wanted.
+            rescore (int, optional): Candidates re-scored exactly; values
+                below k mean no rescoring (approximate distances). Defaults to 0.
+            allowed (np.ndarray | None, optional): Restrict to these chunk ids.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, int]: Chunk ids and cosine distances,
+            nearest first, and the number of vectors scored from codes.
+        """
+        view, codes = self._current()
+        q = normalize(np.asarray(query, dtype=np.float32))
+        depth = max(rescore, k)
+        found_ids, found_sim = [], []
+        scored = 0
+        for g, c in zip(view.segments, codes):
+            if allowed is not None:
+                match = np.isin(g.ids, allowed)
+                rows = np.flatnonzero(match if g.live is None else g.live & match)
+                ids, sim = np.asarray(g.ids[rows]), self.codec.scores(c[rows], q)
+            elif g.live is None:
+                ids, sim = np.asarray(g.ids), self.codec.scores(c, q)
+            else:
+                rows = g.rows()
+                ids, sim = np.asarray(g.ids[rows]), self.codec.scores(c, q)[rows]
+            scored += len(ids)
+            if 0 < depth < len(sim):
+                top = np.argpartition(-sim, depth - 1)[:depth]
+                ids, sim = ids[top], sim[top]
+            found_ids.append(ids)
+            found_sim.append(sim)
+        if k <= 0 or not scored:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), scored
+        cand, sim = np.concatenate(found_ids), np.concatenate(found_sim)
+        if depth < len(sim):
+            top = np.argpartition(-sim, depth - 1)[:depth]
+            cand, sim = cand[top], sim[top]
+        if rescore >= k:
+            sim = self.exact.vectors(cand) @ q
+        best = np.lexsort((cand, -sim))[:k]
+        return cand[best], (1.0 - sim[best]).astype(np.float32), scored
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            view, codes = self._view, self._codes
+        rows, id_bytes = len(view.ids), view.ids.itemsize
+        return {
+            "kind": self.kind,
+            "rows": rows,
+            "bytes_per_vector": self.codec.bytes_per_vector() + id_bytes,
+            "float32_bytes_per_vector": self.exact.dim * 4 + id_bytes,
+            "codebook_bytes": self.codec.overhead_bytes(),
+            # codes of dead rows stay until their segment is merged away
+            "bytes": sum(c.nbytes for c in codes) + rows * id_bytes + self.codec.overhead_bytes(),
+        }
+
+
+def recall_at_k(
+    store: QuantizedStore,
+    queries: np.ndarray,
+    k: int = 10,
+    rescore: int = 0,
+) -> float:
+    """Mean overlap of the quantized top-k with the exact float32 top-k."""
+    hits = []
+    for q in queries:
+        exact, _ = store.exact.search(q, k)
+        approx, _, _ = store.search(q, k, rescore=rescore)
+        if len(exact):
+            hits.append(len(np.intersect1d(exact, approx)) / len(exact))
+    return float(np.mean(hits)) if hits else 1.0
@@ -1,65 +1,147 @@
 from __future__ import annotations
-from typing import Any, Mapping, Sequence, cast
-from app.core.kuzu import get_conn
-from app.graph.seed import _as_qr
+import base64
+import binascii
+import json
+from typing import Any, Iterator
+from app.core.kuzu import connection, query, statement
+from app.core.results import Rows
 
+# Keyset on the sort key (d.id, s.ord, c.ord). The start key is (-1, -1, -1),
+# so the first page and every later page share one plan.
+_AFTER = """
+WHERE d.id > $after_d
+   OR (d.id = $after_d AND (s.ord > $after_s OR (s.ord = $after_s AND c.ord > $after_c)))
+"""
 
-def list_chunks(limit: int = 100, doc_title: str | None = None) -> list[dict[str, Any]]:
+_RETURN = """
+RETURN
+    d.id   AS document_id,
+    d.title AS document,
+    s.id   AS section_id,
+    s.title AS section,
+    c.id   AS chunk_id,
+    c.ord  AS chunk_ord,
+    c.text AS text,
+    s.ord  AS section_ord
+ORDER BY d.id, s.ord, c.ord
+LIMIT $lim
+"""
+
+LIST_CHUNKS = statement("list_chunks", """
+MATCH (d:Document)-[:ContainsDocSection]->(s:Section)
+        -[:ContainsSectionChunk]->(c:Chunk)
+""" + _AFTER + _RETURN)
+
+LIST_CHUNKS_BY_DOC = statement("list_chunks_by_doc", """
+MATCH (d:Document {title: $t})-[:ContainsDocSection]->(s:Section)
+        -[:ContainsSectionChunk]->(c:Chunk)
+""" + _AFTER + _RETURN)
+
+Key = tuple[int, int, int]
+START: Key = (-1, -1, -1)
+
+
+def encode_cursor(key: Key) -> str:
+    """Encode a (document_id, section_ord, chunk_ord) key as an opaque cursor."""
+    raw = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Key:
+    """Decode a cursor produced by `encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        d, s, c = (int(v) for v in json.loads(raw))
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise ValueError(f"invalid cursor: {cursor!r}") from e
+    return d, s, c
+
+
+def last_key(rows: Rows) -> Key | None:
+    """Sort key of the last row, or None if `rows` is empty."""
+    if not rows.rows:
+        return None
+    cols = rows.columns
+    last = rows.rows[-1]
+    return (
+        last[cols.index("document_id")],
+        last[cols.index("section_ord")],
+        last[cols.index("chunk_ord")],
+    )
+
+
+def list_chunk_rows(
+    limit: int = 100,
+    doc_title: str | None = None,
+    after: Key = START,
+) -> Rows:
     """
     Return Chunk rows with their Section & Document context.
     Idempotent and safe on empty DB.
+    Rows come in (document, section, chunk) order, strictly after `after`.
     """
 
     if limit <= 0:
         limit = 100
-        
-    where = "WHERE d.title = $t" if doc_title else ""
-    params: dict[str, Any] = {"t": doc_title} if doc_title else {}
-    
-    q = f"""
-    MATCH (d:Document)-[:ContainsDocSection]->(s:Section)
-            -[:ContainsSectionChunk]->(c:Chunk)
-    {where}
-    RETURN
-        d.id   AS document_id,
-        d.title AS document,
-        s.id   AS section_id,
-        s.title AS section,
-        c.id   AS chunk_id,
-        c.ord  AS chunk_ord,
-        c.text AS text
-    ORDER BY d.id, s.ord, c.ord
-    LIMIT $lim
+
+    params: dict[str, Any] = {
+        "lim": int(limit),
+        "after_d": after[0],
+        "after_s": after[1],
+        "after_c": after[2],
+    }
+    name = LIST_CHUNKS
+    if doc_title:
+        name = LIST_CHUNKS_BY_DOC
+        params["t"] = doc_title
+
+    with connection() as conn:
+        return query(conn, name, params)
+
+
+def list_chunks(
+    limit: int = 100,
+    doc_title: str | None = None,
+    after: Key = START,
+) -> list[dict[str, Any]]:
+    """Same as `list_chunk_rows`, as a list of dicts."""
+    return list_chunk_rows(limit=limit, doc_title=doc_title, after=after).records()
+
+
+def iter_chunk_pages(
+    doc_title: str | None = None,
+    after: Key = START,
+    page_size: int = 1000,
+    max_rows: int | None = None,
+) -> Iterator[Rows]:
+    """Walk chunks page by page with the keyset cursor.
+
+    A connection is held only while a page is fetched, never across a
+    `yield`, so a slow consumer does not pin a pool slot.
+
+    Args:
+        doc_title (str | None, optional): Restrict to one document.
+        after (Key, optional): Start after this key. Defaults to the beginning.
+        page_size (int, optional): Rows per query. Defaults to 1000.
+        max_rows (int | None, optional): Stop after this many rows. Defaults to all.
+
+    Yields:
+        Rows: Non-empty pages, in sort order.
     """
-    params["lim"] = int(limit)
-
-    res = _as_qr(get_conn().execute(q, params))
-
-    out: list[dict[str, Any]] = []
-    while res.has_next():
-        row = res.get_next()
-        if row is None:
-            break
-
-        if isinstance(row, Mapping):
-            out.append({
-                "document_id": row["document_id"],
-                "document":    row["document"],
-                "section_id":  row["section_id"],
-                "section":     row["section"],
-                "chunk_id":    row["chunk_id"],
-                "chunk_ord":   row["chunk_ord"],
-                "text":        row["text"],
-            })
-        else:
-            seq = cast(Sequence[Any], row)
-            out.append({
-                "document_id": seq[0],
-                "document":    seq[1],
-                "section_id":  seq[2],
-                "section":     seq[3],
-                "chunk_id":    seq[4],
-                "chunk_ord":   seq[5],
-                "text":        seq[6],
-            })
-    return out
+    remaining = max_rows
+    while remaining is None or remaining > 0:
+        size = page_size if remaining is None else min(page_size, remaining)
+        page = list_chunk_rows(limit=size, doc_title=doc_title, after=after)
+        key = last_key(page)
+        if key is None:
+            return
+        yield page
+        if remaining is not None:
+            remaining -= len(page)
+        if len(page) < size:
+            return
+        after = key
@@ -1,6 +1,57 @@
 from __future__ import annotations
-from app.core.kuzu import get_conn
-from app.graph.seed import _as_qr, _first_scalar, _single_int
+from typing import Sequence
+from app.core.cache import bump_generation
+from app.core.kuzu import connection, execute, query, run, statement
+from app.core.results import first_scalar
+from app.graph.fulltext import index_chunks
+
+# Titles are looked up through DocumentTitle's primary-key index, not by
+# scanning Document.title.
+DOCUMENT_EXISTS = statement(
+    "document_exists",
+    "MATCH (t:DocumentTitle {title: $t}) RETURN COUNT(t) AS cnt",
+)
+
+EXISTING_TITLES = statement("existing_titles", """
+UNWIND $titles AS title
+MATCH (t:DocumentTitle {title: title})
+RETURN DISTINCT t.title AS title
+""")
+
+CREATE_DOCUMENT = statement(
+    "create_document",
+    "CREATE (d:Document {title: $t}) RETURN d.id AS id",
+)
+
+CREATE_DOCUMENT_TITLE = statement(
+    "create_document_title",
+    "CREATE (t:DocumentTitle {title: $t, doc: $doc})",
+)
+
+CREATE_SECTION = statement("create_section", """
+MATCH (d:Document {id:$doc})
+    CREATE (s:Section {title:$title, ord:$ord }),
+    (d)-[:ContainsDocSection]-> (s)
+RETURN s.id AS id
+""")
+
+CREATE_CHUNK = statement("create_chunk", """
+MATCH (s:Section {id:$sid})
+CREATE (c:Chunk {text:$text, ord:$ord}),
+       (s)-[:ContainsSectionChunk]->(c)
+RETURN c.id AS id
+""")
+
+
+class DocumentExists(ValueError):
+    """A document with this title already exists (or repeats within a batch)."""
+
+    def __init__(self, title: str) -> None:
+        super().__init__(title)
+        self.title = title
+
+    def __str__(self) -> str:
+        return f"Document with title '{self.title}' already exists"
 
 
 def document_exists(title: str) -> bool:
@@ -12,20 +63,50 @@ def document_exists(title: str) -> bool:
     Returns:
         bool: True if the document exists, False otherwise.
     """
-    cnt = _single_int("MATCH (d:Document {title: $t}) RETURN COUNT(d) AS cnt", {"t": title})
-    return cnt > 0
+    with connection() as conn:
+        cnt = first_scalar(run(conn, DOCUMENT_EXISTS, {"t": title}))
+    return int(cnt or 0) > 0
+
+
+def existing_titles(titles: Sequence[str]) -> set[str]:
+    """Which of `titles` already belong to a document (one query).
+
+    Args:
+        titles (Sequence[str]): Titles to look up.
+
+    Returns:
+        set[str]: The subset that exists.
+    """
+    if not titles:
+        return set()  # an empty list parameter has no element type to bind
+    with connection() as conn:
+        return {r[0] for r in query(conn, EXISTING_TITLES, {"titles": list(titles)}).rows}
 
 
 def create_document(title: str) -> int:
-    """Create a new document with the given title.
+    """Create a new document with the given title, if no document has it.
+
+    The title check and both inserts share one transaction.
 
     Args:
         title (str): The title of the document to create.
+
+    Raises:
+        DocumentExists: If the title is taken.
     """
-    q = "CREATE (d:Document {title: $t}) RETURN d.id AS id"
-    res = _as_qr(get_conn().execute(q, {"t": title}))
-    val = _first_scalar(res)
-    assert val is not None, "Failed to create document"
+    with connection() as conn:
+        execute(conn, "BEGIN TRANSACTION;")
+        try:
+            if first_scalar(run(conn, DOCUMENT_EXISTS, {"t": title})):
+                raise DocumentExists(title)
+            val = first_scalar(run(conn, CREATE_DOCUMENT, {"t": title}))
+            assert val is not None, "Failed to create document"
+            run(conn, CREATE_DOCUMENT_TITLE, {"t": title, "doc": int(val)})
+        except Exception:
+            execute(conn, "ROLLBACK;")
+            raise
+        execute(conn, "COMMIT;")
+    bump_generation()
     return int(val)
 
 
@@ -40,21 +121,17 @@ def create_section(doc_id: int, title: str, ord_: int) -> int:
     Returns:
         int: The ID of the created section.
     """
-    q = """
-    MATCH (d:Document {id:$doc})
-        CREATE (s:Section {title:$title, ord:$ord }),
-        (d)-[:ContainsDocSection]-> (s)
-    RETURN s.id AS id
-    """
-    res = _as_qr(get_conn().execute(q, {"doc": doc_id, "title": title, "ord": int(ord_)}))
-    val = _first_scalar(res)
+    with connection() as conn:
+        val = first_scalar(run(conn, CREATE_SECTION, {"doc": doc_id, "title": title, "ord": int(ord_)}))
     assert val is not None, "Failed to create section"
+    bump_generation()
     return int(val)
 
 
 def create_chunk(section_id: int, text: str, ord_: int) -> int:
     """
     Create a new chunk with the given text and link it to the specified section.
+    The chunk is added to the full-text index in the same transaction.
     Args:
         section_id (int): The ID of the section to link the chunk to.
         text (str): The text of the chunk to create.
@@ -62,13 +139,15 @@ def create_chunk(section_id: int, text: str, ord_: int) -> int:
     Returns:
         int: The ID of the created chunk.
     """
-    q = """
-    MATCH (s:Section {id:$sid})
-    CREATE (c:Chunk {text:$text, ord:$ord}),
-           (s)-[:ContainsSectionChunk]->(c)
-    RETURN c.id AS id
-    """
-    res = _as_qr(get_conn().execute(q, {"sid": section_id, "text": text, "ord": int(ord_)}))
-    val = _first_scalar(res)
-    assert val is not None, "Failed to create Chunk"
+    with connection() as conn:
+        execute(conn, "BEGIN TRANSACTION;")
+        try:
+            val = first_scalar(run(conn, CREATE_CHUNK, {"sid": section_id, "text": text, "ord": int(ord_)}))
+            assert val is not None, "Failed to create Chunk"
+            index_chunks(conn, [(int(val), text)])
+        except Exception:
+            execute(conn, "ROLLBACK;")
+            raise
+        execute(conn, "COMMIT;")
+    bump_generation()
     return int(val)
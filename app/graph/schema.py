@@ -1,22 +1,40 @@
 from __future__ import annotations
-from app.core.kuzu import get_conn
+from datetime import datetime, timezone
+import hashlib
+from kuzu import Connection
+from app.core.cache import bump_generation
+from app.core.kuzu import connection, execute, execute_all
 from app.core.tracing import get_tracer
 
 tracer = get_tracer(__name__)
 
 
-def _ensure_vector_loaded() -> None:
-    conn = get_conn()
-    for stmt in ("INSTALL VECTOR;", "LOAD VECTOR;"):
-        try:
-            conn.execute(stmt)
-        except Exception as e:
-            # simplest acceptable guard: only ignore “already …” cases
-            if "already" in str(e).lower():
-                continue
-            raise
+def ensure_extension(conn: Connection, name: str) -> None:
+    """Load a Kùzu extension into this database, installing it only if missing.
+
+    `INSTALL` may download the extension, so it is skipped when the extension
+    is already installed; `LOAD` is skipped when this database has it loaded.
+    """
+    def names(call: str) -> set[str]:
+        return {str(r[0]).upper() for r in execute_all(conn, f"CALL {call}() RETURN *", name="show_extensions").rows}
+
+    name = name.upper()
+    if name in names("SHOW_LOADED_EXTENSIONS"):
+        return
+    if name not in names("SHOW_INSTALLED_EXTENSIONS"):
+        execute(conn, f"INSTALL {name};", name="install_extension")
+    execute(conn, f"LOAD {name};", name="load_extension")
 
 
+# Kept separate so the embedding writer can drop and recreate the table
+# (app.graph.semantic); FLOAT[384] must match semantic.DIM.
+EMBEDDING_DDL = """
+    CREATE NODE TABLE IF NOT EXISTS ChunkEmbedding(
+        id INT64 PRIMARY KEY,
+        vec FLOAT[384]
+    );
+    """
+
 DDL = [
 
     # Nodes
@@ -26,6 +44,14 @@ DDL = [
         title STRING
     );
     """,
+    # Title -> document id. Kùzu only indexes primary keys, so this makes
+    # title lookups O(1) and duplicate titles impossible (app.graph.repo).
+    """
+    CREATE NODE TABLE IF NOT EXISTS DocumentTitle(
+        title STRING PRIMARY KEY,
+        doc INT64
+    );
+    """,
     """
     CREATE NODE TABLE IF NOT EXISTS Section(
         id SERIAL PRIMARY KEY,
@@ -38,31 +64,125 @@ DDL = [
         id SERIAL PRIMARY KEY,
         text STRING,
         ord INT32,
-        embedding FLOAT[384]
+        embedded_at TIMESTAMP
     );
     """,
+    # Databases created before embeddings were tracked per chunk
+    "ALTER TABLE Chunk ADD IF NOT EXISTS embedded_at TIMESTAMP;",
+    EMBEDDING_DDL,
 
     # Relationships (directional)
     "CREATE REL TABLE IF NOT EXISTS ContainsDocSection(FROM Document TO Section, ONE_MANY);",
     "CREATE REL TABLE IF NOT EXISTS ContainsSectionChunk(FROM Section TO Chunk, ONE_MANY);",
     "CREATE REL TABLE IF NOT EXISTS NextChunk(FROM Chunk TO Chunk, MANY_ONE);",
+
+    # Inverted index for BM25 search (app.graph.fulltext)
+    "CREATE NODE TABLE IF NOT EXISTS Term(term STRING PRIMARY KEY, df INT64);",
+    "CREATE NODE TABLE IF NOT EXISTS TextStats(id INT64 PRIMARY KEY, chunks INT64, tokens INT64);",
+    "CREATE REL TABLE IF NOT EXISTS HasTerm(FROM Chunk TO Term, tf INT32, dl INT32);",
+]
+
+
+# Data steps that go with the DDL; idempotent, run whenever the DDL is applied.
+BACKFILL = [
+    # Title lookup rows for documents written before DocumentTitle existed
+    "MATCH (d:Document) MERGE (t:DocumentTitle {title: d.title}) ON CREATE SET t.doc = d.id;",
 ]
 
+# Databases from before ChunkEmbedding kept vectors in `Chunk.embedding` (the
+# column stays: an indexed column cannot be dropped). `_migrate_embeddings`
+# copies them across while ChunkEmbedding is still empty.
+LEGACY_EMBEDDINGS = [
+    "MATCH (c:Chunk) WHERE c.embedding IS NOT NULL SET c.embedded_at = $at RETURN count(c);",
+    "MATCH (c:Chunk) WHERE c.embedding IS NOT NULL CREATE (:ChunkEmbedding {id: c.id, vec: c.embedding});",
+]
 
-def ensure_schema() -> None:
+# One row (id 0) holding the fingerprint of the DDL last applied.
+SCHEMA_VERSION_DDL = """
+    CREATE NODE TABLE IF NOT EXISTS SchemaVersion(
+        id INT64 PRIMARY KEY,
+        fingerprint STRING,
+        applied_at TIMESTAMP
+    );
     """
-    Ensure the database schema is there and up to date. Confirm index exists.
+
+_READ_VERSION = "MATCH (v:SchemaVersion) WHERE v.id = 0 RETURN v.fingerprint"
+
+_WRITE_VERSION = "MERGE (v:SchemaVersion {id: 0}) SET v.fingerprint = $f, v.applied_at = $at"
+
+
+def schema_fingerprint() -> str:
+    """Hash of the DDL (whitespace-insensitive); changes whenever `DDL` does."""
+    text = "\n".join(" ".join(stmt.split()) for stmt in [*DDL, *BACKFILL, *LEGACY_EMBEDDINGS, SCHEMA_VERSION_DDL])
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def applied_fingerprint(conn: Connection) -> str | None:
+    """Fingerprint recorded by the last `ensure_schema`, or None."""
+    tables = {r[0] for r in execute_all(conn, "CALL SHOW_TABLES() RETURN name", name="show_tables").rows}
+    if "SchemaVersion" not in tables:
+        return None
+    rows = execute_all(conn, _READ_VERSION, name="read_schema_version").rows
+    return rows[0][0] if rows else None
+
+
+def _migrate_embeddings(conn: Connection) -> int:
+    """Copy `Chunk.embedding` vectors into ChunkEmbedding and index them.
+
+    Only for a database with the old column and an empty ChunkEmbedding, so
+    embeddings written since are never overwritten. One transaction.
+
+    Returns:
+        int: Vectors copied.
     """
-    with tracer.start_as_current_span("kuzu.ensure_schema"):
-        conn = get_conn()
-
-        _ensure_vector_loaded()
-
-        for stmt in DDL:
-            try:
-                conn.execute(stmt)
-            except Exception as e:
-                msg = str(e).lower()
-                if "already exists" in msg or "is already installed" in msg:
-                    continue
-                raise
\ No newline at end of file
+    columns = {r[0] for r in execute_all(conn, "CALL TABLE_INFO('Chunk') RETURN name", name="chunk_columns").rows}
+    if "embedding" not in columns:
+        return 0
+    if execute_all(conn, "MATCH (e:ChunkEmbedding) RETURN count(e)", name="count_embeddings").rows[0][0]:
+        return 0
+    mark, copy = LEGACY_EMBEDDINGS
+    execute(conn, "BEGIN TRANSACTION;")
+    try:
+        copied = execute_all(conn, mark, {"at": datetime.now(timezone.utc)}, name="migrate_embeddings").rows[0][0]
+        execute(conn, copy, name="migrate_embeddings")
+    except Exception:
+        execute(conn, "ROLLBACK;")
+        raise
+    execute(conn, "COMMIT;")
+    if copied:
+        from app.graph.semantic import create_vector_index  # semantic imports this module
+
+        create_vector_index(conn)
+        bump_generation()
+    return int(copied)
+
+
+def ensure_schema() -> bool:
+    """
+    Ensure the database schema is there and up to date, and the vector
+    extension is loaded.
+
+    The DDL only runs when the fingerprint stored in `SchemaVersion` differs
+    from `schema_fingerprint()` (new database, or the DDL changed).
+
+    Returns:
+        bool: True if the DDL ran.
+    """
+    with tracer.start_as_current_span("kuzu.ensure_schema") as span:
+        fingerprint = schema_fingerprint()
+        span.set_attribute("schema.fingerprint", fingerprint)
+        with connection() as conn:
+            ensure_extension(conn, "VECTOR")
+            if applied_fingerprint(conn) == fingerprint:
+                span.set_attribute("schema.applied", False)
+                return False
+
+            # Every statement is IF NOT EXISTS, so a partial earlier run is fine.
+            for stmt in [*DDL, SCHEMA_VERSION_DDL]:
+                execute(conn, stmt)
+            for stmt in BACKFILL:
+                execute(conn, stmt, name="schema_backfill")
+            span.set_attribute("schema.migrated_embeddings", _migrate_embeddings(conn))
+            execute(conn, _WRITE_VERSION, {"f": fingerprint, "at": datetime.now(timezone.utc)}, name="write_schema_version")
+        span.set_attribute("schema.applied", True)
+        return True
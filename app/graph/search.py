@@ -1,8 +1,32 @@
 from __future__ import annotations
 import re
-from typing import Any, Mapping, Sequence, cast
-from app.core.kuzu import get_conn
-from app.graph.seed import _as_qr
+from typing import Any
+from app.core.kuzu import connection, query, statement
+from app.core.results import Rows
+from app.graph.fulltext import BM25_SEARCH, BM25_SEARCH_BY_DOC, bm25_params, query_terms
+
+_RETURN = """
+RETURN
+    d.id    AS document_id,
+    d.title AS document,
+    s.id    AS section_id,
+    s.title AS section,
+    c.id    AS chunk_id,
+    c.ord   AS chunk_ord,
+    c.text  AS text
+ORDER BY d.id, s.ord, c.ord
+LIMIT $lim
+"""
+
+SEARCH_CHUNKS = statement("search_chunks", """
+MATCH (d:Document)-[:ContainsDocSection]->(s:Section)-[:ContainsSectionChunk]->(c:Chunk)
+WHERE c.text =~ $pat
+""" + _RETURN)
+
+SEARCH_CHUNKS_BY_DOC = statement("search_chunks_by_doc", """
+MATCH (d:Document {title: $t})-[:ContainsDocSection]->(s:Section)-[:ContainsSectionChunk]->(c:Chunk)
+WHERE c.text =~ $pat
+""" + _RETURN)
 
 
 def _pattern(q: str, ci: bool) -> str:
@@ -11,16 +35,17 @@ def _pattern(q: str, ci: bool) -> str:
     return (f"(?i).*{core}.*") if ci else (f".*{core}.*")
 
 
-def search_chunks(
+def search_chunk_rows(
     q: str,
     doc_title: str | None = None,
     limit: int = 20,
     case_insensitive: bool = True,
-) -> list[dict[str, Any]]:
+) -> Rows:
     """
     Search chunks by text, optionally filtering by document title.
     Case-insensitive substring match.
-    Returns a list of dicts with document, section, chunk info.
+    Returns `Rows` with document, section and chunk columns
+    (`search_chunks` gives them as dicts).
     """
     if limit <= 0:
         limit = 20
@@ -29,53 +54,47 @@ def search_chunks(
         "pat": _pattern(q, case_insensitive),
         "lim": int(limit),
     }
-
-    where_parts = ["c.text =~ $pat"]
+    name = SEARCH_CHUNKS
     if doc_title:
-        where_parts.append("d.title = $t")
+        name = SEARCH_CHUNKS_BY_DOC
         params["t"] = doc_title
 
-    where = "WHERE " + " AND ".join(where_parts)
-
-    qtext = f"""
-    MATCH (d:Document)-[:ContainsDocSection]->(s:Section)-[:ContainsSectionChunk]->(c:Chunk)
-    {where}
-    RETURN
-        d.id    AS document_id,
-        d.title AS document,
-        s.id    AS section_id,
-        s.title AS section,
-        c.id    AS chunk_id,
-        c.ord   AS chunk_ord,
-        c.text  AS chunk
-    ORDER BY d.id, s.ord, c.ord
-    LIMIT $lim
+    with connection() as conn:
+        return query(conn, name, params)
+
+
+def search_chunks(
+    q: str,
+    doc_title: str | None = None,
+    limit: int = 20,
+    case_insensitive: bool = True,
+) -> list[dict[str, Any]]:
+    """Same as `search_chunk_rows`, as a list of dicts."""
+    return search_chunk_rows(q=q, doc_title=doc_title, limit=limit, case_insensitive=case_insensitive).records()
+
+
+def bm25_search_rows(
+    q: str,
+    doc_title: str | None = None,
+    limit: int = 20,
+) -> Rows:
+    """
+    Ranked full-text search over Chunk.text using the inverted index.
+    Any query word may match; rows are ordered by BM25 score (highest first)
+    and carry a `score` column. Matching is on lower-cased whole words.
     """
+    if limit <= 0:
+        limit = 20
+
+    terms = query_terms(q)
+    if not terms:
+        return Rows(columns=[], rows=[])
+
+    params = bm25_params(terms, limit)
+    name = BM25_SEARCH
+    if doc_title:
+        name = BM25_SEARCH_BY_DOC
+        params["t"] = doc_title
 
-    res = _as_qr(get_conn().execute(qtext, params))
-    out: list[dict[str, Any]] = []
-
-    while res.has_next():
-        row = res.get_next()
-        if isinstance(row, Mapping):
-            out.append({
-                "document_id": row["document_id"],
-                "document":    row["document"],
-                "section_id":  row["section_id"],
-                "section":     row["section"],
-                "chunk_id":    row["chunk_id"],
-                "chunk_ord":   row["chunk_ord"],
-                "text":        row["text"],
-            })
-        else:
-            seq = cast(Sequence[Any], row)
-            out.append({
-                "document_id":   seq[0],
-                "document":      seq[1],
-                "section_id":    seq[2],
-                "section":       seq[3],
-                "chunk_id":      seq[4],
-                "chunk_ord":     seq[5],
-                "text":          seq[6],
-            })
-    return out
+    with connection() as conn:
+        return query(conn, name, params)
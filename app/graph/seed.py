@@ -1,37 +1,16 @@
 from __future__ import annotations
-from typing import Any, Mapping, Sequence, cast
+from typing import Any
 
-from kuzu import QueryResult
-from app.core.kuzu import get_conn
+from app.api.schemas import IngestDocument, IngestSection
+from app.core.cache import bump_generation
+from app.core.kuzu import connection, execute, execute_all
+from app.core.results import first_scalar
+from app.graph.ingest import ingest_document
+from app.graph.semantic import get_exact_store
 
 SAMPLE_DOC = "Sample Doc"
 
 
-def _as_qr(res: QueryResult | list[QueryResult]) -> QueryResult:
-    """
-    Normalize Connection.execute return into a single QueryResult.
-    """
-    # If a list ever appears (type stubs / multi-statement), take the first.
-    return res[0] if isinstance(res, list) else res
-
-
-def _first_scalar(res: QueryResult) -> Any:
-    """
-    Return the first column of the first row, regardless of whether rows are
-    sequence-like (tuple/list) or mapping-like (dict/record).
-    """
-    row = res.get_next()
-    if row is None:
-        return None
-    # Pylance sometimes thinks row is a Mapping[str, Any]
-    if isinstance(row, Mapping):
-        # take the first column’s value
-        return next(iter(row.values()), None)
-    # otherwise treat as a positional row (tuple/list)
-    seq = cast(Sequence[Any], row)
-    return seq[0] if len(seq) else None
-
-
 def _single_int(query: str, params: dict[str, Any] | None = None) -> int:
     """Execute a query and return a single integer result.
 
@@ -42,94 +21,75 @@ def _single_int(query: str, params: dict[str, Any] | None = None) -> int:
     Returns:
         int: The integer result of the query, or 0 if no result is found.
     """
-    qres = _as_qr(get_conn().execute(query, params or {}))
-    val = _first_scalar(qres)
+    with connection() as conn:
+        qres = execute(conn, query, params)
+        val = first_scalar(qres)
     return int(val) if val is not None else 0
 
 
 def _rows(query: str, params: dict[str, Any] | None = None) -> list[tuple]:
     """
-    Collect all rows as tuples, tolerating either mapping-like or sequence-like rows.
-    Column order for mappings follows projection order.
+    Collect all rows as tuples (projection order), fetched in one call.
     """
-    qres = _as_qr(get_conn().execute(query, params or {}))
-    out: list[tuple] = []
-    while qres.has_next():
-        row = qres.get_next()
-        if row is None:
-            break
-        if isinstance(row, Mapping):
-            out.append(tuple(row.values()))
-        else:
-            seq = cast(Sequence[Any], row)
-            out.append(tuple(seq))
-    return out
+    with connection() as conn:
+        return [tuple(r) for r in execute_all(conn, query, params).rows]
 
 
 def seed_sample(reset: bool = True) -> dict[str, Any]:
-    conn = get_conn()
-
-    if reset:
-        # Remove everything (safe if already empty)
-        conn.execute("MATCH (n) DETACH DELETE n;")
-
-    # Create only if our sample doc doesn't exist
-    exists = _single_int(
-        "MATCH (d:Document {title:$t}) RETURN COUNT(d)",
-        {"t": SAMPLE_DOC},
-    )
+    with connection() as conn:
+        if reset:
+            # Remove everything but the schema record (safe if already empty)
+            execute(conn, "MATCH (n) WHERE label(n) <> 'SchemaVersion' DETACH DELETE n;", name="delete_all")
+            get_exact_store().reset()
+            bump_generation()
+
+        # Create only if our sample doc doesn't exist
+        exists = _single_int(
+            "MATCH (t:DocumentTitle {title:$t}) RETURN COUNT(t)",
+            {"t": SAMPLE_DOC},
+        )
 
-    created = False
-    if exists == 0:
-        created = True
-        # 1 doc, 2 sections, 3 chunks
-        conn.execute("CREATE (d:Document {title:$t});", {"t": SAMPLE_DOC})
-        conn.execute(
+        created = False
+        if exists == 0:
+            created = True
+            # 1 doc, 2 sections, 3 chunks; via the ingest path so the
+            # full-text index is populated too.
+            ingest_document(IngestDocument(
+                title=SAMPLE_DOC,
+                sections=[
+                    IngestSection(title="Intro", chunks=["Hello world"]),
+                    IngestSection(title="Body", chunks=["Second chunk", "Third chunk"]),
+                ],
+            ))
+
+        # Verification: counts and a small sample listing
+        totals = {
+            "documents": _single_int("MATCH (d:Document) RETURN COUNT(d)"),
+            "sections": _single_int("MATCH (s:Section) RETURN COUNT(s)"),
+            "chunks": _single_int("MATCH (c:Chunk) RETURN COUNT(c)"),
+            "doc_to_section_edges": _single_int(
+                "MATCH (:Document)-[:ContainsDocSection]->(:Section) RETURN COUNT(*)"
+            ),
+            "section_to_chunk_edges": _single_int(
+                "MATCH (:Section)-[:ContainsSectionChunk]->(:Chunk) RETURN COUNT(*)"
+            ),
+            "next_chunk_edges": _single_int(
+                "MATCH (:Chunk)-[:NextChunk]->(:Chunk) RETURN COUNT(*)"
+            ),
+        }
+
+        sample_rows = _rows(
             """
-            MATCH (d:Document {title:$t})
-            CREATE (s1:Section {title:$s1, ord:0}),
-                   (s2:Section {title:$s2, ord:1}),
-                   (d)-[:ContainsDocSection]->(s1),
-                   (d)-[:ContainsDocSection]->(s2),
-                   (s1)-[:ContainsSectionChunk]->(:Chunk {text:$c1, ord:0}),
-                   (s2)-[:ContainsSectionChunk]->(:Chunk {text:$c2, ord:0}),
-                   (s2)-[:ContainsSectionChunk]->(:Chunk {text:$c3, ord:1});
+            MATCH (d:Document {title:$t})-[:ContainsDocSection]->(s:Section)
+                  -[:ContainsSectionChunk]->(c:Chunk)
+            RETURN d.title, s.title, c.ord, c.text
+            ORDER BY s.ord, c.ord
             """,
-            {
-                "t": SAMPLE_DOC,
-                "s1": "Intro",
-                "s2": "Body",
-                "c1": "Hello world",
-                "c2": "Second chunk",
-                "c3": "Third chunk",
-            },
+            {"t": SAMPLE_DOC},
         )
+        sample = [
+            {"document": r[0], "section": r[1], "chunk_ord": r[2], "text": r[3]}
+            for r in sample_rows
+        ]
 
-    # Verification: counts and a small sample listing
-    totals = {
-        "documents": _single_int("MATCH (d:Document) RETURN COUNT(d)"),
-        "sections": _single_int("MATCH (s:Section) RETURN COUNT(s)"),
-        "chunks": _single_int("MATCH (c:Chunk) RETURN COUNT(c)"),
-        "doc_to_section_edges": _single_int(
-            "MATCH (:Document)-[:ContainsDocSection]->(:Section) RETURN COUNT(*)"
-        ),
-        "section_to_chunk_edges": _single_int(
-            "MATCH (:Section)-[:ContainsSectionChunk]->(:Chunk) RETURN COUNT(*)"
-        ),
-    }
-
-    sample_rows = _rows(
-        """
-        MATCH (d:Document {title:$t})-[:ContainsDocSection]->(s:Section)
-              -[:ContainsSectionChunk]->(c:Chunk)
-        RETURN d.title, s.title, c.ord, c.text
-        ORDER BY s.ord, c.ord
-        """,
-        {"t": SAMPLE_DOC},
-    )
-    sample = [
-        {"document": r[0], "section": r[1], "chunk_ord": r[2], "text": r[3]}
-        for r in sample_rows
-    ]
-
-    return {"created": created, "totals": totals, "sample": sample}
+        return {"created": created, "totals": totals, "sample": sample}
@@ -1,14 +1,153 @@
 from __future__ import annotations
+import base64
+import binascii
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
 from kuzu import Connection
-from typing import Any, Mapping, Sequence, cast
-from app.core.kuzu import get_conn
-from app.graph.seed import _as_qr
+from typing import Any, Iterable, Literal, Mapping, Sequence
+import numpy as np
+from app.core.cache import LRUCache, bump_generation, generation
+from app.core.config import settings
+from app.core.executor import submit
+from app.core.kuzu import connection, execute, execute_all, invalidate, query, run, statement
+from app.core.results import Rows
+from app.core.tracing import get_tracer
+from app.graph.exact import ExactStore
+from app.graph.quantized import QuantizedStore, recall_at_k
+from app.graph.schema import EMBEDDING_DDL
 
-DIM: int = 384  # must match FLOAT[384] in Chunk.embedding
+tracer = get_tracer(__name__)
 
-INDEX_TBL = "Chunk"
+DIM: int = 384  # must match FLOAT[384] in ChunkEmbedding.vec
+
+# Embeddings live in their own table keyed by chunk id, so the vector index
+# can be rebuilt by recreating that table without touching Chunk or its edges.
+INDEX_TBL = "ChunkEmbedding"
 INDEX_NAME = "chunk_embedding_idx"
-INDEX_COL = "embedding"
+INDEX_COL = "vec"
+
+# Plain text, not a registered statement: the table is dropped and recreated.
+_COUNT_EMBEDDINGS = f"MATCH (e:{INDEX_TBL}) RETURN count(e)"
+
+_RETURN = """
+RETURN
+    d.id    AS document_id,
+    d.title AS document,
+    s.id    AS section_id,
+    s.title AS section,
+    c.id    AS chunk_id,
+    c.ord   AS chunk_ord,
+    c.text  AS text,
+    distance AS distance
+ORDER BY distance
+LIMIT $k
+"""
+
+SEMANTIC_SEARCH = statement("semantic_search", f"""
+CALL QUERY_VECTOR_INDEX('{INDEX_TBL}', '{INDEX_NAME}', $vec, $k, efs := $efs)
+WITH node AS e, distance
+MATCH (d:Document)-[:ContainsDocSection]->(s:Section)-[:ContainsSectionChunk]->(c:Chunk)
+WHERE c.id = e.id
+""" + _RETURN)
+
+# $fetch candidates come back from the index before the title filter; the
+# caller raises it until k rows survive (see `_filtered_hnsw_rows`).
+SEMANTIC_SEARCH_BY_DOC = statement("semantic_search_by_doc", f"""
+CALL QUERY_VECTOR_INDEX('{INDEX_TBL}', '{INDEX_NAME}', $vec, $fetch, efs := $efs)
+WITH node AS e, distance
+MATCH (d:Document)-[:ContainsDocSection]->(s:Section)-[:ContainsSectionChunk]->(c:Chunk)
+WHERE c.id = e.id AND d.title = $t
+""" + _RETURN)
+
+# Exact engine: the matrix scan yields chunk ids and distances, the graph
+# supplies the context columns.
+_CHUNK_CONTEXT = statement("semantic_chunk_context", """
+MATCH (d:Document)-[:ContainsDocSection]->(s:Section)-[:ContainsSectionChunk]->(c:Chunk)
+WHERE c.id IN $ids
+RETURN d.id AS document_id, d.title AS document, s.id AS section_id, s.title AS section,
+       c.id AS chunk_id, c.ord AS chunk_ord, c.text AS text
+""")
+
+# Only chunks with an embedding: pending ones can never be returned, so they
+# must not count towards the document's share or the exact fallback.
+_DOC_CHUNK_IDS = statement("semantic_doc_chunk_ids", """
+MATCH (d:Document {title: $t})-[:ContainsDocSection]->(:Section)-[:ContainsSectionChunk]->(c:Chunk)
+WHERE c.embedded_at IS NOT NULL
+RETURN c.id
+""")
+
+_EMBEDDING_PAGE = statement("semantic_embedding_page", f"""
+MATCH (e:{INDEX_TBL})
+WHERE e.id > $after
+RETURN e.id, e.{INDEX_COL}
+ORDER BY e.id
+LIMIT $lim
+""")
+
+# Columns of every semantic search result, in order.
+COLUMNS = ["document_id", "document", "section_id", "section", "chunk_id", "chunk_ord", "text", "distance"]
+
+Engine = Literal["exact", "hnsw", "quantized", "auto"]
+
+
+def decode_vector(data: bytes | str) -> np.ndarray:
+    """Decode a query vector sent as little-endian float32 bytes.
+
+    `data` is either the raw bytes or their base64 text. The result is a
+    read-only view over the decoded buffer (no per-element conversion), and
+    the dimension is checked once, from the byte length.
+
+    Args:
+        data (bytes | str): `DIM * 4` bytes, or base64 of them.
+
+    Raises:
+        ValueError: On invalid base64 or a wrong byte length.
+
+    Returns:
+        np.ndarray: Shape `(DIM,)`, dtype `<f4`.
+    """
+    if isinstance(data, str):
+        try:
+            data = base64.b64decode(data, validate=True)
+        except binascii.Error as e:
+            raise ValueError("vector_b64 is not valid base64") from e
+    if len(data) != DIM * 4:
+        raise ValueError(f"vector must be {DIM} float32 values ({DIM * 4} bytes), got {len(data)} bytes")
+    return np.frombuffer(data, dtype="<f4")
+
+
+def encode_vector(vector: Any) -> str:
+    """Base64 of `vector` as little-endian float32, the inverse of `decode_vector`."""
+    return base64.b64encode(np.asarray(vector, dtype="<f4").tobytes()).decode("ascii")
+
+
+# Query vectors are rounded to this many decimals before hashing, so repeats of
+# the same embedding hit the cache despite float noise in the last bits.
+CACHE_DECIMALS = 4
+
+_cache = LRUCache(settings.semantic_cache_size, settings.semantic_cache_ttl)
+
+
+def cache_key(
+    vector: Any,
+    k: int,
+    efs: int,
+    doc_title: str | None,
+    engine: Engine = "hnsw",
+) -> tuple[str, int, int, str | None, str]:
+    """Cache key for a semantic query: quantized-vector digest plus k/efs/doc/engine."""
+    q = np.round(np.asarray(vector, dtype=np.float32), CACHE_DECIMALS) + 0.0  # +0.0 folds -0.0
+    digest = hashlib.blake2b(q.tobytes(), digest_size=16).hexdigest()
+    return digest, int(k), int(efs), doc_title, engine
+
+
+def cache_stats() -> dict[str, Any]:
+    """Hit/miss/eviction counters of the semantic search cache."""
+    return _cache.stats()
 
 
 def _one_hot(i: int, dim: int = DIM) -> list[float]:
@@ -26,79 +165,390 @@ def _one_hot(i: int, dim: int = DIM) -> list[float]:
     return v
 
 
-def semantic_search(
+_store: ExactStore | None = None
+_store_path: str | None = None
+_quantized: QuantizedStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_exact_store() -> ExactStore:
+    """Process-wide memory-mapped copy of `ChunkEmbedding`, for the exact engine.
+
+    Loaded on first use; if its row count disagrees with the table (first
+    run, or written by an older build) it is rebuilt from the table.
+    `write_embeddings` keeps it in step afterwards.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            store = ExactStore(exact_store_path(), DIM)
+            store.load()
+            if _embedding_count() != len(store):
+                rebuild_exact_store(store)
+            _store = store
+        return _store
+
+
+def use_exact_store(path: str | None) -> None:
+    """Serve the exact and quantized engines from the store at `path` (None:
+    the configured one); the current stores are dropped and reload lazily.
+    Read replicas (app.replica) call this with each snapshot's copy.
+    """
+    global _store, _store_path, _quantized
+    with _store_lock:
+        _store_path = path
+        _store = None
+        _quantized = None
+
+
+def exact_store_path() -> str:
+    """Directory of the exact store in use."""
+    return _store_path or settings.exact_store_path or settings.kuzu_db_path + ".vectors"
+
+
+def rebuild_exact_store(store: ExactStore | None = None, page: int = 4096) -> int:
+    """Reload the exact store from `ChunkEmbedding`, `page` rows at a time.
+
+    Returns:
+        int: Rows in the store.
+    """
+    if store is None:
+        store = get_exact_store()
+    parts: list[tuple[np.ndarray, np.ndarray]] = []
+    after = -1
+    with connection() as conn:
+        while True:
+            rows = query(conn, _EMBEDDING_PAGE, {"after": after, "lim": page}).rows
+            if not rows:
+                break
+            ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+            parts.append((ids, np.asarray([r[1] for r in rows], dtype=np.float32)))
+            after = int(ids[-1])
+    store.replace(parts)
+    return len(store)
+
+
+def choose_engine(engine: Engine, candidates: int) -> Literal["exact", "hnsw", "quantized"]:
+    """Resolve "auto": scan exactly while the candidate set is small.
+
+    Below `EXACT_MAX_CANDIDATES` vectors a full scan is about as fast as an
+    HNSW query and returns the true nearest neighbours; with a document
+    filter it also avoids HNSW dropping matches that fall outside the beam.
+    """
+    if engine != "auto":
+        return engine
+    return "exact" if candidates <= settings.exact_max_candidates else "hnsw"
+
+
+def get_quantized_store() -> QuantizedStore:
+    """Process-wide `QUANTIZED_KIND` codes over the exact store, built on first use.
+
+    The codes follow the exact store (re-encoded after each write); only
+    they stay in memory, and rescoring reads float32 rows from the mapping.
+    """
+    global _quantized
+    store = get_exact_store()
+    with _store_lock:
+        if _quantized is None:
+            _quantized = QuantizedStore(store, settings.quantized_kind, settings.pq_subvectors)
+            _quantized.build()
+        return _quantized
+
+
+def quantized_status(queries: int = 50, k: int = 10, seed: int = 0) -> dict[str, Any]:
+    """Memory per vector of the quantized store and its recall@k against float32.
+
+    Queries are stored vectors plus Gaussian noise, so they resemble real
+    embeddings without needing a model.
+
+    Returns:
+        dict[str, Any]: `QuantizedStore.stats()` plus `k`, `rescore` (depth
+        used by the "quantized" engine), `recall_at_k` (codes only) and
+        `recall_at_k_rescored`.
+    """
+    qstore = get_quantized_store()
+    ids = qstore.exact.view().ids
+    rng = np.random.default_rng(seed)
+    picks = np.sort(rng.choice(len(ids), min(queries, len(ids)), replace=False))
+    qs = qstore.exact.vectors(ids[picks]) + rng.normal(0.0, 0.02, (len(picks), DIM)).astype(np.float32)
+    depth = _rescore_depth(k)
+    return {
+        **qstore.stats(),
+        "k": k,
+        "rescore": depth,
+        "recall_at_k": round(recall_at_k(qstore, qs, k), 4),
+        "recall_at_k_rescored": round(recall_at_k(qstore, qs, k, depth), 4),
+    }
+
+
+def _rescore_depth(k: int) -> int:
+    return max(int(k) * settings.quantized_rescore, int(k))
+
+
+def _context_rows(ids: np.ndarray, dist: np.ndarray) -> Rows:
+    """Result rows for chunk ids ranked outside Kùzu, in the given order."""
+    if not len(ids):
+        # An empty list binds as STRING[] and would fail against Chunk.id.
+        return Rows(columns=list(COLUMNS), rows=[])
+    with connection() as conn:
+        ctx = query(conn, _CHUNK_CONTEXT, {"ids": ids.tolist()})
+    at = ctx.columns.index("chunk_id")
+    by_id = {r[at]: r for r in ctx.rows}
+    return Rows(
+        columns=list(COLUMNS),
+        rows=[[*by_id[i], d] for i, d in zip(ids.tolist(), dist.tolist()) if i in by_id],
+    )
+
+
+def _exact_search_rows(
+    store: ExactStore,
+    vector: Sequence[float] | np.ndarray,
+    k: int,
+    allowed: np.ndarray | None,
+) -> Rows:
+    return _context_rows(*store.search(np.asarray(vector, dtype=np.float32), k, allowed))
+
+
+def _embedding_count() -> int:
+    with connection() as conn:
+        return int(execute_all(conn, _COUNT_EMBEDDINGS, name="count_embeddings").rows[0][0])
+
+
+def _doc_chunk_ids(doc_title: str) -> np.ndarray:
+    with connection() as conn:
+        return np.asarray(query(conn, _DOC_CHUNK_IDS, {"t": doc_title}).column("c.id"), dtype=np.int64)
+
+
+def _filtered_hnsw_rows(
     vector: list[float],
+    k: int,
+    efs: int,
+    doc_title: str,
+    want: int,
+    total: int,
+) -> tuple[Rows, int, int]:
+    """HNSW search restricted to one document, over-fetching until k rows survive.
+
+    The index returns the global nearest neighbours and the document filter
+    runs afterwards, so each round asks for `SEMANTIC_OVERFETCH` times more
+    candidates than the last, up to `SEMANTIC_FILTER_ROUNDS` rounds or every
+    stored vector.
+
+    Returns:
+        tuple[Rows, int, int]: Rows (at most k), candidates fetched from the
+        index over all rounds, and rounds run.
+    """
+    factor = max(int(settings.semantic_overfetch), 2)
+    scanned = 0
+    rounds = 0
+    while True:
+        rounds += 1
+        params = {"vec": vector, "k": int(k), "fetch": want, "efs": max(int(efs), want), "t": doc_title}
+        with connection() as conn:
+            rows = query(conn, SEMANTIC_SEARCH_BY_DOC, params)
+        scanned += want
+        if len(rows) >= k or want >= total or rounds >= settings.semantic_filter_rounds:
+            return rows, scanned, rounds
+        want = min(want * factor, total)
+
+
+def _first_fetch(k: int, in_doc: int, total: int) -> int | None:
+    """Candidates for the first filtered HNSW round, or None to scan instead.
+
+    A document holding `in_doc` of `total` vectors needs about
+    `k * total / in_doc` global neighbours for k of its own to show up; ask
+    for twice that. If even the last allowed round would be smaller, the
+    filter is too selective for the index and the caller scans the document.
+    """
+    factor = max(int(settings.semantic_overfetch), 2)
+    want = max(k * factor, -(-2 * k * total // max(in_doc, 1)))
+    if want > k * factor ** max(int(settings.semantic_filter_rounds), 1):
+        return None
+    return min(want, max(total, k))
+
+
+def semantic_search_with_stats(
+    vector: Sequence[float] | np.ndarray,
     k: int = 5,
     efs: int = 200,
     doc_title: str | None = None,
-) -> list[dict[str, Any]]:
-    """Perform a semantic search over chunks using the provided vector."""
+    engine: Engine = "hnsw",
+) -> tuple[Rows, dict[str, Any]]:
+    """Perform a semantic search over chunks and report how it was answered.
+
+    With `doc_title` on the HNSW path, the first fetch is sized from the
+    document's share of the vectors and grown in rounds (`_first_fetch`,
+    `_filtered_hnsw_rows`). If that would take too many candidates, or
+    still yields fewer than `k` rows while the document has more chunks,
+    the document's vectors are scanned exactly instead. A filtered query
+    thus returns k rows whenever k exist.
+
+    Results are cached per (quantized vector, k, efs, doc, engine) until the
+    next data write or the TTL; the returned Rows may be shared and must not
+    be mutated.
+
+    Args:
+        vector (Sequence[float] | np.ndarray): Query embedding (length DIM).
+        k (int, optional): Rows to return. Defaults to 5.
+        efs (int, optional): HNSW beam width. Defaults to 200.
+        doc_title (str | None, optional): Restrict to one document.
+        engine (Engine, optional): "hnsw" (vector index), "exact" (scan of
+            the memory-mapped matrix), "quantized" (scan of the compressed
+            codes, top `k * QUANTIZED_RESCORE` re-scored from float32) or
+            "auto" (see `choose_engine`). Defaults to "hnsw".
+
+    Raises:
+        ValueError: If the vector has the wrong length.
+
+    Returns:
+        tuple[Rows, dict[str, Any]]: Context columns plus `distance`
+        (cosine), nearest first; and `engine` (the one applied),
+        `candidates` (vectors fetched from the index or scored by the scan),
+        `rounds` (index queries) and `fallback` ("exact" or None).
+    """
 
     if len(vector) != DIM:
         raise ValueError(f"vector must be of length {DIM}, got {len(vector)}")
 
-    params: dict[str, Any] = {"vec": vector, "k": int(k), "efs": int(efs)}
-    where = ""
-    if doc_title is not None:
-        where = "WHERE d.title = $t"
-        params["t"] = doc_title
-
-    q = f"""
-    CALL QUERY_VECTOR_INDEX('Chunk', '{INDEX_NAME}', $vec, $k, efs := $efs)
-    WITH node AS c, distance
-    MATCH (d:Document)-[:ContainsDocSection]->(s:Section)-[:ContainsSectionChunk]->(c)
-    {where}
-     RETURN
-        d.id    AS document_id,
-        d.title AS document,
-        s.id    AS section_id,
-        s.title AS section,
-        c.id    AS chunk_id,
-        c.ord   AS chunk_ord,
-        c.text  AS text,
-        distance AS distance
-    ORDER BY distance
-    LIMIT $k
-    """
-
-    res = _as_qr(get_conn().execute(q, params))
-    out: list[dict[str, Any]] = []
-
-    while res.has_next():
-        row = res.get_next()
-        if isinstance(row, Mapping):
-            out.append({
-                "document_id": row["document_id"],
-                "document":    row["document"],
-                "section_id":  row["section_id"],
-                "section":     row["section"],
-                "chunk_id":    row["chunk_id"],
-                "chunk_ord":   row["chunk_ord"],
-                "text":        row["text"],
-                "distance":    row["distance"],
-            })
+    key = cache_key(vector, k, efs, doc_title, engine)
+    hit = _cache.get(key)
+    if hit is not None:
+        return hit
+
+    gen = generation()
+    with tracer.start_as_current_span("kuzu.semantic_search") as span:
+        # The filtered HNSW path only needs the store if it falls back to a scan.
+        store = get_exact_store() if engine != "hnsw" else None
+        allowed = None
+        applied: Literal["exact", "hnsw", "quantized"] = "hnsw"
+        if engine != "hnsw":
+            allowed = _doc_chunk_ids(doc_title) if doc_title is not None else None
+            applied = choose_engine(engine, len(store) if allowed is None else len(allowed))
+
+        info: dict[str, Any] = {"engine": applied, "candidates": 0, "rounds": 0, "fallback": None}
+        if applied == "exact":
+            rows = _exact_search_rows(store, vector, k, allowed)
+            info["candidates"] = len(store) if allowed is None else len(allowed)
+        elif applied == "quantized":
+            ids, dist, scored = get_quantized_store().search(
+                np.asarray(vector, dtype=np.float32), k, _rescore_depth(k), allowed,
+            )
+            rows = _context_rows(ids, dist)
+            info["candidates"] = scored
         else:
-            seq = cast(Sequence[Any], row)
-            out.append({
-                "document_id": seq[0],
-                "document":    seq[1],
-                "section_id":  seq[2],
-                "section":     seq[3],
-                "chunk_id":    seq[4],
-                "chunk_ord":   seq[5],
-                "text":        seq[6],
-                "distance":    seq[7],
-            })
+            if isinstance(vector, np.ndarray):
+                vector = vector.tolist()
+            if doc_title is None:
+                with connection() as conn:
+                    rows = query(conn, SEMANTIC_SEARCH, {"vec": vector, "k": int(k), "efs": int(efs)})
+                info.update(candidates=int(k), rounds=1)
+            else:
+                if allowed is None:
+                    allowed = _doc_chunk_ids(doc_title)
+                total = _embedding_count()
+                want = _first_fetch(k, len(allowed), total)
+                rows = Rows(columns=list(COLUMNS), rows=[])
+                if want is not None:
+                    rows, scanned, rounds = _filtered_hnsw_rows(vector, k, efs, doc_title, want, total)
+                    info.update(candidates=scanned, rounds=rounds)
+                if len(rows) < k and len(allowed) > len(rows):
+                    rows = _exact_search_rows(get_exact_store(), vector, k, allowed)
+                    info["candidates"] += len(allowed)
+                    info["fallback"] = "exact"
+
+        span.set_attribute("semantic.engine", applied)
+        span.set_attribute("semantic.candidates", info["candidates"])
+        span.set_attribute("semantic.rounds", info["rounds"])
+        if info["fallback"]:
+            span.set_attribute("semantic.fallback", info["fallback"])
+    _cache.put(key, (rows, info), gen)
+    return rows, info
+
+
+def semantic_search_rows(
+    vector: Sequence[float] | np.ndarray,
+    k: int = 5,
+    efs: int = 200,
+    doc_title: str | None = None,
+    engine: Engine = "hnsw",
+) -> Rows:
+    """Same as `semantic_search_with_stats`, without the stats."""
+    return semantic_search_with_stats(vector, k, efs, doc_title, engine)[0]
+
+
+def semantic_search_many(
+    queries: Sequence[Mapping[str, Any]],
+) -> tuple[list[tuple[Rows, float, dict[str, Any]]], dict[str, Any]]:
+    """Run several semantic searches in parallel over pooled connections.
+
+    Every vector is validated before any query runs.
+
+    Args:
+        queries (Sequence[Mapping[str, Any]]): `semantic_search_with_stats` keyword
+            arguments per query (`vector`, `k`, `efs`, `doc_title`, `engine`).
+
+    Raises:
+        ValueError: If any vector has the wrong length.
+
+    Returns:
+        tuple[list[tuple[Rows, float, dict[str, Any]]], dict[str, Any]]:
+        `(rows, elapsed_ms, stats)` per query in input order, and aggregate
+        timings: `queries`,
+        `total_ms` (wall clock), `sum_query_ms`, `max_query_ms`.
+    """
+    for i, q in enumerate(queries):
+        if len(q["vector"]) != DIM:
+            raise ValueError(f"queries[{i}]: vector must be of length {DIM}, got {len(q['vector'])}")
+
+    def one(q: Mapping[str, Any]) -> tuple[Rows, float, dict[str, Any]]:
+        t = time.perf_counter()
+        rows, stats = semantic_search_with_stats(**q)
+        return rows, (time.perf_counter() - t) * 1000.0, stats
 
-    return out
+    with tracer.start_as_current_span("kuzu.semantic_search_many") as span:
+        span.set_attribute("semantic.queries", len(queries))
+        t0 = time.perf_counter()
+        futures = [submit(one, q) for q in queries]
+        results = [f.result() for f in futures]
+        total = (time.perf_counter() - t0) * 1000.0
+
+    elapsed = [ms for _, ms, _ in results]
+    return results, {
+        "queries": len(results),
+        "total_ms": round(total, 3),
+        "sum_query_ms": round(sum(elapsed), 3),
+        "max_query_ms": round(max(elapsed, default=0.0), 3),
+    }
+
+
+def semantic_search(
+    vector: Sequence[float] | np.ndarray,
+    k: int = 5,
+    efs: int = 200,
+    doc_title: str | None = None,
+    engine: Engine = "hnsw",
+) -> list[dict[str, Any]]:
+    """Same as `semantic_search_rows`, as a list of dicts."""
+    return semantic_search_rows(vector=vector, k=k, efs=efs, doc_title=doc_title, engine=engine).records()
+
+
+def vector_index_exists(conn: Connection) -> bool:
+    """Whether `chunk_embedding_idx` exists on the embedding table."""
+    rows = execute_all(conn, "CALL SHOW_INDEXES() RETURN *", name="show_indexes").rows
+    return any(r[0] == INDEX_TBL and r[1] == INDEX_NAME for r in rows)
 
 
 def drop_vector_index_if_exists(conn: Connection) -> None:
-    try:
+    """
+    Drop the vector index if it exists.
+    Kùzu 0.11 rejects later inserts into a table whose index was dropped, so
+    only call this right before dropping the table itself (see `_rewrite`).
+    """
+    if vector_index_exists(conn):
         # note: no trailing semicolon
-        conn.execute(f"CALL DROP_VECTOR_INDEX('{INDEX_TBL}', '{INDEX_NAME}');")
-    except Exception:
-        pass
+        execute(conn, f"CALL DROP_VECTOR_INDEX('{INDEX_TBL}', '{INDEX_NAME}')", name="drop_vector_index")
+    # Prepared searches are bound to the dropped index.
+    invalidate(SEMANTIC_SEARCH, SEMANTIC_SEARCH_BY_DOC)
 
 
 def create_vector_index(conn: Connection) -> None:
@@ -106,6 +556,307 @@ def create_vector_index(conn: Connection) -> None:
     Create the vector index if it does not exist.
     """
     try:
-        conn.execute(f"CALL CREATE_VECTOR_INDEX('{INDEX_TBL}', '{INDEX_NAME}', '{INDEX_COL}', metric := 'cosine');")
+        execute(
+            conn,
+            f"CALL CREATE_VECTOR_INDEX('{INDEX_TBL}', '{INDEX_NAME}', '{INDEX_COL}', metric := 'cosine');",
+            name="create_vector_index",
+        )
+    except Exception:
+        pass  # index already exists
+
+
+def as_batch(ids: Any, vectors: Any) -> tuple[np.ndarray, np.ndarray]:
+    """Normalise one `(chunk ids, vectors)` batch for `write_embeddings`.
+
+    Args:
+        ids (Any): 1-D array-like of chunk ids.
+        vectors (Any): 2-D array-like of shape `(len(ids), DIM)`.
+
+    Raises:
+        ValueError: On shape mismatches.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Contiguous int64 ids and float32 vectors
+        (no copy when the inputs already are).
+    """
+    ids = np.ascontiguousarray(ids, dtype=np.int64)
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if ids.ndim != 1:
+        raise ValueError(f"ids must be 1-D, got shape {ids.shape}")
+    if vectors.ndim != 2 or vectors.shape[1] != DIM:
+        raise ValueError(f"vectors must have shape (n, {DIM}), got {vectors.shape}")
+    if len(ids) != len(vectors):
+        raise ValueError(f"{len(ids)} ids but {len(vectors)} vectors")
+    return ids, vectors
+
+
+_COUNT_CHUNKS = statement("embedding_count_chunks", """
+UNWIND $ids AS i
+MATCH (c:Chunk {id: i})
+RETURN count(c)
+""")
+
+_DELETE_EMBEDDINGS = statement("embedding_delete", f"""
+UNWIND $ids AS i
+MATCH (e:{INDEX_TBL} {{id: i}})
+DELETE e
+""")
+
+_MARK_EMBEDDED = statement("embedding_mark", """
+UNWIND $ids AS i
+MATCH (c:Chunk {id: i})
+SET c.embedded_at = $at
+""")
+
+_PENDING_CHUNKS = statement("embedding_pending", """
+MATCH (c:Chunk)
+WHERE c.embedded_at IS NULL AND c.id > $after
+RETURN c.id AS chunk_id, c.text AS text
+ORDER BY c.id
+LIMIT $lim
+""")
+
+_FRESHNESS = statement("embedding_freshness", """
+MATCH (c:Chunk)
+RETURN count(c) AS chunks,
+       count(c.embedded_at) AS embedded,
+       max(c.embedded_at) AS last_embedded_at
+""")
+
+Mode = Literal["auto", "incremental", "rebuild"]
+
+# Outcome of the most recent jobs in this process, for `index_status`.
+_jobs_lock = threading.Lock()
+_jobs: dict[str, Any] = {
+    "rebuilds": 0,
+    "incremental_jobs": 0,
+    "last_rebuild_seconds": None,
+    "last_rebuild_at": None,
+    "last_job": None,
+}
+
+
+def _copy_files(conn: Connection, files: list[tuple[str, str]]) -> None:
+    for ids_path, vec_path in files:
+        execute(conn, f"COPY {INDEX_TBL} FROM ('{ids_path}', '{vec_path}') BY COLUMN", name="copy_embeddings")
+
+
+def _mark(conn: Connection, ids: np.ndarray) -> None:
+    run(conn, _MARK_EMBEDDED, {"ids": ids.tolist(), "at": datetime.now(timezone.utc)})
+
+
+def _rewrite(conn: Connection, tmp: str, files: list[tuple[str, str]], ids: np.ndarray) -> None:
+    """Recreate the embedding table with the old rows plus `files`, in one transaction.
+
+    The table is dropped rather than updated because Kùzu 0.11 neither updates
+    an indexed column in place nor accepts inserts once its index is dropped.
+    On rollback the old table and index come back unchanged.
+    """
+    keep = os.path.join(tmp, "keep.parquet")
+    kept = execute_all(conn, _COUNT_EMBEDDINGS, name="count_embeddings").rows[0][0]
+    if kept:
+        execute(
+            conn,
+            f"COPY (MATCH (e:{INDEX_TBL}) RETURN e.id AS id, e.{INDEX_COL} AS {INDEX_COL}) TO '{keep}'",
+            name="export_embeddings",
+        )
+
+    execute(conn, "BEGIN TRANSACTION;")
+    try:
+        drop_vector_index_if_exists(conn)
+        execute(conn, f"DROP TABLE {INDEX_TBL}", name="drop_embedding_table")
+        execute(conn, EMBEDDING_DDL, name="create_embedding_table")
+        if kept:
+            execute(conn, f"COPY {INDEX_TBL} FROM '{keep}'", name="import_embeddings")
+            # Rows being replaced; the ids cross the binding as plain ints.
+            run(conn, _DELETE_EMBEDDINGS, {"ids": ids.tolist()})
+        _copy_files(conn, files)
+        _mark(conn, ids)
     except Exception:
-        pass  # index already exists
\ No newline at end of file
+        execute(conn, "ROLLBACK;")
+        raise
+    execute(conn, "COMMIT;")
+    # These statements were planned against the dropped table.
+    invalidate(_DELETE_EMBEDDINGS, _EMBEDDING_PAGE)
+
+
+def _insert(conn: Connection, files: list[tuple[str, str]], ids: np.ndarray) -> None:
+    """Replace the job's rows in place; Kùzu adds them to the live index."""
+    execute(conn, "BEGIN TRANSACTION;")
+    try:
+        run(conn, _DELETE_EMBEDDINGS, {"ids": ids.tolist()})
+        _copy_files(conn, files)
+        _mark(conn, ids)
+    except Exception:
+        execute(conn, "ROLLBACK;")
+        raise
+    execute(conn, "COMMIT;")
+
+
+def _choose(conn: Connection, rows: int, mode: Mode) -> Literal["incremental", "rebuild"]:
+    if mode != "auto":
+        return mode
+    if not vector_index_exists(conn):
+        return "rebuild"
+    indexed = execute_all(conn, _COUNT_EMBEDDINGS, name="count_embeddings").rows[0][0]
+    # Per row, inserting into a live HNSW graph costs a few times more than
+    # building it in one pass, so large jobs are cheaper as a rebuild.
+    return "rebuild" if rows > settings.embedding_rebuild_ratio * indexed else "incremental"
+
+
+def write_embeddings(batches: Iterable[tuple[Any, Any]], mode: Mode = "auto") -> dict[str, Any]:
+    """Write chunk embeddings from NumPy batches.
+
+    Every batch is spilled to `.npy` files and bulk-loaded with
+    `COPY ... BY COLUMN`, so vectors never go through per-row Cypher
+    parameters. All batches land in one transaction; chunks that already
+    had an embedding get the new one, and `Chunk.embedded_at` is set.
+
+    The index is maintained in one of two ways:
+    "incremental" inserts into the live HNSW index; "rebuild" recreates the
+    table and builds the index once for all rows. "auto" rebuilds only when
+    there is no index yet or the job exceeds `EMBEDDING_REBUILD_RATIO` of
+    the rows already indexed.
+
+    Args:
+        batches (Iterable[tuple[Any, Any]]): `(chunk_ids, vectors)` pairs,
+            see `as_batch`.
+        mode (Mode, optional): "auto", "incremental" or "rebuild". Defaults to "auto".
+
+    Raises:
+        ValueError: On bad shapes, duplicate ids, or ids with no Chunk.
+
+    Returns:
+        dict[str, Any]: `rows`, `batches`, `mode` (the one applied),
+        `write_seconds`, `index_seconds`, `rows_per_sec` (write + index).
+    """
+    with tracer.start_as_current_span("kuzu.write_embeddings") as span, \
+            tempfile.TemporaryDirectory(prefix="embeddings-") as tmp:
+        files: list[tuple[str, str]] = []
+        parts: list[np.ndarray] = []
+        for n, (ids, vectors) in enumerate(batches):
+            ids, vectors = as_batch(ids, vectors)
+            if not len(ids):
+                continue
+            paths = (os.path.join(tmp, f"ids-{n}.npy"), os.path.join(tmp, f"vec-{n}.npy"))
+            np.save(paths[0], ids)
+            np.save(paths[1], vectors)
+            files.append(paths)
+            parts.append(ids)
+
+        all_ids = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        if np.unique(all_ids).size != all_ids.size:
+            raise ValueError("duplicate chunk ids in embedding batches")
+
+        t0 = time.perf_counter()
+        with connection() as conn:
+            if len(all_ids):
+                found = run(conn, _COUNT_CHUNKS, {"ids": all_ids.tolist()}).get_all()[0][0]
+                if found != len(all_ids):
+                    raise ValueError(f"{len(all_ids) - found} ids do not belong to any Chunk")
+            applied = _choose(conn, len(all_ids), mode)
+            if applied == "rebuild":
+                if len(all_ids):
+                    _rewrite(conn, tmp, files, all_ids)
+                t1 = time.perf_counter()
+                create_vector_index(conn)
+            else:
+                if len(all_ids):
+                    _insert(conn, files, all_ids)
+                t1 = time.perf_counter()
+        t2 = time.perf_counter()
+        if len(all_ids):
+            # Mirror the committed rows into the exact store while the
+            # spilled batches still exist.
+            get_exact_store().upsert(all_ids, (np.load(v, mmap_mode="r") for _, v in files))
+
+        span.set_attribute("embeddings.rows", int(all_ids.size))
+        span.set_attribute("embeddings.batches", len(files))
+        span.set_attribute("embeddings.mode", applied)
+
+    bump_generation()
+    total = t2 - t0
+    job = {
+        "rows": int(all_ids.size),
+        "batches": len(files),
+        "mode": applied,
+        "write_seconds": round(t1 - t0, 4),
+        "index_seconds": round(t2 - t1, 4),
+        "rows_per_sec": round(all_ids.size / total, 1) if total > 0 else 0.0,
+    }
+    with _jobs_lock:
+        _jobs["last_job"] = job
+        if applied == "rebuild":
+            _jobs["rebuilds"] += 1
+            _jobs["last_rebuild_seconds"] = round(total, 4)
+            _jobs["last_rebuild_at"] = datetime.now(timezone.utc).isoformat()
+        else:
+            _jobs["incremental_jobs"] += 1
+    return job
+
+
+def pending_chunk_rows(limit: int = 1000, after: int = -1) -> Rows:
+    """Chunks that have no embedding yet, by id, for an embedder to pick up.
+
+    Args:
+        limit (int, optional): Max rows. Defaults to 1000.
+        after (int, optional): Only ids greater than this (keyset). Defaults to -1.
+
+    Returns:
+        Rows: `chunk_id`, `text`.
+    """
+    with connection() as conn:
+        return query(conn, _PENDING_CHUNKS, {"after": int(after), "lim": int(limit)})
+
+
+def write_dummy_embeddings(batch_size: int = 4096, pending_only: bool = False, mode: Mode = "auto") -> dict[str, Any]:
+    """One-hot embedding per chunk (index = `ord % DIM`) through `write_embeddings`.
+
+    Dev helper behind `/debug/set_dummy_embeddings`.
+
+    Returns:
+        dict[str, Any]: `updated` plus the writer stats.
+    """
+    where = "WHERE c.embedded_at IS NULL" if pending_only else ""
+    with connection() as conn:
+        rows = execute_all(conn, f"""
+            MATCH (d:Document)-[:ContainsDocSection]->(s:Section)-[:ContainsSectionChunk]->(c:Chunk)
+            {where}
+            RETURN c.id AS id, c.ord AS ord
+            ORDER BY id
+        """, name="dummy_embedding_chunks")
+
+    ids = np.asarray(rows.column("id"), dtype=np.int64)
+    ords = np.asarray(rows.column("ord"), dtype=np.int64)
+    vectors = np.zeros((len(ids), DIM), dtype=np.float32)
+    vectors[np.arange(len(ids)), ords % DIM] = 1.0
+
+    batches = ((ids[i:i + batch_size], vectors[i:i + batch_size]) for i in range(0, len(ids), batch_size))
+    stats = write_embeddings(batches, mode=mode)
+    return {"updated": stats["rows"], **stats}
+
+
+def index_status() -> dict[str, Any]:
+    """Freshness of the vector index and the last embedding jobs in this process.
+
+    Returns:
+        dict[str, Any]: `index_exists`, `chunks`, `embedded`, `pending`,
+        `freshness` (embedded / chunks), `last_embedded_at`, plus `rebuilds`,
+        `incremental_jobs`, `last_rebuild_seconds`, `last_rebuild_at`, `last_job`,
+        and `exact_store` (None until the exact engine is first used).
+    """
+    with connection() as conn:
+        chunks, embedded, last = query(conn, _FRESHNESS).rows[0]
+        exists = vector_index_exists(conn)
+    with _jobs_lock:
+        jobs = dict(_jobs)
+    return {
+        "index_exists": exists,
+        "chunks": chunks,
+        "embedded": embedded,
+        "pending": chunks - embedded,
+        "freshness": round(embedded / chunks, 4) if chunks else 1.0,
+        "last_embedded_at": last.isoformat() if last is not None else None,
+        **jobs,
+        "exact_store": _store.stats() if _store is not None else None,
+    }
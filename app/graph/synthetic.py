@@ -0,0 +1,180 @@
+from __future__ import annotations
+from functools import lru_cache
+from typing import Any, Iterator
+import time
+
+import numpy as np
+
+from app.api.schemas import IngestDocument, IngestSection
+from app.core.tracing import get_tracer
+from app.graph.ingest import ingest_documents
+from app.graph.semantic import DIM, Mode, write_embeddings
+
+tracer = get_tracer(__name__)
+
+# Deterministic synthetic corpora for benchmarks and scale tests.
+#
+# Document `i` of seed `s` depends on nothing else, so a corpus can be grown
+# in steps (`start=`) and two runs with the same arguments produce the same
+# titles, text and vectors. Words are drawn from a Zipf distribution over a
+# generated vocabulary, so full-text queries see a realistic mix of common
+# and rare terms; vectors are a per-document topic direction plus noise, so
+# a document's chunks sit close together as they would with a real model.
+
+_SYLLABLES = [c + v for c in "bdfgklmnprstvz" for v in "aeiou"]
+_TOPICS = 64
+
+
+@lru_cache(maxsize=8)
+def vocabulary(size: int = 5000, seed: int = 0) -> tuple[str, ...]:
+    """`size` distinct pronounceable words, most frequent first.
+
+    Args:
+        size (int, optional): Number of words. Defaults to 5000.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        tuple[str, ...]: Words in Zipf rank order.
+    """
+    rng = np.random.default_rng([seed, 0x766F63])
+    words: dict[str, None] = {}
+    while len(words) < size:
+        n = int(rng.integers(2, 5))
+        words["".join(_SYLLABLES[j] for j in rng.integers(0, len(_SYLLABLES), n))] = None
+    return tuple(words)
+
+
+@lru_cache(maxsize=8)
+def _zipf_cdf(size: int, exponent: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, size + 1) ** exponent
+    return np.cumsum(weights / weights.sum())
+
+
+def _words(rng: np.random.Generator, vocab: tuple[str, ...], n: int, exponent: float) -> list[str]:
+    ranks = np.searchsorted(_zipf_cdf(len(vocab), exponent), rng.random(n))
+    return [vocab[min(r, len(vocab) - 1)] for r in ranks]
+
+
+def synthetic_document(
+    index: int,
+    sections: int = 10,
+    chunks: int = 10,
+    seed: int = 0,
+    words: int = 32,
+    vocab_size: int = 5000,
+    zipf: float = 1.1,
+) -> IngestDocument:
+    """Document `index` of a synthetic corpus.
+
+    Args:
+        index (int): Position in the corpus; also sets the title (`synthetic <index>`).
+        sections (int, optional): Sections per document. Defaults to 10.
+        chunks (int, optional): Chunks per section. Defaults to 10.
+        seed (int, optional): Corpus seed. Defaults to 0.
+        words (int, optional): Mean words per chunk (±50%). Defaults to 32.
+        vocab_size (int, optional): Vocabulary size. Defaults to 5000.
+        zipf (float, optional): Zipf exponent of word frequencies. Defaults to 1.1.
+
+    Returns:
+        IngestDocument: The document, ready for `ingest_documents`.
+    """
+    rng = np.random.default_rng([seed, index])
+    vocab = vocabulary(vocab_size, seed)
+    lo, hi = max(1, words // 2), max(2, words + words // 2)
+    return IngestDocument(
+        title=f"synthetic {index}",
+        sections=[
+            IngestSection(
+                title=" ".join(_words(rng, vocab, 3, zipf)),
+                chunks=[" ".join(_words(rng, vocab, int(rng.integers(lo, hi)), zipf)) for _ in range(chunks)],
+            )
+            for _ in range(sections)
+        ],
+    )
+
+
+def synthetic_corpus(docs: int, start: int = 0, **kw: Any) -> Iterator[IngestDocument]:
+    """Documents `start .. start + docs - 1`; keyword arguments go to `synthetic_document`."""
+    for i in range(start, start + docs):
+        yield synthetic_document(i, **kw)
+
+
+def synthetic_embeddings(index: int, n: int, seed: int = 0, dim: int = DIM, noise: float = 0.5) -> np.ndarray:
+    """Vectors for the `n` chunks of document `index`.
+
+    Each document draws one of 64 topic directions; its chunks are that
+    direction plus Gaussian noise.
+
+    Args:
+        index (int): Document position, as for `synthetic_document`.
+        n (int): Number of chunks.
+        seed (int, optional): Corpus seed. Defaults to 0.
+        dim (int, optional): Dimension. Defaults to DIM.
+        noise (float, optional): Noise scale relative to the topic. Defaults to 0.5.
+
+    Returns:
+        np.ndarray: float32 array of shape (n, dim).
+    """
+    topics = np.random.default_rng([seed, 0x746F70]).standard_normal((_TOPICS, dim)).astype(np.float32)
+    topics /= np.linalg.norm(topics, axis=1, keepdims=True)
+    rng = np.random.default_rng([seed, index, 1])
+    topic = topics[int(rng.integers(0, _TOPICS))]
+    out = topic + (noise / np.sqrt(dim)) * rng.standard_normal((n, dim)).astype(np.float32)
+    return out.astype(np.float32, copy=False)
+
+
+def synthetic_queries(n: int, seed: int = 0, vocab_size: int = 5000, zipf: float = 1.1) -> list[str]:
+    """`n` one- or two-word text queries drawn like the corpus text."""
+    rng = np.random.default_rng([seed, 0x717279])
+    vocab = vocabulary(vocab_size, seed)
+    return [" ".join(_words(rng, vocab, int(rng.integers(1, 3)), zipf)) for _ in range(n)]
+
+
+def load_synthetic(
+    docs: int,
+    start: int = 0,
+    seed: int = 0,
+    embed: bool = True,
+    batch_docs: int = 64,
+    mode: Mode = "auto",
+    **kw: Any,
+) -> dict[str, Any]:
+    """Ingest documents `start .. start + docs - 1` and (optionally) their embeddings.
+
+    Documents are written `batch_docs` per `ingest_documents` transaction;
+    all embeddings go through one `write_embeddings` job.
+
+    Args:
+        docs (int): Number of documents.
+        start (int, optional): First document index. Defaults to 0.
+        seed (int, optional): Corpus seed. Defaults to 0.
+        embed (bool, optional): Also write embeddings. Defaults to True.
+        batch_docs (int, optional): Documents per ingest transaction. Defaults to 64.
+        mode (Mode, optional): `write_embeddings` mode. Defaults to "auto".
+        **kw: `synthetic_document` options (`sections`, `chunks`, `words`, ...).
+
+    Returns:
+        dict[str, Any]: `documents`, `chunks`, `ingest_seconds`, and with
+        `embed`, the `write_embeddings` stats under `embeddings`.
+    """
+    with tracer.start_as_current_span("synthetic.load") as span:
+        span.set_attribute("synthetic.documents", docs)
+        batches: list[tuple[np.ndarray, np.ndarray]] = []
+        n_chunks = 0
+        t0 = time.perf_counter()
+        for at in range(start, start + docs, batch_docs):
+            batch = list(synthetic_corpus(min(batch_docs, start + docs - at), start=at, seed=seed, **kw))
+            for i, res in enumerate(ingest_documents(batch), start=at):
+                ids = np.asarray(res["chunk_ids"], dtype=np.int64)
+                n_chunks += len(ids)
+                if embed and len(ids):
+                    batches.append((ids, synthetic_embeddings(i, len(ids), seed)))
+        out: dict[str, Any] = {
+            "documents": docs,
+            "chunks": n_chunks,
+            "ingest_seconds": round(time.perf_counter() - t0, 4),
+        }
+        if batches:
+            out["embeddings"] = write_embeddings(batches, mode=mode)
+        span.set_attribute("synthetic.chunks", n_chunks)
+        return out
@@ -0,0 +1,524 @@
+"""
+Multi-process serving: one writer process, N read-only worker processes.
+
+    uv run python -m app.replica --workers 4 --port 8000
+
+Kùzu locks a database file against every other process while one has it
+open read-write, so workers cannot share the live file. Instead:
+
+- The writer (this module's `main`) owns `KUZU_DB_PATH` read-write. It runs
+  every write operation (`WRITES`) it receives over a local socket, one at a
+  time, then checkpoints and publishes a snapshot: a copy of the database
+  file plus hard links to the exact store's vector files, under
+  `REPLICA_DIR/v<version>/`, with `REPLICA_DIR/CURRENT` naming the newest.
+  The copy makes every publish cost I/O in proportion to the database size,
+  so writes that arrive within `REPLICA_PUBLISH_DELAY` of each other share
+  one publish.
+- Workers (uvicorn processes with `SERVE_ROLE=replica`) open the newest
+  snapshot read-only and serve `/chunks`, `/search` and `/search/semantic*`
+  from it. Write endpoints call `write()`, which forwards to the writer.
+
+Reader refresh policy: a worker polls `CURRENT` every `REPLICA_REFRESH`
+seconds and moves to a newer snapshot when one appears (in-flight queries
+finish on the old one). The worker that forwarded a write moves to that
+write's snapshot before answering, so a client sees its own writes on the
+next request to the same worker; other workers lag by up to
+`REPLICA_REFRESH`. Each worker leases the version it serves
+(`REPLICA_DIR/readers/<pid>`). The writer keeps the newest `REPLICA_KEEP`
+snapshots, plus any older one a live worker may still read: at or after the
+oldest leased version, or superseded less than `REPLICA_GRACE` seconds ago.
+"""
+from __future__ import annotations
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from typing import Any, Callable, Sequence
+import argparse
+import logging
+import os
+import secrets
+import shutil
+import threading
+import time
+
+import kuzu
+
+from app.api.schemas import IngestDocument
+from app.core.cache import bump_generation
+from app.core.config import settings
+from app.core.kuzu import connection, execute, use_database, write_lock
+from app.core.tracing import get_tracer
+from app.graph.context import relink as relink_chunks
+from app.graph.fulltext import rebuild as rebuild_fulltext
+from app.graph.ingest import ingest_document, ingest_documents
+from app.graph.ingest_queue import IngestQueue, get_ingest_queue, set_ingest_queue
+from app.graph.schema import ensure_extension
+from app.graph.seed import seed_sample
+from app.graph.semantic import exact_store_path, get_exact_store, use_exact_store, write_dummy_embeddings
+
+log = logging.getLogger(__name__)
+tracer = get_tracer(__name__)
+
+_CURRENT = "CURRENT"
+_READERS = "readers"  # one lease file per worker process: the version it serves
+_SOCKET = "writer.sock"
+_KEY = "writer.key"
+
+
+def replica_dir() -> Path:
+    """Snapshot directory (`REPLICA_DIR`, default `<KUZU_DB_PATH>.replicas`)."""
+    return Path(settings.replica_dir or settings.kuzu_db_path + ".replicas")
+
+
+def current_version(root: Path | None = None) -> int:
+    """Newest published snapshot version (0 before the first)."""
+    try:
+        return int(((root or replica_dir()) / _CURRENT).read_text())
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def _snapshot(root: Path, version: int) -> Path:
+    return root / f"v{version:06d}"
+
+
+def _lease(root: Path, version: int) -> None:
+    # Record the version this process serves, for the writer's pruning.
+    (root / _READERS).mkdir(parents=True, exist_ok=True)
+    tmp = root / _READERS / f".{os.getpid()}.tmp"
+    tmp.write_text(str(version))
+    os.replace(tmp, root / _READERS / str(os.getpid()))
+
+
+def _leased(root: Path) -> list[int]:
+    """Versions served by live worker processes; leases of dead ones are removed."""
+    versions = []
+    for f in (root / _READERS).glob("[0-9]*"):
+        try:
+            os.kill(int(f.name), 0)
+        except ProcessLookupError:
+            f.unlink(missing_ok=True)
+            continue
+        except PermissionError:
+            pass  # alive, another user's
+        try:
+            versions.append(int(f.read_text()))
+        except (FileNotFoundError, ValueError):
+            continue
+    return versions
+
+
+def prune(root: Path, keep: int, grace: float) -> list[int]:
+    """Delete old snapshots no worker can still be reading.
+
+    Beyond the newest `keep`, a snapshot goes once no live worker's lease
+    names it or an older version, and the snapshot after it has been
+    published for `grace` seconds (queries started before a worker moved on
+    finish on the old one).
+
+    Returns:
+        list[int]: Versions removed.
+    """
+    snaps = sorted(root.glob("v[0-9]*"))
+    pinned = min(_leased(root), default=None)
+    now = time.time()
+    removed = []
+    for old, newer in zip(snaps[:-max(keep, 1)], snaps[1:]):
+        version = int(old.name[1:])
+        if pinned is not None and version >= pinned:
+            break
+        if now - newer.stat().st_mtime < grace:
+            break
+        shutil.rmtree(old, ignore_errors=True)
+        removed.append(version)
+    return removed
+
+
+# --- write operations --------------------------------------------------------
+
+def _ingest_bulk(docs: Sequence[IngestDocument]) -> dict[str, Any]:
+    items = ingest_documents(docs)
+    return {
+        "count": len(items),
+        "items": items,
+        "chunks_created": sum(r["chunks_created"] for r in items),
+    }
+
+
+def _reindex_text() -> int:
+    with connection() as conn:
+        return rebuild_fulltext(conn)
+
+
+def _relink_chunks() -> int:
+    with connection() as conn:
+        return relink_chunks(conn)
+
+
+# Everything that modifies the database, by name. Replicas send the name and
+# arguments (pickled) to the writer; in a single process they run in place.
+WRITES: dict[str, Callable[..., Any]] = {
+    "seed": seed_sample,
+    "ingest": ingest_document,
+    "ingest_bulk": _ingest_bulk,
+    "dummy_embeddings": write_dummy_embeddings,
+    "reindex_text": _reindex_text,
+    "relink_chunks": _relink_chunks,
+}
+
+
+def _ingest_submit(docs: Sequence[IngestDocument], bulk: bool = False) -> dict[str, Any]:
+    return get_ingest_queue().submit(docs, bulk)
+
+
+def _ingest_job(job_id: str) -> dict[str, Any] | None:
+    return get_ingest_queue().job(job_id)
+
+
+def _ingest_stats() -> dict[str, Any]:
+    return get_ingest_queue().stats()
+
+
+# The ingest queue lives with the database owner; these reach it without
+# writing (the queue's batches publish their own snapshots).
+QUEUE_CALLS: dict[str, Callable[..., Any]] = {
+    "ingest_submit": _ingest_submit,
+    "ingest_job": _ingest_job,
+    "ingest_stats": _ingest_stats,
+}
+
+
+def write(op: str, *args: Any, **kwargs: Any) -> Any:
+    """Run the write operation `op` (see `WRITES` and `QUEUE_CALLS`).
+
+    In a replica it runs on the writer process, and this process serves the
+    resulting snapshot (for a queue call: the newest one) before returning.
+
+    Raises:
+        DocumentExists: For `ingest`/`ingest_bulk` with a taken or repeated title.
+    """
+    if settings.serve_role == "replica":
+        return get_writer_client().call(op, *args, **kwargs)
+    if op in QUEUE_CALLS:
+        return QUEUE_CALLS[op](*args, **kwargs)
+    with write_lock:
+        return WRITES[op](*args, **kwargs)
+
+
+# --- writer ------------------------------------------------------------------
+
+def publish(root: Path | None = None, keep: int | None = None, grace: float | None = None) -> int:
+    """Checkpoint the database and publish it as the next snapshot.
+
+    Call with no write in flight (the writer holds its lock). The database
+    file is copied whole, so a publish costs I/O in proportion to the
+    database size, whatever the write; the writer batches writes into one
+    publish (`WriterServer`).
+
+    Returns:
+        int: The new version.
+    """
+    root = root or replica_dir()
+    keep = settings.replica_keep if keep is None else keep
+    grace = settings.replica_grace if grace is None else grace
+    with tracer.start_as_current_span("replica.publish") as span:
+        root.mkdir(parents=True, exist_ok=True)
+        get_exact_store()  # brings the store files in line with the table
+        with connection() as conn:
+            execute(conn, "CHECKPOINT;")
+        version = current_version(root) + 1
+        tmp = root / f".v{version:06d}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        (tmp / "vectors").mkdir(parents=True)
+        shutil.copyfile(settings.kuzu_db_path, tmp / "db.kuzu")
+        vectors = Path(exact_store_path())
+        for f in vectors.glob("*") if vectors.is_dir() else ():
+            if f.suffix == ".npy":
+                # Store segments are never rewritten (a merge writes a new
+                # file), so a link stays a frozen copy.
+                try:
+                    os.link(f, tmp / "vectors" / f.name)
+                except OSError:  # e.g. EXACT_STORE_PATH on another filesystem
+                    shutil.copyfile(f, tmp / "vectors" / f.name)
+            elif f.is_file() and f.suffix != ".tmp":
+                shutil.copyfile(f, tmp / "vectors" / f.name)
+        os.replace(tmp, _snapshot(root, version))
+        (root / ".CURRENT.tmp").write_text(str(version))
+        os.replace(root / ".CURRENT.tmp", root / _CURRENT)
+        prune(root, keep, grace)
+        span.set_attribute("replica.version", version)
+        span.set_attribute("replica.bytes", os.path.getsize(settings.kuzu_db_path))
+        return version
+
+
+class WriterServer:
+    """
+    Runs forwarded writes one at a time and publishes snapshots of them.
+
+    Publishing is a group commit: a write waits for a snapshot that
+    includes it, and one publish, after `REPLICA_PUBLISH_DELAY`, covers
+    every write applied by then.
+    """
+
+    def __init__(self, root: Path | None = None, delay: float | None = None) -> None:
+        self.root = root or replica_dir()
+        self.delay = settings.replica_publish_delay if delay is None else delay
+        self._lock = threading.Lock()  # held by writes and the publish itself
+        self._listener: Listener | None = None
+        self._cond = threading.Condition()
+        self._written = 0  # writes applied (under _lock)
+        self._published = 0  # writes the newest snapshot includes (under _cond)
+        self._version = current_version(self.root)
+        self._publishing = False
+
+    def start(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        key = self.root / _KEY
+        key.unlink(missing_ok=True)
+        with os.fdopen(os.open(key, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as f:
+            f.write(secrets.token_bytes(32))
+        sock = self.root / _SOCKET
+        sock.unlink(missing_ok=True)
+        self._listener = Listener(str(sock), family="AF_UNIX", authkey=key.read_bytes())
+        threading.Thread(target=self._accept, name="replica-writer", daemon=True).start()
+        set_ingest_queue(IngestQueue(run=self.locked))
+
+    def _accept(self) -> None:
+        assert self._listener is not None
+        while True:
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                return  # closed
+            except Exception:
+                log.exception("writer: rejected connection")
+                continue
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn: Connection) -> None:
+        with conn:
+            while True:
+                try:
+                    op, args, kwargs = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = ("ok", *self.run(op, *args, **kwargs))
+                except Exception as e:
+                    reply = ("error", e, None)
+                try:
+                    conn.send(reply)
+                except Exception as e:  # unpicklable result or error
+                    conn.send(("error", RuntimeError(f"{op}: {e!r}"), None))
+
+    def run(self, op: str, *args: Any, **kwargs: Any) -> tuple[Any, int]:
+        """Run one write and wait for a snapshot with it; returns (result, version)."""
+        if op in QUEUE_CALLS:
+            return QUEUE_CALLS[op](*args, **kwargs), current_version(self.root)
+        return self._write(WRITES[op], *args, **kwargs)
+
+    def locked(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run `fn` under the write lock, then wait for its snapshot (the ingest queue's `run`)."""
+        return self._write(fn, *args)[0]
+
+    def _write(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> tuple[Any, int]:
+        with self._lock:
+            result = fn(*args, **kwargs)
+            self._written += 1
+            seq = self._written
+        return result, self._snapshot_with(seq)
+
+    def _snapshot_with(self, seq: int) -> int:
+        # The first waiter publishes for everyone; the others wait for it,
+        # and publish again only if their write came after its snapshot.
+        while True:
+            with self._cond:
+                while self._published < seq and self._publishing:
+                    self._cond.wait()
+                if self._published >= seq:
+                    return self._version
+                self._publishing = True
+            try:
+                if self.delay > 0:
+                    time.sleep(self.delay)  # let concurrent writes join this snapshot
+                with self._lock:
+                    upto = self._written
+                    version = publish(self.root)
+                with self._cond:
+                    self._published, self._version = upto, version
+            finally:
+                with self._cond:
+                    self._publishing = False
+                    self._cond.notify_all()
+
+    def publish(self) -> int:
+        with self._lock:
+            version = publish(self.root)
+        with self._cond:
+            self._version = version
+        return version
+
+    def close(self) -> None:
+        set_ingest_queue(None)  # writes what is still queued
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        (self.root / _SOCKET).unlink(missing_ok=True)
+
+
+class WriterClient:
+    """A worker's connection to the writer (one request at a time)."""
+
+    def __init__(self, root: Path | None = None) -> None:
+        self.root = root or replica_dir()
+        self._lock = threading.Lock()
+        self._conn: Connection | None = None
+
+    def _connect(self) -> Connection:
+        if self._conn is None:
+            key = (self.root / _KEY).read_bytes()
+            self._conn = Client(str(self.root / _SOCKET), family="AF_UNIX", authkey=key)
+        return self._conn
+
+    def call(self, op: str, *args: Any, **kwargs: Any) -> Any:
+        with tracer.start_as_current_span("replica.write") as span:
+            span.set_attribute("replica.op", op)
+            with self._lock:
+                try:
+                    self._connect().send((op, args, kwargs))
+                except OSError:
+                    # Writer restarted since the last call; nothing was sent.
+                    self._conn = None
+                    self._connect().send((op, args, kwargs))
+                try:
+                    status, value, version = self._conn.recv()  # type: ignore[union-attr]
+                except (EOFError, OSError):
+                    self._conn = None
+                    raise
+            if status != "ok":
+                raise value
+            get_replica().refresh(version)
+            span.set_attribute("replica.version", version)
+            return value
+
+
+_client: WriterClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_writer_client() -> WriterClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = WriterClient()
+    return _client
+
+
+# --- readers -----------------------------------------------------------------
+
+class Replica:
+    """Serves this process from the newest snapshot, polling for new ones."""
+
+    def __init__(self, root: Path | None = None, interval: float | None = None) -> None:
+        self.root = root or replica_dir()
+        self.interval = settings.replica_refresh if interval is None else interval
+        self.version = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def refresh(self, at_least: int = 0) -> bool:
+        """Move to the newest snapshot if it is newer than the one served.
+
+        Args:
+            at_least (int, optional): Version this call must end up serving
+                (a write just published it). Defaults to 0.
+
+        Returns:
+            bool: Whether a newer snapshot was opened.
+        """
+        with self._lock:
+            version = current_version(self.root)
+            if version < at_least:
+                raise RuntimeError(f"snapshot {at_least} is not published (CURRENT is {version})")
+            if version <= self.version:
+                return False
+            path = _snapshot(self.root, version)
+            with tracer.start_as_current_span("replica.refresh") as span:
+                span.set_attribute("replica.version", version)
+                db = kuzu.Database(str(path / "db.kuzu"), read_only=True)
+                ensure_extension(kuzu.Connection(db), "VECTOR")
+                use_database(db)
+                use_exact_store(str(path / "vectors"))
+                bump_generation()
+            self.version = version
+            _lease(self.root, version)
+            return True
+
+    def start(self, wait: float = 30.0) -> None:
+        """Open the newest snapshot (waiting up to `wait` s for the first) and poll."""
+        for _ in range(int(wait * 10)):
+            if current_version(self.root) or self._stop.wait(0.1):
+                break
+        self.refresh()
+        if not self.version:
+            raise RuntimeError(f"no snapshot in {self.root}; is the writer running?")
+        threading.Thread(target=self._poll, name="replica-refresh", daemon=True).start()
+
+    def _poll(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception:
+                log.exception("replica: refresh failed")
+
+    def stop(self) -> None:
+        self._stop.set()
+        (self.root / _READERS / str(os.getpid())).unlink(missing_ok=True)
+
+    def stats(self) -> dict[str, Any]:
+        return {"role": settings.serve_role, "version": self.version, "current": current_version(self.root)}
+
+
+_replica: Replica | None = None
+_replica_lock = threading.Lock()
+
+
+def get_replica() -> Replica:
+    global _replica
+    with _replica_lock:
+        if _replica is None:
+            _replica = Replica()
+    return _replica
+
+
+# --- launcher ----------------------------------------------------------------
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", type=int, default=2, help="read-only worker processes")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    args = ap.parse_args()
+
+    import uvicorn
+    from uvicorn.supervisors import Multiprocess
+    from app.core.kuzu import ensure_database
+    from app.graph.schema import ensure_schema
+
+    ensure_database()
+    ensure_schema()
+    server = WriterServer()
+    server.start()
+    server.publish()
+
+    # Workers are spawned, so they read SERVE_ROLE afresh; this process stays the writer.
+    os.environ["SERVE_ROLE"] = "replica"
+    os.environ["REPLICA_DIR"] = str(server.root)
+    config = uvicorn.Config("app.api.routes:app", host=args.host, port=args.port, workers=args.workers)
+    try:
+        Multiprocess(config, target=uvicorn.Server(config).run, sockets=[config.bind_socket()]).run()
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
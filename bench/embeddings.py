@@ -0,0 +1,78 @@
+"""
+Embedding write throughput: one statement per row vs the batched NumPy writer.
+
+    uv run python -m bench.embeddings --chunks 5000
+
+"per-row" inserts one vector per `CREATE` into a scratch table (the shape of the
+old `set_dummy_embeddings` loop) and then builds an index on it;
+"batched" is `app.graph.semantic.write_embeddings`. Both report write and
+index-build time separately, since the HNSW build dominates on small hosts.
+
+Then `--delta` new chunks are embedded into the populated index twice: once
+inserted into the live index ("incremental") and once with a full rebuild.
+"""
+from __future__ import annotations
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--chunks", type=int, default=5000)
+    ap.add_argument("--batch", type=int, default=1024)
+    ap.add_argument("--delta", type=int, default=250, help="new chunks for the incremental run")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench-embeddings-")
+    os.environ["KUZU_DB_PATH"] = str(Path(tmp) / "bench.kuzu")
+
+    from app.api.schemas import IngestDocument, IngestSection
+    from app.core.kuzu import connection
+    from app.graph.schema import ensure_schema
+    from app.graph.ingest import ingest_document
+    from app.graph.semantic import DIM, write_embeddings
+
+    ensure_schema()
+    ids = np.asarray(ingest_document(IngestDocument(title="bench", sections=[
+        IngestSection(title="s", chunks=[f"chunk {i}" for i in range(args.chunks)]),
+    ]))["chunk_ids"], dtype=np.int64)
+    vectors = np.random.default_rng(0).standard_normal((len(ids), DIM)).astype(np.float32)
+
+    with connection() as conn:
+        conn.execute(f"CREATE NODE TABLE BenchEmbedding(id INT64 PRIMARY KEY, vec FLOAT[{DIM}])")
+        t0 = time.perf_counter()
+        for cid, vec in zip(ids.tolist(), vectors.tolist()):
+            conn.execute("CREATE (:BenchEmbedding {id: $id, vec: $vec})", {"id": cid, "vec": vec})
+        t1 = time.perf_counter()
+        conn.execute("CALL CREATE_VECTOR_INDEX('BenchEmbedding', 'bench_idx', 'vec', metric := 'cosine')")
+        t2 = time.perf_counter()
+    rows = [("per-row", t1 - t0, t2 - t1)]
+
+    stats = write_embeddings(
+        (ids[i:i + args.batch], vectors[i:i + args.batch]) for i in range(0, len(ids), args.batch)
+    )
+    rows.append(("batched", stats["write_seconds"], stats["index_seconds"]))
+
+    n = len(ids)
+    print(f"{'path':12s} {'rows':>6s} {'write':>9s} {'write rows/s':>13s} {'index':>8s} {'total rows/s':>13s}")
+    for name, write, index in rows:
+        print(f"{name:12s} {n:6d} {write:8.2f}s {n / write:13.0f} {index:7.2f}s {n / (write + index):13.0f}")
+
+    if args.delta:
+        delta = np.asarray(ingest_document(IngestDocument(title="delta", sections=[
+            IngestSection(title="s", chunks=[f"delta {i}" for i in range(args.delta)]),
+        ]))["chunk_ids"], dtype=np.int64)
+        dvec = np.random.default_rng(1).standard_normal((len(delta), DIM)).astype(np.float32)
+        print(f"\n{args.delta} new chunks on top of {n} indexed:")
+        for mode in ("incremental", "rebuild"):
+            stats = write_embeddings([(delta, dvec)], mode=mode)
+            print(f"{mode:12s} {stats['write_seconds'] + stats['index_seconds']:8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
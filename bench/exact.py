@@ -0,0 +1,82 @@
+"""
+Semantic search latency by corpus size: exact scan vs the HNSW index.
+
+    uv run python -m bench.exact --sizes 1000 5000 10000 20000 --queries 200
+
+The corpus grows to each size in turn (random Gaussian vectors, index rebuilt);
+at every size the same queries run through `engine="exact"` and
+`engine="hnsw"` with the result cache off. "doc" is the same comparison
+restricted to one 100-chunk document, where HNSW over-fetches in rounds
+and falls back to a scan of the document. recall@k is HNSW's overlap with
+the exact top-k; "cand." is the mean number of candidates HNSW fetched and
+"fallback" the share of queries that needed the scan. The crossover sets
+`EXACT_MAX_CANDIDATES`.
+"""
+from __future__ import annotations
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000, 20000])
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench-exact-")
+    os.environ["KUZU_DB_PATH"] = str(Path(tmp) / "bench.kuzu")
+    os.environ["SEMANTIC_CACHE_SIZE"] = "0"
+
+    from app.api.schemas import IngestDocument, IngestSection
+    from app.graph.schema import ensure_schema
+    from app.graph.ingest import ingest_document
+    from app.graph.semantic import DIM, semantic_search_with_stats, write_embeddings
+
+    ensure_schema()
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((args.queries, DIM)).astype(np.float32)
+
+    def grow(title: str, n: int) -> None:
+        ids = np.asarray(ingest_document(IngestDocument(title=title, sections=[
+            IngestSection(title="s", chunks=[f"{title} {i}" for i in range(n)]),
+        ]))["chunk_ids"], dtype=np.int64)
+        vectors = rng.standard_normal((n, DIM)).astype(np.float32)
+        write_embeddings([(ids, vectors)], mode="rebuild")
+
+    def measure(engine: str, doc: str | None) -> tuple[float, list[list[int]], list[dict]]:
+        times, hits, stats = [], [], []
+        for q in queries:
+            t0 = time.perf_counter()
+            rows, info = semantic_search_with_stats(q, k=args.k, doc_title=doc, engine=engine)
+            times.append((time.perf_counter() - t0) * 1000.0)
+            hits.append(rows.column("chunk_id"))
+            stats.append(info)
+        return statistics.median(times), hits, stats
+
+    grow("doc", 100)
+    size = 100
+    print(f"{'vectors':>8s} {'filter':>6s} {'exact p50':>10s} {'hnsw p50':>9s} {'hnsw recall@k':>14s} "
+          f"{'cand.':>7s} {'fallback':>9s}")
+    for target in args.sizes:
+        if target > size:
+            grow(f"bulk-{target}", target - size)
+            size = target
+        for doc in (None, "doc"):
+            exact_ms, exact, _ = measure("exact", doc)
+            hnsw_ms, hnsw, stats = measure("hnsw", doc)
+            recall = statistics.mean(len(set(a) & set(b)) / len(a) for a, b in zip(exact, hnsw))
+            cand = statistics.mean(s["candidates"] for s in stats)
+            fallback = statistics.mean(s["fallback"] is not None for s in stats)
+            print(f"{size:8d} {doc or '-':>6s} {exact_ms:8.2f}ms {hnsw_ms:7.2f}ms {recall:14.3f} "
+                  f"{cand:7.0f} {fallback:9.0%}")
+
+
+if __name__ == "__main__":
+    main()
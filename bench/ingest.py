@@ -0,0 +1,98 @@
+"""
+Compare the per-row ingest path with the bulk transactional one, then a
+burst of small documents written one transaction each vs through the
+coalescing ingest queue.
+
+    uv run python -m bench.ingest --chunks 2000 --burst 500
+
+Runs against a throwaway DB under a temp dir; prints chunks/sec for both
+paths, and for the burst documents/sec plus the latency a client waits for
+its response (the whole write, or only the enqueue).
+"""
+from __future__ import annotations
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--sections", type=int, default=20)
+    ap.add_argument("--chunks", type=int, default=2000, help="chunks per document")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--burst", type=int, default=500, help="small documents in the burst test")
+    ap.add_argument("--burst-chunks", type=int, default=10, help="chunks per burst document")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench-ingest-")
+    os.environ["KUZU_DB_PATH"] = str(Path(tmp) / "bench.kuzu")
+
+    # Import after KUZU_DB_PATH is set: settings are read at import time.
+    from app.api.schemas import IngestDocument, IngestSection
+    from app.graph.schema import ensure_schema
+    from app.graph.repo import create_document, create_section, create_chunk
+    from app.graph.ingest import ingest_document
+    from app.graph.ingest_queue import IngestQueue
+
+    ensure_schema()
+    per_sec = max(1, args.chunks // args.sections)
+
+    def make_doc(title: str) -> IngestDocument:
+        return IngestDocument(title=title, sections=[
+            IngestSection(title=f"s{i}", chunks=[f"chunk {i}.{j} " + "lorem ipsum " * 16 for j in range(per_sec)])
+            for i in range(args.sections)
+        ])
+
+    def per_row(doc: IngestDocument) -> None:
+        doc_id = create_document(doc.title)
+        for i, sec in enumerate(doc.sections):
+            sid = create_section(doc_id, sec.title, i)
+            for j, text in enumerate(sec.chunks):
+                create_chunk(sid, text, j)
+
+    n_chunks = args.sections * per_sec
+    for name, fn in (("per-row", per_row), ("bulk", ingest_document)):
+        best = float("inf")
+        for r in range(args.repeat):
+            doc = make_doc(f"{name}-{r}")
+            t0 = time.perf_counter()
+            fn(doc)
+            best = min(best, time.perf_counter() - t0)
+        print(f"{name:8s} {n_chunks} chunks  best {best * 1000:8.1f} ms  {n_chunks / best:10.0f} chunks/sec")
+
+    def small(title: str) -> IngestDocument:
+        return IngestDocument(title=title, sections=[
+            IngestSection(title="s", chunks=[f"{title} chunk {j} " + "lorem ipsum " * 16 for j in range(args.burst_chunks)]),
+        ])
+
+    print(f"\nburst of {args.burst} documents x {args.burst_chunks} chunks")
+    docs = [small(f"direct-{i}") for i in range(args.burst)]
+    waits = []
+    t0 = time.perf_counter()
+    for doc in docs:
+        t = time.perf_counter()
+        ingest_document(doc)
+        waits.append((time.perf_counter() - t) * 1000.0)
+    total = time.perf_counter() - t0
+    print(f"{'direct':8s} {args.burst / total:8.0f} docs/sec  client wait p50 {statistics.median(waits):7.2f} ms")
+
+    q = IngestQueue()
+    docs = [small(f"queued-{i}") for i in range(args.burst)]
+    waits = []
+    t0 = time.perf_counter()
+    for doc in docs:
+        t = time.perf_counter()
+        q.submit([doc])
+        waits.append((time.perf_counter() - t) * 1000.0)
+    q.stop()  # returns once every queued document is written
+    total = time.perf_counter() - t0
+    stats = q.stats()
+    print(f"{'queued':8s} {args.burst / total:8.0f} docs/sec  client wait p50 {statistics.median(waits):7.2f} ms"
+          f"  ({stats['batches']} transactions, {stats['documents'] / stats['batches']:.0f} docs each)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+End-to-end HTTP load: a mixed request stream at a sweep of concurrency levels.
+
+    uv run python -m bench.load --concurrency 1 4 16 64 --seconds 10
+    uv run python -m bench.load --mix chunks=1,semantic=3,ingest=1 --server asgi
+    uv run python -m bench.load --url http://127.0.0.1:8000 --no-ingest
+
+A synthetic corpus (`app.graph.synthetic`, `--docs` documents of 10 x 10
+chunks with embeddings) is built offline in a throwaway database, then the
+app is started on it:
+
+- `uvicorn` (default): `uvicorn app.api.routes:app` in a subprocess, so the
+  event loop, the database executor, the connection pool and HTTP parsing
+  are all in the measurement; the load generator shares the machine;
+- `asgi`: the app runs inside this process behind httpx's ASGI transport,
+  without sockets;
+- `replica`: `python -m app.replica --workers N` (`--workers`).
+
+`--url` skips all of that and drives a running server; its data must
+contain `synthetic <i>` documents (`load_synthetic`) for the doc-filtered
+requests to hit.
+
+Closed-loop clients (`--concurrency` of them at each level) draw operations
+from `--mix`, weights per operation:
+
+    chunks    GET  /chunks?limit=50, every other call filtered to a document
+    search    GET  /search (substring) with a corpus word
+    bm25      GET  /search?mode=bm25 with one or two corpus words
+    semantic  POST /search/semantic (HNSW, k=10) with a vector near a topic
+    ingest    POST /ingest with a new one-section, ten-chunk document
+
+Each level runs for `--seconds` after `--warmup` seconds. Reported per level
+and per operation: requests/s, p50/p95/p99 of successful requests, and the
+error rate, with counts of 503 (saturated), 504 (timed out), other statuses
+and transport errors. `--out` also writes everything as JSON.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any
+
+import httpx
+import numpy as np
+
+from bench.suite import environment, percentiles
+
+OPS = ("chunks", "search", "bm25", "semantic", "ingest")
+SECTIONS, CHUNKS = 10, 10
+
+
+def _build(db_path: str, docs: int, seed: int) -> None:
+    # Runs in a spawned child: the server needs the database file unlocked.
+    os.environ["KUZU_DB_PATH"] = db_path
+    from app.graph.schema import ensure_schema
+    from app.graph.synthetic import load_synthetic
+
+    ensure_schema()
+    load_synthetic(docs, seed=seed, mode="rebuild", sections=SECTIONS, chunks=CHUNKS)
+
+
+def _start(cmd: list[str], env: dict[str, str], base: str) -> subprocess.Popen:
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(300):
+        try:
+            if httpx.get(f"{base}/health", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"server at {base} did not start")
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        op, _, weight = part.partition("=")
+        if op not in OPS:
+            raise SystemExit(f"unknown operation {op!r}; expected one of {', '.join(OPS)}")
+        mix[op] = float(weight or 1)
+    return mix
+
+
+class Workload:
+    """Request factory: deterministic per client, unique ingest titles."""
+
+    def __init__(self, docs: int, seed: int, run_id: str) -> None:
+        from app.graph.synthetic import synthetic_document, synthetic_embeddings, synthetic_queries
+
+        self.docs = docs
+        self.seed = seed
+        self.run_id = run_id
+        self.queries = synthetic_queries(512, seed=seed)
+        self.vectors = [synthetic_embeddings(10**9 + i, 1, seed=seed)[0].tolist() for i in range(64)]
+        self.ingest_docs = [synthetic_document(10**6 + i, 1, CHUNKS, seed=seed).model_dump() for i in range(64)]
+        self.next_ingest = 0
+
+    def request(self, op: str, n: int) -> tuple[str, str, dict[str, Any]]:
+        if op == "chunks":
+            params: dict[str, Any] = {"limit": 50}
+            if n % 2:
+                params["doc"] = f"synthetic {(n * 7919) % self.docs}"
+            return "GET", "/chunks", {"params": params}
+        if op == "search":
+            return "GET", "/search", {"params": {"q": self.queries[n % 512].split()[0], "limit": 20}}
+        if op == "bm25":
+            return "GET", "/search", {"params": {"q": self.queries[n % 512], "mode": "bm25", "limit": 20}}
+        if op == "semantic":
+            return "POST", "/search/semantic", {"json": {"vector": self.vectors[n % 64], "k": 10}}
+        self.next_ingest += 1
+        body = dict(self.ingest_docs[self.next_ingest % 64], title=f"load {self.run_id} {self.next_ingest}")
+        return "POST", "/ingest", {"json": body}
+
+
+async def _level(
+    client: httpx.AsyncClient,
+    work: Workload,
+    mix: dict[str, float],
+    concurrency: int,
+    seconds: float,
+    warmup: float,
+) -> dict[str, Any]:
+    ops = list(mix)
+    p = np.array([mix[o] for o in ops]) / sum(mix.values())
+    times: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, Counter] = defaultdict(Counter)
+    start = time.perf_counter()
+    measure_from, deadline = start + warmup, start + warmup + seconds
+
+    async def one(i: int) -> None:
+        rng = np.random.default_rng([work.seed, concurrency, i])
+        n = i
+        while (now := time.perf_counter()) < deadline:
+            op = ops[int(rng.choice(len(ops), p=p))]
+            method, url, kw = work.request(op, n)
+            n += concurrency
+            try:
+                r = await client.request(method, url, **kw)
+                status = r.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            if now < measure_from:
+                continue
+            if status in (200, 201):
+                times[op].append((time.perf_counter() - now) * 1000.0)
+            else:
+                errors[op][str(status)] += 1
+
+    await asyncio.gather(*(one(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - measure_from
+    per_op = {}
+    for op in ops:
+        ok, failed = len(times[op]), sum(errors[op].values())
+        per_op[op] = {
+            "requests": ok + failed,
+            "rps": round((ok + failed) / elapsed, 2),
+            "error_rate": round(failed / (ok + failed), 4) if ok + failed else 0.0,
+            "errors": dict(errors[op]),
+            **({"latency": percentiles(times[op])} if ok else {}),
+        }
+    total = sum(o["requests"] for o in per_op.values())
+    failed = sum(sum(o["errors"].values()) for o in per_op.values())
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "rps": round(total / elapsed, 2),
+        "error_rate": round(failed / total, 4) if total else 0.0,
+        "latency": percentiles([t for op in ops for t in times[op]]) if total > failed else {},
+        "operations": per_op,
+    }
+
+
+def _print(level: dict[str, Any]) -> None:
+    def row(name: str, rps: float, lat: dict[str, float], err: float, detail: str = "") -> None:
+        p = [f"{lat[k]:7.1f}ms" if lat else f"{'-':>9s}" for k in ("p50", "p95", "p99")]
+        print(f"{level['concurrency']:5d} {name:<9s} {rps:8.1f} {' '.join(p)} {err:7.1%} {detail}")
+
+    for op, o in level["operations"].items():
+        detail = " ".join(f"{k}:{v}" for k, v in sorted(o["errors"].items()))
+        row(op, o["rps"], o.get("latency", {}), o["error_rate"], detail)
+    row("all", level["rps"], level["latency"], level["error_rate"])
+
+
+async def _sweep(base: str | None, transport: httpx.AsyncBaseTransport | None, work: Workload,
+                 args: argparse.Namespace, mix: dict[str, float]) -> list[dict[str, Any]]:
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=base or "http://bench", transport=transport, limits=limits,
+                                 timeout=args.timeout) as client:
+        levels = []
+        for c in args.concurrency:
+            level = await _level(client, work, mix, c, args.seconds, args.warmup)
+            _print(level)
+            levels.append(level)
+        return levels
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--warmup", type=float, default=1.0)
+    ap.add_argument("--mix", default="chunks=3,search=2,bm25=2,semantic=3,ingest=1")
+    ap.add_argument("--no-ingest", action="store_true", help="drop ingest from the mix (read-only run)")
+    ap.add_argument("--docs", type=int, default=50, help="synthetic documents of 100 chunks")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--server", choices=("uvicorn", "asgi", "replica"), default="uvicorn")
+    ap.add_argument("--workers", type=int, default=2, help="replica workers for --server replica")
+    ap.add_argument("--url", default=None, help="drive a running server instead of starting one")
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--timeout", type=float, default=30.0, help="client timeout per request (s)")
+    ap.add_argument("--out", type=Path, default=None)
+    args = ap.parse_args()
+
+    mix = parse_mix(args.mix)
+    if args.no_ingest:
+        mix.pop("ingest", None)
+    if not mix:
+        raise SystemExit("empty --mix")
+
+    run_id = f"{os.getpid()}-{int(time.time())}"
+    proc: subprocess.Popen | None = None
+    base, transport = args.url, None
+    if base is None:
+        tmp = Path(tempfile.mkdtemp(prefix="bench-load-"))
+        db_path = str(tmp / "bench.kuzu")
+        t0 = time.perf_counter()
+        builder = mp.get_context("spawn").Process(target=_build, args=(db_path, args.docs, args.seed))
+        builder.start()
+        builder.join()
+        if builder.exitcode:
+            raise SystemExit("building the corpus failed")
+        print(f"corpus: {args.docs * SECTIONS * CHUNKS} chunks in {time.perf_counter() - t0:.1f}s ({tmp})")
+        os.environ["KUZU_DB_PATH"] = db_path
+        if args.server == "asgi":
+            from app.core.kuzu import ensure_database
+            from app.graph.schema import ensure_schema
+            from app.api.routes import app
+
+            ensure_database()
+            ensure_schema()
+            transport = httpx.ASGITransport(app=app)
+        else:
+            base = f"http://127.0.0.1:{args.port}"
+            if args.server == "replica":
+                cmd = [sys.executable, "-m", "app.replica", "--workers", str(args.workers), "--port", str(args.port)]
+            else:
+                cmd = [sys.executable, "-m", "uvicorn", "app.api.routes:app", "--port", str(args.port)]
+            proc = _start(cmd, dict(os.environ), base)
+
+    work = Workload(args.docs, args.seed, run_id)
+    print(f"{'conc.':>5s} {'op':<9s} {'req/s':>8s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'errors':>7s}")
+    try:
+        levels = asyncio.run(_sweep(base, transport, work, args, mix))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(30)
+
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        meta = {**environment(), "server": args.url or args.server, "mix": mix,
+                "args": {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()}}
+        args.out.write_text(json.dumps({"meta": meta, "levels": levels}, indent=2))
+        print(f"\nwrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Per-call latency of the hot queries: plain text execute vs the prepared registry.
+
+    uv run python -m bench.prepared --docs 20 --calls 500
+
+"text" sends the registered Cypher as a string (parse + plan every call, the
+old behaviour); "prepared" goes through `app.core.kuzu.run`.
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--docs", type=int, default=20)
+    ap.add_argument("--chunks", type=int, default=100, help="chunks per document")
+    ap.add_argument("--calls", type=int, default=500)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench-prepared-")
+    os.environ["KUZU_DB_PATH"] = str(Path(tmp) / "bench.kuzu")
+
+    from app.api.schemas import IngestDocument, IngestSection
+    from app.core.kuzu import connection, run, statements
+    from app.graph.schema import ensure_schema
+    from app.graph.ingest import ingest_documents
+    from app.graph import read, repo, search, semantic
+
+    ensure_schema()
+    ingest_documents([
+        IngestDocument(title=f"doc-{d}", sections=[
+            IngestSection(title="s", chunks=[f"chunk {d}.{i} lorem ipsum topic" for i in range(args.chunks)]),
+        ])
+        for d in range(args.docs)
+    ])
+
+    rnd = random.Random(0)
+    with connection() as conn:
+        ids = [r[0] for r in conn.execute("MATCH (c:Chunk) RETURN c.id").get_all()]
+    semantic.write_embeddings([(ids, np.random.default_rng(0).random((len(ids), semantic.DIM)))])
+
+    vec = [rnd.random() for _ in range(semantic.DIM)]
+    start = dict(zip(("after_d", "after_s", "after_c"), read.START))
+    cases = [
+        (read.LIST_CHUNKS, {"lim": 100, **start}),
+        (read.LIST_CHUNKS_BY_DOC, {"lim": 100, "t": "doc-3", **start}),
+        (search.SEARCH_CHUNKS, {"lim": 20, "pat": "(?i).*topic.*"}),
+        (search.SEARCH_CHUNKS_BY_DOC, {"lim": 20, "pat": "(?i).*topic.*", "t": "doc-3"}),
+        (semantic.SEMANTIC_SEARCH, {"vec": vec, "k": 5, "efs": 200}),
+        (repo.DOCUMENT_EXISTS, {"t": "doc-3"}),
+    ]
+    text = statements()
+
+    print(f"{'statement':24s} {'text p50':>10s} {'prep p50':>10s} {'speedup':>8s}")
+    with connection() as conn:
+        for name, params in cases:
+            timings: dict[str, list[float]] = {"text": [], "prepared": []}
+            for _ in range(args.calls):
+                t0 = time.perf_counter()
+                conn.execute(text[name], params).get_all()
+                timings["text"].append(time.perf_counter() - t0)
+                t0 = time.perf_counter()
+                run(conn, name, params).get_all()
+                timings["prepared"].append(time.perf_counter() - t0)
+            a = statistics.median(timings["text"]) * 1e6
+            b = statistics.median(timings["prepared"]) * 1e6
+            print(f"{name:24s} {a:8.0f}us {b:8.0f}us {a / b:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
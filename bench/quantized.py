@@ -0,0 +1,68 @@
+"""
+Quantized embedding store: memory per vector, scoring latency and recall@k.
+
+    uv run python -m bench.quantized --vectors 50000 --queries 100
+
+Vectors are clustered synthetic 384-d embeddings (no database needed); the
+float32 `ExactStore` is the reference. Each codec is timed on codes alone
+and with the top `--rescore` x k candidates re-scored from float32.
+"""
+from __future__ import annotations
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--vectors", type=int, default=50000)
+    ap.add_argument("--queries", type=int, default=100)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--rescore", type=int, default=10, help="candidates re-scored per result")
+    args = ap.parse_args()
+
+    from app.graph.exact import ExactStore
+    from app.graph.quantized import QuantizedStore, recall_at_k
+    from app.graph.semantic import DIM
+
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((max(args.vectors // 100, 1), DIM))
+    x = (centers[rng.integers(0, len(centers), args.vectors)]
+         + 0.5 * rng.standard_normal((args.vectors, DIM))).astype(np.float32)
+    queries = x[rng.choice(args.vectors, args.queries, replace=False)] \
+        + 0.3 * rng.standard_normal((args.queries, DIM)).astype(np.float32)
+
+    exact = ExactStore(Path(tempfile.mkdtemp(prefix="bench-quantized-")) / "vectors", DIM)
+    exact.replace([(np.arange(args.vectors), x)])
+
+    def p50(fn) -> float:
+        times = []
+        for q in queries:
+            t0 = time.perf_counter()
+            fn(q)
+            times.append((time.perf_counter() - t0) * 1000.0)
+        return statistics.median(times)
+
+    depth = args.k * args.rescore
+    print(f"{'store':16s} {'B/vector':>9s} {'heap MB':>8s} {'build':>7s} {'p50':>8s} {'recall@k':>9s}")
+    print(f"{'float32 (mmap)':16s} {DIM * 4 + 8:9d} {'-':>8s} {'-':>7s} "
+          f"{p50(lambda q: exact.search(q, args.k)):6.2f}ms {1.0:9.3f}")
+    for kind in ("int8", "pq"):
+        store = QuantizedStore(exact, kind)
+        t0 = time.perf_counter()
+        store.build()
+        build = time.perf_counter() - t0
+        s = store.stats()
+        for label, rescore in ((kind, 0), (f"{kind} + rescore", depth)):
+            ms = p50(lambda q: store.search(q, args.k, rescore=rescore))
+            recall = recall_at_k(store, queries, args.k, rescore)
+            print(f"{label:16s} {s['bytes_per_vector']:9d} {s['bytes'] / 2**20:8.1f} {build:6.1f}s "
+                  f"{ms:6.2f}ms {recall:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Read throughput by worker count: `python -m app.replica --workers N`.
+
+    uv run python -m bench.replicas --workers 1 2 4 --seconds 10 --concurrency 16
+
+For each N a writer plus N read-only workers start on a throwaway database,
+a corpus is ingested and embedded through the HTTP API (so every write goes
+through the writer and a snapshot), and `--concurrency` clients then send
+a mix of `/search` (BM25) and `/search/semantic` (exact engine) requests for
+`--seconds`. "single" is the plain one-process server (`SERVE_ROLE=primary`)
+on the same corpus, for reference. Reports requests/s and latency
+percentiles. Scaling needs free cores: the client shares the machine.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+DIM = 384
+
+
+def _start(cmd: list[str], env: dict[str, str], port: int) -> subprocess.Popen:
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(300):
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def _load_corpus(base: str, docs: int, chunks: int) -> None:
+    with httpx.Client(base_url=base, timeout=120) as c:
+        c.post("/seed", params={"reset": True}).raise_for_status()
+        words = ["graph", "vector", "index", "query", "chunk", "section", "kuzu", "search"]
+        batch = [
+            {"title": f"doc {d}", "sections": [{"title": "s", "chunks": [
+                f"{words[(d + i) % 8]} {words[(d * i) % 8]} text {d}-{i}" for i in range(chunks)
+            ]}]}
+            for d in range(docs)
+        ]
+        c.post("/ingest/bulk", json=batch).raise_for_status()
+        c.post("/debug/set_dummy_embeddings").raise_for_status()
+
+
+async def _drive(base: str, seconds: float, concurrency: int) -> tuple[int, int, list[float]]:
+    times: list[float] = []
+    errors = 0
+    vector = [0.0] * DIM
+    deadline = time.perf_counter() + seconds
+
+    async def client(i: int) -> None:
+        nonlocal errors
+        async with httpx.AsyncClient(base_url=base, timeout=30) as c:
+            n = i
+            while time.perf_counter() < deadline:
+                n += 1
+                t0 = time.perf_counter()
+                if n % 2:
+                    r = await c.get("/search", params={"q": "graph vector", "mode": "bm25", "limit": 10})
+                else:
+                    vector[n % DIM] = 1.0
+                    r = await c.post("/search/semantic", json={"vector": vector, "k": 10, "engine": "exact"})
+                    vector[n % DIM] = 0.0
+                if r.status_code == 200:
+                    times.append((time.perf_counter() - t0) * 1000.0)
+                else:
+                    errors += 1
+
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    return len(times), errors, times
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--docs", type=int, default=50)
+    ap.add_argument("--chunks", type=int, default=100, help="chunks per document")
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+
+    print(f"{'mode':>10s} {'req/s':>8s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'errors':>7s}")
+    for workers in [0, *args.workers]:
+        tmp = Path(tempfile.mkdtemp(prefix="bench-replicas-"))
+        env = {**os.environ, "KUZU_DB_PATH": str(tmp / "bench.kuzu"), "SEMANTIC_CACHE_SIZE": "0"}
+        base = f"http://127.0.0.1:{args.port}"
+        if workers:
+            cmd = [sys.executable, "-m", "app.replica", "--workers", str(workers), "--port", str(args.port)]
+        else:
+            cmd = [sys.executable, "-m", "uvicorn", "app.api.routes:app", "--port", str(args.port)]
+        proc = _start(cmd, env, args.port)
+        try:
+            _load_corpus(base, args.docs, args.chunks)
+            time.sleep(1.0)  # every worker picks up the last snapshot
+            done, errors, times = asyncio.run(_drive(base, args.seconds, args.concurrency))
+        finally:
+            proc.terminate()
+            proc.wait(30)
+        q = statistics.quantiles(times, n=100) if len(times) > 1 else [0.0] * 99
+        label = f"{workers} workers" if workers else "single"
+        print(f"{label:>10s} {done / args.seconds:8.1f} {q[49]:6.1f}ms {q[94]:6.1f}ms {q[98]:6.1f}ms {errors:7d}")
+
+
+if __name__ == "__main__":
+    main()
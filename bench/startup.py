@@ -0,0 +1,90 @@
+"""
+Cold-start time: importing `app.api.routes` and running its lifespan.
+
+    uv run python -m bench.startup --runs 5
+
+Each run is a fresh interpreter (`python -m bench.startup --child`) that
+reports two phases:
+
+    import    `import app.api.routes` (FastAPI, Kùzu, NumPy, tracing setup)
+    lifespan  the app's startup: opening the database and `ensure_schema`
+
+"new db" starts from an empty database directory, so the DDL runs;
+"existing db" reopens it, and the stored schema fingerprint lets
+`ensure_schema` skip the DDL. Tracing modes change what is imported:
+`otlp` pulls in the gRPC exporter (pointed at a closed local port, nothing
+is exported during the measurement), `off` none of the SDK. "process" is the
+wall time of the whole child as seen from here, interpreter start included.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench.suite import percentiles
+
+MODES: dict[str, dict[str, str]] = {
+    "off": {"TRACING": "off"},
+    "console": {"TRACING": "console"},
+    "otlp": {"TRACING": "otlp", "OTEL_EXPORTER_OTLP_ENDPOINT": "http://127.0.0.1:9"},
+}
+
+
+def _child() -> None:
+    import asyncio
+
+    t0 = time.perf_counter()
+    from app.api.routes import app, lifespan
+    t1 = time.perf_counter()
+
+    async def start() -> float:
+        t = time.perf_counter()
+        async with lifespan(app):
+            return time.perf_counter() - t
+
+    startup = asyncio.run(start())
+    print(json.dumps({"import_ms": (t1 - t0) * 1000.0, "lifespan_ms": startup * 1000.0}), flush=True)
+    os._exit(0)  # skip exporter shutdown at exit; it is not part of start-up
+
+
+def _run(env: dict[str, str]) -> dict[str, float]:
+    t0 = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-m", "bench.startup", "--child"],
+        env={**os.environ, **env}, capture_output=True, text=True, check=True,
+    )
+    wall = (time.perf_counter() - t0) * 1000.0
+    return {**json.loads(out.stdout.strip().splitlines()[-1]), "process_ms": wall}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        _child()
+        return
+
+    print(f"{'tracing':8s} {'database':12s} {'import p50':>11s} {'lifespan p50':>13s} {'process p50':>12s}")
+    for mode in args.modes:
+        for state in ("new db", "existing db"):
+            runs = []
+            for _ in range(args.runs):
+                db = Path(tempfile.mkdtemp(prefix="bench-startup-")) / "bench.kuzu"
+                env = {**MODES[mode], "KUZU_DB_PATH": str(db)}
+                if state == "existing db":
+                    _run(env)  # creates the schema
+                runs.append(_run(env))
+            p = {k: percentiles([r[k] for r in runs])["p50"] for k in ("import_ms", "lifespan_ms", "process_ms")}
+            print(f"{mode:8s} {state:12s} {p['import_ms']:9.0f}ms {p['lifespan_ms']:11.0f}ms {p['process_ms']:10.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Graph-layer micro-benchmarks on a synthetic corpus, written as JSON.
+
+    uv run python -m bench.suite --sizes 1000 5000 20000 --queries 200
+    uv run python -m bench.suite --baseline bench-results/suite-<before>.json
+
+The corpus (`app.graph.synthetic`: documents of `--sections` x `--chunks`
+chunks, Zipf-distributed words, clustered float32 vectors) grows to each
+size in turn on a throwaway database. At every size the suite records:
+
+- ingest throughput: the growth step through bulk `ingest_documents`, a
+  fixed per-row document through `create_document`/`create_section`/
+  `create_chunk`, and the `write_embeddings` job (index rebuilt);
+- latency percentiles (p50/p95/p99, ms) of `list_chunks` (first page, one
+  document's page), `search_chunks` (substring) and BM25, and
+  `semantic_search` with the HNSW and exact engines (result cache off).
+
+Results go to `--out` (default `bench-results/suite-<UTC time>.json`) with
+the environment they ran in. `--baseline` compares the new run with an
+earlier file: p95 latencies or throughputs worse by more than `--tolerance`
+are flagged and the exit status is 1.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+
+def percentiles(times_ms: list[float]) -> dict[str, float]:
+    a = np.asarray(times_ms)
+    p50, p95, p99 = np.percentile(a, [50, 95, 99])
+    return {"n": len(a), "mean": round(float(a.mean()), 4), "p50": round(float(p50), 4),
+            "p95": round(float(p95), 4), "p99": round(float(p99), 4)}
+
+
+def timed(fn: Callable[[int], Any], n: int, warmup: int = 5) -> dict[str, float]:
+    for i in range(warmup):
+        fn(i)
+    times = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        fn(i)
+        times.append((time.perf_counter() - t0) * 1000.0)
+    return percentiles(times)
+
+
+def environment() -> dict[str, Any]:
+    import kuzu
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "kuzu": kuzu.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(base: dict[str, Any], new: dict[str, Any], tolerance: float) -> list[str]:
+    """Print new/base ratios per size and metric; return the regressions."""
+    old = {r["size"]: r for r in base["results"]}
+    regressions = []
+    print(f"\n{'size':>7s} {'metric':<28s} {'base':>10s} {'new':>10s} {'ratio':>7s}")
+    for r in new["results"]:
+        b = old.get(r["size"])
+        if b is None:
+            continue
+        rows = [(f"{k} p95 ms", b["latency"][k]["p95"], v["p95"], False)
+                for k, v in r["latency"].items() if k in b["latency"]]
+        rows += [(k, b["ingest"][k], v, True) for k, v in r["ingest"].items() if k in b["ingest"]]
+        for name, was, now, higher_is_better in rows:
+            ratio = now / was if was else float("inf")
+            worse = ratio < 1 - tolerance if higher_is_better else ratio > 1 + tolerance
+            flag = "  !" if worse else ""
+            print(f"{r['size']:7d} {name:<28s} {was:10.2f} {now:10.2f} {ratio:6.2f}x{flag}")
+            if worse:
+                regressions.append(f"{r['size']} {name}: {was:.2f} -> {now:.2f}")
+    return regressions
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000], help="corpus sizes in chunks")
+    ap.add_argument("--sections", type=int, default=10, help="sections per document")
+    ap.add_argument("--chunks", type=int, default=10, help="chunks per section")
+    ap.add_argument("--queries", type=int, default=200, help="timed calls per operation")
+    ap.add_argument("--per-row", type=int, default=200, help="chunks in the per-row create_* document")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", type=Path, default=None)
+    ap.add_argument("--baseline", type=Path, default=None, help="earlier JSON output to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown before flagging")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench-suite-")
+    os.environ["KUZU_DB_PATH"] = str(Path(tmp) / "bench.kuzu")
+    os.environ["SEMANTIC_CACHE_SIZE"] = "0"
+
+    # Import after KUZU_DB_PATH is set: settings are read at import time.
+    from app.graph.read import list_chunks
+    from app.graph.repo import create_chunk, create_document, create_section
+    from app.graph.schema import ensure_schema
+    from app.graph.search import bm25_search_rows, search_chunks
+    from app.graph.semantic import semantic_search
+    from app.graph.synthetic import load_synthetic, synthetic_embeddings, synthetic_queries
+
+    ensure_schema()
+    per_doc = args.sections * args.chunks
+    texts = synthetic_queries(args.queries, seed=args.seed)
+    vectors = [synthetic_embeddings(10**9 + i, 1, seed=args.seed)[0] for i in range(args.queries)]
+    run: dict[str, Any] = {"meta": {**environment(), "args": {k: str(v) if isinstance(v, Path) else v
+                                                              for k, v in vars(args).items()}},
+                           "results": []}
+
+    docs = 0
+    print(f"{'chunks':>7s} {'operation':<20s} {'p50':>8s} {'p95':>8s} {'p99':>8s}")
+    for size in args.sizes:
+        grow = max(0, -(-size // per_doc) - docs)
+        loaded = load_synthetic(grow, start=docs, seed=args.seed, mode="rebuild",
+                                sections=args.sections, chunks=args.chunks)
+        docs += grow
+        emb = loaded.get("embeddings", {})
+
+        title = f"per-row {size}"
+        t0 = time.perf_counter()
+        doc_id = create_document(title)
+        per_sec = max(1, args.per_row // args.sections)
+        for i in range(args.sections):
+            sid = create_section(doc_id, f"s{i}", i)
+            for j in range(per_sec):
+                create_chunk(sid, f"{title} chunk {i}.{j}", j)
+        per_row = args.sections * per_sec / (time.perf_counter() - t0)
+
+        def doc(i: int) -> str:
+            return f"synthetic {(i * 7919) % docs}"
+
+        latency = {
+            "list_chunks": timed(lambda i: list_chunks(limit=100), args.queries),
+            "list_chunks_doc": timed(lambda i: list_chunks(limit=100, doc_title=doc(i)), args.queries),
+            "search_substring": timed(lambda i: search_chunks(texts[i].split()[0], limit=20), args.queries),
+            "search_bm25": timed(lambda i: bm25_search_rows(texts[i], limit=20), args.queries),
+            "semantic_hnsw": timed(lambda i: semantic_search(vectors[i], k=10, engine="hnsw"), args.queries),
+            "semantic_exact": timed(lambda i: semantic_search(vectors[i], k=10, engine="exact"), args.queries),
+        }
+        result = {
+            "size": size,
+            "chunks": docs * per_doc,
+            "documents": docs,
+            "ingest": {
+                "bulk_chunks_per_sec": round(loaded["chunks"] / loaded["ingest_seconds"], 1)
+                if loaded["chunks"] else 0.0,
+                "per_row_chunks_per_sec": round(per_row, 1),
+                "embeddings_rows_per_sec": emb.get("rows_per_sec", 0.0),
+            },
+            "latency": latency,
+        }
+        run["results"].append(result)
+        for name, p in latency.items():
+            print(f"{size:7d} {name:<20s} {p['p50']:6.2f}ms {p['p95']:6.2f}ms {p['p99']:6.2f}ms")
+        ing = result["ingest"]
+        print(f"{size:7d} ingest: bulk {ing['bulk_chunks_per_sec']:.0f}, per-row {ing['per_row_chunks_per_sec']:.0f}"
+              f" chunks/sec; embeddings {ing['embeddings_rows_per_sec']:.0f} rows/sec")
+
+    out = args.out or Path("bench-results") / f"suite-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(run, indent=2))
+    print(f"\nwrote {out}")
+
+    if args.baseline:
+        regressions = compare(json.loads(args.baseline.read_text()), run, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            print("\n".join(f"  {r}" for r in regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Per-request cost of each tracing mode, on `/health` and a small `/chunks` page.
+
+    uv run python -m bench.tracing --requests 2000
+
+Every mode runs in its own spawned process (a tracer provider can only be set
+once per process) on the same throwaway database, with the app driven
+in-process through Starlette's TestClient. Console output goes to
+/dev/null, so formatting and writing spans is measured, not a terminal.
+
+    off             TRACING=off: no provider, no FastAPI instrumentation
+    console-simple  console exporter behind a SimpleSpanProcessor (the old default)
+    console-batch   console exporter behind a BatchSpanProcessor
+    sampled-10%     console-batch keeping 10% of traces (TRACE_SAMPLE_RATIO=0.1)
+    sampled-0%      console-batch keeping no traces: spans are still created
+                    but never recorded or exported
+
+Reports p50/p95 per request and the p50 overhead against `off`.
+"""
+from __future__ import annotations
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from bench.suite import percentiles
+
+MODES: dict[str, dict[str, str]] = {
+    "off": {"TRACING": "off"},
+    "console-simple": {"TRACING": "console", "TRACE_PROCESSOR": "simple"},
+    "console-batch": {"TRACING": "console", "TRACE_PROCESSOR": "batch"},
+    "sampled-10%": {"TRACING": "console", "TRACE_SAMPLE_RATIO": "0.1"},
+    "sampled-0%": {"TRACING": "console", "TRACE_SAMPLE_RATIO": "0"},
+}
+PATHS = ("/health", "/chunks?limit=10")
+
+
+def _measure(db_path: str, env: dict[str, str], requests: int) -> dict[str, dict[str, float]]:
+    # Runs in a spawned child; settings are read from the environment at import.
+    os.environ.update(env, KUZU_DB_PATH=db_path)
+    sys.stdout = open(os.devnull, "w")  # ConsoleSpanExporter binds sys.stdout when created
+
+    from fastapi.testclient import TestClient
+    from app.api.routes import app
+
+    out = {}
+    with TestClient(app) as client:
+        client.post("/seed", params={"reset": False}).raise_for_status()
+        for path in PATHS:
+            for _ in range(min(requests // 10, 100)):  # warm up
+                client.get(path)
+            times = []
+            for _ in range(requests):
+                t0 = time.perf_counter()
+                client.get(path).raise_for_status()
+                times.append((time.perf_counter() - t0) * 1000.0)
+            out[path] = percentiles(times)
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=2000, help="requests per path and mode")
+    ap.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    args = ap.parse_args()
+
+    db_path = str(Path(tempfile.mkdtemp(prefix="bench-tracing-")) / "bench.kuzu")
+    ctx = mp.get_context("spawn")
+    results: dict[str, Any] = {}
+    for mode in args.modes:
+        with ctx.Pool(1) as pool:
+            results[mode] = pool.apply(_measure, (db_path, MODES[mode], args.requests))
+
+    base = results.get("off")
+    print(f"{'mode':16s} {'path':18s} {'p50':>9s} {'p95':>9s} {'overhead':>10s}")
+    for mode, by_path in results.items():
+        for path, lat in by_path.items():
+            extra = f"{(lat['p50'] - base[path]['p50']) * 1000:+8.0f}us" if base else ""
+            print(f"{mode:16s} {path:18s} {lat['p50']:7.3f}ms {lat['p95']:7.3f}ms {extra:>10s}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
 from __future__ import annotations
 import os
+import shutil
 import sys
+import tempfile
 from pathlib import Path
+from typing import Iterator
 import pytest
 from fastapi.testclient import TestClient
 
@@ -10,16 +13,19 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+# Set before any test module is collected: modules that import app code at
+# the top read `settings` (and KUZU_DB_PATH) once, at import.
+DB_DIR = Path(tempfile.mkdtemp(prefix="kuzu-db-"))
+os.environ["KUZU_DB_PATH"] = str(DB_DIR / "test.kuzu")
 
-@pytest.fixture(scope="session")
-def client(tmp_path_factory) -> TestClient:
-    db_dir = tmp_path_factory.mktemp("kuzu-db")
-    os.environ["KUZU_DB_PATH"] = str(db_dir / "test.kuzu")
 
+@pytest.fixture(scope="session")
+def client() -> Iterator[TestClient]:
     from app.core.kuzu import ensure_database
     from app.graph.schema import ensure_schema
     ensure_database()
     ensure_schema()
 
     from app.api.routes import app
-    return TestClient(app)
+    yield TestClient(app)
+    shutil.rmtree(DB_DIR, ignore_errors=True)
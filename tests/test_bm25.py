@@ -0,0 +1,37 @@
+from __future__ import annotations
+from fastapi.testclient import TestClient
+
+
+def test_search_bm25_ranks_and_scores(client: TestClient):
+    client.post("/seed", params={"reset": True})
+    payload = {
+        "title": "Ranked Notes",
+        "sections": [
+            {"title": "Intro", "chunks": ["graph databases store graphs", "nothing relevant here"]},
+            {"title": "Body", "chunks": ["graph graph graph", "a graph and vectors"]},
+        ],
+    }
+    assert client.post("/ingest", json=payload).status_code == 201
+
+    r = client.get("/search", params={"q": "Graph", "mode": "bm25", "doc": "Ranked Notes"})
+    assert r.status_code == 200
+    items = r.json()["items"]
+    texts = [i["text"] for i in items]
+    assert "nothing relevant here" not in texts
+    assert len(items) == 3
+    assert texts[0] == "graph graph graph"  # highest term frequency wins
+    scores = [i["score"] for i in items]
+    assert scores == sorted(scores, reverse=True) and scores[-1] > 0
+
+    # The seeded sample doc is indexed as well; substring mode is unchanged
+    assert client.get("/search", params={"q": "hello", "mode": "bm25"}).json()["count"] == 1
+    assert client.get("/search", params={"q": "raph", "doc": "Ranked Notes"}).json()["count"] == 3
+
+
+def test_reindex_text_matches_ingest(client: TestClient):
+    client.post("/seed", params={"reset": True})
+    before = client.get("/search", params={"q": "chunk", "mode": "bm25"}).json()["items"]
+    r = client.post("/debug/reindex_text")
+    assert r.json() == {"indexed": 3}
+    after = client.get("/search", params={"q": "chunk", "mode": "bm25"}).json()["items"]
+    assert after == before and len(after) == 2
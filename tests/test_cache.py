@@ -0,0 +1,55 @@
+from __future__ import annotations
+import time
+from fastapi.testclient import TestClient
+
+from app.core.cache import LRUCache, bump_generation
+from app.graph.semantic import DIM, cache_key
+
+
+def test_lru_evicts_expires_and_follows_generation():
+    c = LRUCache(maxsize=2, ttl=None)
+    c.put("a", 1)
+    c.put("b", 2)
+    assert c.get("a") == 1          # "a" is now most recent
+    c.put("c", 3)                   # evicts "b"
+    assert c.get("b") is None and c.get("c") == 3
+
+    bump_generation()
+    assert c.get("a") is None       # stored before the write
+
+    t = LRUCache(maxsize=4, ttl=0.01)
+    t.put("x", 1)
+    time.sleep(0.02)
+    assert t.get("x") is None
+
+    s = c.stats()
+    assert (s["hits"], s["misses"], s["evictions"], s["stale"]) == (2, 2, 1, 1)
+    assert t.stats()["expired"] == 1
+
+
+def test_cache_key_quantizes_vector():
+    v = [0.1] * DIM
+    assert cache_key(v, 5, 200, None) == cache_key([0.1 + 1e-7] * DIM, 5, 200, None)
+    assert cache_key(v, 5, 200, None) != cache_key(v, 6, 200, None)
+    assert cache_key(v, 5, 200, None) != cache_key(v, 5, 200, "Doc")
+
+
+def test_semantic_cache_hits_until_ingest(client: TestClient):
+    client.post("/seed", params={"reset": True})
+    client.post("/debug/set_dummy_embeddings")
+    vec = [0.0] * DIM
+    vec[0] = 1.0
+    body = {"vector": vec, "k": 2}
+
+    before = client.get("/debug/cache").json()
+    first = client.post("/search/semantic", json=body).json()
+    assert client.post("/search/semantic", json=body).json() == first
+    after = client.get("/debug/cache").json()
+    assert after["misses"] == before["misses"] + 1
+    assert after["hits"] == before["hits"] + 1
+
+    doc = {"title": "Cache Buster", "sections": [{"title": "S", "chunks": ["x"]}]}
+    client.post("/ingest", json=doc)
+    client.post("/search/semantic", json=body)
+    final = client.get("/debug/cache").json()
+    assert final["stale"] == after["stale"] + 1 and final["generation"] > after["generation"]
@@ -0,0 +1,54 @@
+from __future__ import annotations
+import json
+from fastapi.testclient import TestClient
+
+
+def _ingest_three_docs(client: TestClient) -> list[str]:
+    client.post("/seed", params={"reset": True})
+    for d in range(3):
+        payload = {
+            "title": f"Paged {d}",
+            "sections": [{"title": f"S{i}", "chunks": [f"{d}.{i}.{j}" for j in range(3)]} for i in range(2)],
+        }
+        assert client.post("/ingest", json=payload).status_code == 201
+    return [i["text"] for i in client.get("/chunks", params={"limit": 1000}).json()["items"]]
+
+
+def test_chunks_keyset_pages_cover_everything_once(client: TestClient):
+    everything = _ingest_three_docs(client)
+    assert len(everything) == 3 + 18  # sample doc + ingested
+
+    seen: list[str] = []
+    after = None
+    while True:
+        params = {"limit": 4, **({"after": after} if after else {})}
+        body = client.get("/chunks", params=params).json()
+        seen += [i["text"] for i in body["items"]]
+        after = body["next"]
+        if after is None:
+            break
+    assert seen == everything
+
+
+def test_chunks_ndjson_stream(client: TestClient):
+    everything = _ingest_three_docs(client)
+
+    r = client.get("/chunks", params={"format": "ndjson"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert [x["text"] for x in lines] == everything
+
+    r2 = client.get("/chunks", params={"format": "ndjson", "limit": 5, "doc": "Paged 1"})
+    assert [json.loads(line)["text"] for line in r2.text.splitlines()] == [
+        "1.0.0", "1.0.1", "1.0.2", "1.1.0", "1.1.1",
+    ]
+
+    # A non-positive limit means "not given" in both formats
+    r3 = client.get("/chunks", params={"format": "ndjson", "limit": 0})
+    assert [json.loads(line)["text"] for line in r3.text.splitlines()] == everything
+    assert [i["text"] for i in client.get("/chunks", params={"limit": 0}).json()["items"]] == everything
+
+
+def test_chunks_bad_cursor(client: TestClient):
+    assert client.get("/chunks", params={"after": "not-a-cursor"}).status_code == 400
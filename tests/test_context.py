@@ -0,0 +1,76 @@
+from __future__ import annotations
+from fastapi.testclient import TestClient
+
+DOC = {
+    "title": "Context Notes",
+    "sections": [
+        {"title": "A", "chunks": ["a0", "a1", "a2"]},
+        {"title": "Empty", "chunks": []},
+        {"title": "B", "chunks": ["b0", "b1"]},
+    ],
+}
+
+
+def _ingest(client: TestClient) -> list[int]:
+    client.post("/seed", params={"reset": True})
+    r = client.post("/ingest", json=DOC)
+    assert r.status_code == 201
+    return r.json()["chunk_ids"]
+
+
+def _next_chunks() -> list[tuple[str, str]]:
+    from app.core.kuzu import connection, execute_all
+    with connection() as conn:
+        rows = execute_all(conn, """
+            MATCH (a:Chunk)-[:NextChunk]->(b:Chunk) RETURN a.text, b.text ORDER BY a.id
+        """).rows
+    return [(a, b) for a, b in rows]
+
+
+def test_ingest_chains_chunks_across_sections(client: TestClient):
+    _ingest(client)
+    # one chain per document (the seeded sample comes first), skipping "Empty"
+    assert _next_chunks() == [
+        ("Hello world", "Second chunk"), ("Second chunk", "Third chunk"),
+        ("a0", "a1"), ("a1", "a2"), ("a2", "b0"), ("b0", "b1"),
+    ]
+
+    before = _next_chunks()
+    r = client.post("/debug/relink_chunks")
+    assert r.status_code == 200
+    assert r.json()["linked"] == len(before)
+    assert _next_chunks() == before
+
+
+def test_context_merges_overlapping_windows(client: TestClient):
+    a0, a1, a2, b0, b1 = _ingest(client)
+
+    # window 1: a0..a2 around a1 and b0..b1 around b1 do not overlap
+    body = client.post("/context", json={"chunk_ids": [a1, b1, 999_999], "window": 1}).json()
+    assert [[c["text"] for c in p["chunks"]] for p in body["passages"]] == [["a0", "a1", "a2"], ["b0", "b1"]]
+    assert [p["hits"] for p in body["passages"]] == [[a1], [b1]]
+    assert body["passages"][0]["document"] == "Context Notes"
+    assert body["passages"][1]["chunks"][0]["section"] == "B"
+    assert body["passages"][0]["text"] == "a0\n\na1\n\na2"
+    assert body["missing"] == [999_999]
+    assert body["chars"] == 10 and not body["truncated"]
+
+    # window 2 makes them share a2 and b0: one passage, each chunk once
+    body = client.post("/context", json={"chunk_ids": [b1, a1], "window": 2}).json()
+    assert len(body["passages"]) == 1
+    assert [c["text"] for c in body["passages"][0]["chunks"]] == ["a0", "a1", "a2", "b0", "b1"]
+    assert body["passages"][0]["hits"] == [b1, a1]
+
+
+def test_context_stops_at_budget(client: TestClient):
+    _, a1, _, _, b1 = _ingest(client)
+
+    # hits first (4 chars), then nearest neighbours until the next would not fit
+    body = client.post("/context", json={"chunk_ids": [a1, b1], "window": 2, "max_chars": 7}).json()
+    assert body["truncated"] and body["chars"] == 6
+    assert [[c["text"] for c in p["chunks"]] for p in body["passages"]] == [["a0", "a1"], ["b1"]]
+
+    body = client.post("/context", json={"chunk_ids": [a1], "window": 1, "max_tokens": 1}).json()
+    assert [c["text"] for c in body["passages"][0]["chunks"]] == ["a1"]
+
+    assert client.post("/context", json={"chunk_ids": [a1], "window": 9}).status_code == 422
@@ -0,0 +1,70 @@
+from __future__ import annotations
+import asyncio
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+
+
+def test_executor_rejects_when_saturated(client: TestClient):
+    from app.core.db import DBExecutor, Saturated
+
+    ex = DBExecutor(workers=1, queue=1)
+    gate = threading.Event()
+
+    async def scenario() -> None:
+        running = asyncio.ensure_future(ex.call(gate.wait))
+        queued = asyncio.ensure_future(ex.call(lambda: "queued"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(Saturated):
+            await ex.call(lambda: "rejected")
+        gate.set()
+        assert await running is True and await queued == "queued"
+
+    asyncio.run(scenario())
+    stats = ex.stats()
+    assert stats["in_flight"] == 0
+    assert (stats["admitted"], stats["rejected"]) == (2, 1)
+
+
+def test_query_timeout_interrupts_kuzu(client: TestClient):
+    from app.core.db import DBExecutor, QueryTimeout
+    from app.core.kuzu import connection
+
+    client.post("/seed", params={"reset": True})
+    client.post("/ingest", json={"title": "T", "sections": [{"title": "S", "chunks": [str(i) for i in range(300)]}]})
+
+    def query(cypher: str):
+        with connection() as conn:
+            return conn.execute(cypher).get_next()
+
+    # 300^4 rows: minutes of work unless interrupted
+    slow = "MATCH (a:Chunk), (b:Chunk), (c:Chunk), (d:Chunk) WHERE a.ord + b.ord < c.ord + d.ord RETURN count(*)"
+    ex = DBExecutor(workers=1, queue=0, timeout=0.05)
+    t0 = time.perf_counter()
+    with pytest.raises(QueryTimeout) as exc:
+        asyncio.run(ex.call(query, slow))
+    assert isinstance(exc.value.__cause__, RuntimeError)  # Kùzu interrupted it
+    assert time.perf_counter() - t0 < 1.0
+    # The worker and its connection are free again
+    assert asyncio.run(ex.call(query, "MATCH (c:Chunk) RETURN count(*)"))[0] >= 300
+    assert ex.stats()["timeouts"] == 1
+
+
+def test_saturated_is_503(client: TestClient, monkeypatch):
+    from app.core import db
+
+    ex = db.DBExecutor(workers=1, queue=0)
+    gate = threading.Event()
+    monkeypatch.setattr(db, "_executor", ex)
+    blocker = threading.Thread(target=lambda: asyncio.run(ex.call(gate.wait)))
+    blocker.start()
+    try:
+        while ex.stats()["in_flight"] == 0:
+            time.sleep(0.01)
+        res = client.get("/search", params={"q": "x"})
+        assert res.status_code == 503 and res.headers["retry-after"] == "1"
+    finally:
+        gate.set()
+        blocker.join()
+    assert client.get("/search", params={"q": "x"}).status_code == 200
@@ -0,0 +1,76 @@
+from __future__ import annotations
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.graph.semantic import DIM, semantic_search, write_embeddings
+
+
+def _one_hot(n: int, col: int) -> np.ndarray:
+    v = np.zeros((n, DIM), dtype=np.float32)
+    v[:, col] = 1.0
+    return v
+
+
+def test_write_embeddings_replaces_and_keeps_table_writable(client: TestClient):
+    client.post("/seed", params={"reset": True})
+    r = client.post("/debug/set_dummy_embeddings", params={"batch_size": 2})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["updated"] == 3 and body["batches"] == 2 and body["rows_per_sec"] > 0
+
+    ids = [c["chunk_id"] for c in client.get("/chunks").json()["items"]]
+    hello = ids[0]  # "Hello world" (ord 0)
+
+    # Re-embed one chunk; the others keep their vectors.
+    stats = write_embeddings([(np.array([hello]), _one_hot(1, 7))])
+    assert stats["rows"] == 1
+    top = semantic_search(_one_hot(1, 7)[0].tolist(), k=1)
+    assert top[0]["chunk_id"] == hello and top[0]["distance"] < 1e-6
+    assert len(semantic_search(_one_hot(1, 0)[0].tolist(), k=3)) == 3
+
+    # New chunks can still be written and embedded after a rebuild.
+    doc = {"title": "After Rebuild", "sections": [{"title": "S", "chunks": ["fresh"]}]}
+    new_id = client.post("/ingest", json=doc).json()["chunk_ids"][0]
+    write_embeddings([(np.array([new_id]), _one_hot(1, 9))])
+    assert semantic_search(_one_hot(1, 9)[0].tolist(), k=1)[0]["chunk_id"] == new_id
+
+
+def test_write_embeddings_validates(client: TestClient):
+    client.post("/seed", params={"reset": True})
+    ids = [c["chunk_id"] for c in client.get("/chunks").json()["items"]]
+
+    with pytest.raises(ValueError, match="shape"):
+        write_embeddings([(np.array(ids), np.zeros((3, 8)))])
+    with pytest.raises(ValueError, match="duplicate"):
+        write_embeddings([(np.array(ids[:1]), _one_hot(1, 0)), (np.array(ids[:1]), _one_hot(1, 0))])
+    with pytest.raises(ValueError, match="do not belong"):
+        write_embeddings([(np.array([10**9]), _one_hot(1, 0))])
+
+
+def test_incremental_embeddings_and_freshness(client: TestClient, monkeypatch):
+    from app.core.config import settings
+
+    client.post("/seed", params={"reset": True})
+    assert client.post("/debug/set_dummy_embeddings").json()["mode"] == "rebuild"
+    status = client.get("/debug/vector_index").json()
+    assert status["index_exists"] and status["pending"] == 0 and status["freshness"] == 1.0
+    assert status["last_rebuild_seconds"] is not None
+
+    doc = {"title": "Later Doc", "sections": [{"title": "S", "chunks": ["late one", "late two"]}]}
+    new_ids = client.post("/ingest", json=doc).json()["chunk_ids"]
+    status = client.get("/debug/vector_index").json()
+    assert status["pending"] == 2 and status["freshness"] == 0.6
+
+    # 2 new rows vs 3 indexed: under a ratio of 1.0 this goes into the live index.
+    monkeypatch.setattr(settings, "embedding_rebuild_ratio", 1.0)
+    rebuilds = status["rebuilds"]
+    r = client.post("/debug/set_dummy_embeddings", params={"pending_only": True}).json()
+    assert r["updated"] == 2 and r["mode"] == "incremental"
+
+    status = client.get("/debug/vector_index").json()
+    assert status["pending"] == 0 and status["rebuilds"] == rebuilds
+    vec = [0.0] * DIM
+    vec[1] = 1.0  # "late two" and "Third chunk" both have ord 1
+    hits = {h["chunk_id"] for h in semantic_search(vec, k=2)}
+    assert new_ids[1] in hits
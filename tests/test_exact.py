@@ -0,0 +1,87 @@
+from __future__ import annotations
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.graph.exact import ExactStore
+from app.graph.semantic import DIM, choose_engine, encode_vector
+
+
+def test_exact_store_upsert_search_and_reload(tmp_path):
+    store = ExactStore(tmp_path / "vectors", dim=4)
+    store.upsert(np.array([1, 2, 3]), [np.eye(4, dtype=np.float32)[:3] * 5])
+    ids, dist = store.search(np.array([1.0, 0.1, 0, 0]), k=2)
+    assert ids.tolist() == [1, 2] and abs(dist[0]) < 0.01
+
+    store.upsert(np.array([2]), [np.array([[1.0, 0, 0, 0]])])  # replaces id 2
+    ids, dist = store.search(np.array([1.0, 0, 0, 0]), k=5)
+    assert ids.tolist() == [1, 2, 3] and np.allclose(dist, [0, 0, 1], atol=1e-6)
+    assert store.search(np.array([1.0, 0, 0, 0]), k=5, allowed=np.array([3]))[0].tolist() == [3]
+
+    again = ExactStore(tmp_path / "vectors", dim=4)
+    assert again.load() and len(again) == 3
+
+
+def test_exact_store_appends_segments_and_merges(tmp_path):
+    eye = np.eye(4, dtype=np.float32)
+    store = ExactStore(tmp_path / "vectors", dim=4)
+    store.upsert(np.arange(100), [np.tile(eye[0], (100, 1))])
+    store.upsert(np.array([100]), [eye[1:2]])  # a segment of its own
+    store.upsert(np.array([5]), [eye[2:3]])  # replaces a row; merges the two small segments
+    assert len(store) == 101
+    assert store.stats()["segments"] == 2 and store.stats()["dead_rows"] == 1
+    assert np.allclose(store.vectors(np.array([5, 100])), eye[[2, 1]])
+    assert store.search(eye[2], k=1)[0].tolist() == [5]
+
+    store.upsert(np.arange(200, 260), [np.tile(eye[3], (60, 1))])  # large enough to merge down to one
+    assert store.stats()["segments"] == 1 and store.stats()["dead_rows"] == 0
+    assert len(list((tmp_path / "vectors").glob("s*.npy"))) == 2  # merged-away files are gone
+
+    again = ExactStore(tmp_path / "vectors", dim=4)
+    assert again.load() and len(again) == 161
+    assert np.allclose(again.vectors(np.array([5])), eye[[2]])
+
+
+def test_exact_store_rejects_mismatched_manifest(tmp_path):
+    import json
+    store = ExactStore(tmp_path / "vectors", dim=4)
+    store.upsert(np.array([1, 2]), [np.eye(4, dtype=np.float32)[:2]])
+    manifest = tmp_path / "vectors" / "manifest.json"
+    meta = json.loads(manifest.read_text())
+    meta["segments"][0]["rows"] = 3  # e.g. files from another write
+    manifest.write_text(json.dumps(meta))
+
+    again = ExactStore(tmp_path / "vectors", dim=4)
+    assert not again.load() and len(again) == 0  # get_exact_store then rebuilds from the table
+
+
+def test_choose_engine(monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "exact_max_candidates", 100)
+    assert choose_engine("auto", 100) == "exact"
+    assert choose_engine("auto", 101) == "hnsw"
+    assert choose_engine("hnsw", 1) == "hnsw"
+
+
+def test_exact_engine_matches_hnsw(client: TestClient):
+    client.post("/seed", params={"reset": True})
+    client.post("/debug/set_dummy_embeddings")
+    vec = [0.0] * DIM
+    vec[1] = 1.0  # ord 1 -> "Third chunk"
+
+    def items(engine: str, **extra) -> list[dict]:
+        body = {"vector": vec, "k": 3, "engine": engine, **extra}
+        return client.post("/search/semantic", json=body).json()["items"]
+
+    hnsw, exact = items("hnsw"), items("exact")
+    assert exact[0]["text"] == "Third chunk" and abs(exact[0]["distance"]) < 1e-6
+    assert [r["chunk_id"] for r in exact] == [r["chunk_id"] for r in hnsw]
+    assert set(exact[0]) == set(hnsw[0])
+    assert items("auto", doc="No Such Doc") == []
+
+    raw = client.post(
+        "/search/semantic/raw", params={"k": 1, "engine": "exact"},
+        content=np.asarray(vec, dtype="<f4").tobytes(),
+    ).json()["items"]
+    assert raw[0]["chunk_id"] == exact[0]["chunk_id"]
+    assert client.post("/search/semantic", json={"vector_b64": encode_vector(vec), "engine": "bogus"}).status_code == 422
+    assert client.get("/debug/vector_index").json()["exact_store"]["rows"] == 3
@@ -0,0 +1,41 @@
+from __future__ import annotations
+from fastapi.testclient import TestClient
+
+from app.core.results import Rows
+from app.graph.hybrid import fuse
+
+
+def test_fuse_sums_reciprocal_ranks():
+    ctx = ["document_id", "document", "section_id", "section", "chunk_id", "chunk_ord", "text"]
+    lexical = Rows(ctx + ["score"], [[1, "D", 1, "S", 10, 0, "a", 3.0], [1, "D", 1, "S", 11, 1, "b", 2.0]])
+    vector = Rows(ctx + ["distance"], [[1, "D", 1, "S", 11, 1, "b", 0.1], [1, "D", 1, "S", 12, 2, "c", 0.2]])
+
+    fused = fuse(lexical, vector, k=10, rrf_k=60).records()
+
+    assert [r["chunk_id"] for r in fused] == [11, 10, 12]
+    assert fused[0]["score"] == 1 / 62 + 1 / 61
+    assert fused[0]["lexical_rank"] == 2 and fused[0]["vector_rank"] == 1
+    assert fused[0]["lexical_score"] == 2.0 and fused[0]["vector_distance"] == 0.1
+    assert fused[2]["lexical_rank"] is None and fused[2]["lexical_score"] is None
+
+    # Weights shift the order; k truncates.
+    top = fuse(lexical, vector, k=1, vector_weight=0.0).records()
+    assert [r["chunk_id"] for r in top] == [10]
+
+
+def test_search_hybrid_endpoint(client: TestClient):
+    client.post("/seed", params={"reset": True})
+    client.post("/debug/set_dummy_embeddings")
+    vec = [0.0] * 384
+    vec[1] = 1.0  # one-hot of chunk_ord 1 -> "Third chunk"
+
+    r = client.post("/search/hybrid", json={"q": "chunk", "vector": vec, "k": 3})
+    assert r.status_code == 200
+    body = r.json()
+    items = body["items"]
+    assert items[0]["text"] == "Third chunk"
+    assert items[0]["lexical_rank"] is not None and items[0]["vector_rank"] == 1
+    assert {i["text"] for i in items} == {"Hello world", "Second chunk", "Third chunk"}
+    assert set(body["timings"]) == {"lexical_ms", "vector_ms", "fusion_ms", "total_ms"}
+
+    assert client.post("/search/hybrid", json={"q": "chunk", "vector": [1.0]}).status_code == 400
@@ -0,0 +1,90 @@
+from __future__ import annotations
+import pytest
+from fastapi.testclient import TestClient
+
+
+def test_ingest_ids_follow_input_order(client: TestClient):
+    client.post("/seed", params={"reset": True})
+    payload = {
+        "title": "Ordered Notes",
+        "sections": [
+            {"title": "A", "chunks": ["a0", "a1"]},
+            {"title": "Empty", "chunks": []},
+            {"title": "B", "chunks": ["b0"]},
+        ],
+    }
+    r = client.post("/ingest", json=payload)
+    assert r.status_code == 201
+    body = r.json()
+    assert body["sections_created"] == 3
+    assert body["chunks_created"] == 3
+
+    items = client.get("/chunks", params={"doc": "Ordered Notes"}).json()["items"]
+    assert [i["chunk_id"] for i in items] == body["chunk_ids"]
+    assert [i["text"] for i in items] == ["a0", "a1", "b0"]
+
+
+def test_ingest_bulk(client: TestClient):
+    client.post("/seed", params={"reset": True})
+    docs = [
+        {"title": "Bulk One", "sections": [{"title": "S", "chunks": ["x", "y"]}]},
+        {"title": "Bulk Two", "sections": [{"title": "S", "chunks": ["z"]}]},
+    ]
+    r = client.post("/ingest/bulk", json=docs)
+    assert r.status_code == 201
+    body = r.json()
+    assert body["count"] == 2
+    assert body["chunks_created"] == 3
+
+    # A batch with an existing title is rejected as a whole
+    r2 = client.post("/ingest/bulk", json=[
+        {"title": "Bulk Three", "sections": []},
+        {"title": "Bulk One", "sections": []},
+    ])
+    assert r2.status_code == 409
+    assert client.get("/chunks", params={"doc": "Bulk Three"}).json()["count"] == 0
+
+
+def test_concurrent_ingests_are_serialized(client: TestClient):
+    from concurrent.futures import ThreadPoolExecutor
+    from app.api.schemas import IngestDocument
+    from app.graph.repo import DocumentExists
+    from app.replica import write
+
+    client.post("/seed", params={"reset": True})
+
+    def ingest(title: str) -> str:
+        doc = IngestDocument(title=title, sections=[{"title": "S", "chunks": ["c0", "c1"]}])
+        try:
+            write("ingest", doc)
+            return "ok"
+        except DocumentExists:
+            return "exists"
+
+    # Kùzu rejects a second concurrent write transaction instead of waiting
+    with ThreadPoolExecutor(8) as pool:
+        assert list(pool.map(ingest, [f"T{i}" for i in range(8)])) == ["ok"] * 8
+        assert sorted(pool.map(ingest, ["Same"] * 8)) == ["exists"] * 7 + ["ok"]
+    assert client.get("/chunks", params={"limit": 100}).json()["count"] == 3 + 9 * 2
+
+
+def test_titles_are_created_if_absent(client: TestClient):
+    from app.api.schemas import IngestDocument
+    from app.core.kuzu import connection, execute
+    from app.graph.ingest import ingest_documents
+    from app.graph.repo import DocumentExists, create_document, document_exists, existing_titles
+
+    client.post("/seed", params={"reset": True})
+    docs = [IngestDocument(title=t, sections=[{"title": "S", "chunks": ["c"]}]) for t in ("A", "B", "A")]
+    with pytest.raises(DocumentExists, match="'A'"):
+        ingest_documents(docs)
+    assert not document_exists("A") and not document_exists("B")  # rolled back
+
+    ingest_documents(docs[:2])
+    assert existing_titles(["A", "B", "C", "Sample Doc"]) == {"A", "B", "Sample Doc"}
+    with pytest.raises(DocumentExists):
+        create_document("B")
+    assert create_document("C") > 0
+    with connection() as conn:
+        rows = execute(conn, "MATCH (t:DocumentTitle), (d:Document) WHERE t.doc = d.id AND t.title = d.title RETURN count(*)")
+        assert rows.get_next() == [4]
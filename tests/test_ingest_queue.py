@@ -0,0 +1,84 @@
+from __future__ import annotations
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+
+
+def _doc(title: str, *chunks: str) -> dict:
+    return {"title": title, "sections": [{"title": "S", "chunks": list(chunks) or ["x"]}]}
+
+
+def _wait(client: TestClient, job_id: str) -> dict:
+    for _ in range(200):
+        job = client.get(f"/ingest/jobs/{job_id}").json()
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+@pytest.fixture
+def ingest_queue():
+    from app.graph.ingest_queue import IngestQueue, set_ingest_queue
+
+    q = IngestQueue(max_wait=0.3)  # wide window so the submissions below share a batch
+    set_ingest_queue(q)
+    yield q
+    set_ingest_queue(None)
+
+
+def test_queued_ingest_coalesces_and_keeps_409(client: TestClient, ingest_queue):
+    client.post("/seed", params={"reset": True})
+    submissions = [
+        ("/ingest", _doc("Alpha", "queued alpha")),
+        ("/ingest", _doc("Beta", "queued beta")),
+        ("/ingest", _doc("Alpha", "second alpha")),      # taken earlier in the batch
+        ("/ingest", _doc("Sample Doc")),                 # exists in the database
+        ("/ingest/bulk", [_doc("Gamma"), _doc("Gamma")]),  # repeats within the job
+        ("/ingest/bulk", [_doc("Delta"), _doc("Epsilon")]),
+    ]
+    jobs = []
+    for path, body in submissions:
+        res = client.post(path, params={"queue": True}, json=body)
+        assert res.status_code == 202 and res.json()["status"] == "queued"
+        assert res.headers["location"] == f"/ingest/jobs/{res.json()['job_id']}"
+        jobs.append(res.json()["job_id"])
+
+    alpha, beta, alpha2, sample, gamma, bulk = (_wait(client, j) for j in jobs)
+    assert [j["status"] for j in (alpha, beta, alpha2, sample, gamma, bulk)] == [
+        "done", "done", "conflict", "conflict", "conflict", "done",
+    ]
+    assert alpha2["error"] == "Document with title 'Alpha' already exists"
+    assert alpha["result"]["chunks_created"] == 1 and bulk["result"]["count"] == 2
+    assert alpha["batch_jobs"] == 3  # Alpha, Beta and the bulk job in one transaction
+    assert ingest_queue.stats()["batches"] == 1
+
+    hits = client.get("/search", params={"q": "alpha"}).json()["items"]
+    assert [h["text"] for h in hits] == ["queued alpha"]
+    assert client.get("/ingest/jobs/nope").status_code == 404
+
+
+def test_queue_full_is_503(client: TestClient):
+    from app.graph.ingest_queue import IngestQueue, QueueFull, set_ingest_queue
+
+    gate = threading.Event()
+
+    def blocked(fn, *args):
+        gate.wait()
+        return fn(*args)
+
+    q = IngestQueue(max_pending=1, max_wait=0, run=blocked)
+    set_ingest_queue(q)
+    try:
+        q.submit([])  # taken by the writer thread, which then blocks
+        while q.stats()["pending"]:
+            time.sleep(0.01)
+        q.submit([])  # fills the queue
+        with pytest.raises(QueueFull):
+            q.submit([])
+        res = client.post("/ingest", params={"queue": True}, json=_doc("Full"))
+        assert res.status_code == 503 and res.headers["retry-after"] == "1"
+    finally:
+        gate.set()
+        set_ingest_queue(None)
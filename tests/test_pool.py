@@ -0,0 +1,67 @@
+from __future__ import annotations
+import threading
+import pytest
+from fastapi.testclient import TestClient
+
+
+def test_pool_reentrant_and_bounded(client: TestClient):
+    from app.core.kuzu import ConnectionPool, PoolExhausted
+
+    pool = ConnectionPool(max_size=1, timeout=0.05)
+    with pool.connection() as outer:
+        # Same thread -> same connection, no second slot taken
+        with pool.connection() as inner:
+            assert inner is outer
+        assert pool.stats()["in_use"] == 1
+
+        # Another thread has to wait and times out
+        errors: list[BaseException] = []
+
+        def take() -> None:
+            try:
+                with pool.connection():
+                    pass
+            except BaseException as e:
+                errors.append(e)
+
+        t = threading.Thread(target=take)
+        t.start()
+        t.join()
+        assert len(errors) == 1 and isinstance(errors[0], PoolExhausted)
+
+    stats = pool.stats()
+    assert stats["created"] == 1
+    assert stats["in_use"] == 0
+    assert stats["timeouts"] == 1
+
+
+def test_requests_reuse_connections(client: TestClient):
+    client.post("/seed", params={"reset": True})
+    before = client.get("/debug/pool").json()
+    for _ in range(5):
+        assert client.get("/chunks").status_code == 200
+    after = client.get("/debug/pool").json()
+    assert after["created"] <= after["max_size"]
+    assert after["created"] == before["created"]
+    assert after["reused"] >= before["reused"] + 5
+
+
+def test_pool_rejects_zero_size():
+    from app.core.kuzu import ConnectionPool
+    with pytest.raises(ValueError):
+        ConnectionPool(max_size=0)
+
+
+def test_closed_pool_drops_released_connections(client: TestClient):
+    from app.core.kuzu import ConnectionPool, PoolClosed
+
+    pool = ConnectionPool(max_size=2)
+    idle = pool.acquire()
+    busy = pool.acquire()
+    pool.release(idle)
+    pool.close()  # closes the idle one; `busy` is still out
+    assert (pool.stats()["created"], pool.stats()["idle"]) == (1, 0)
+    pool.release(busy)
+    assert (pool.stats()["created"], pool.stats()["idle"], pool.stats()["in_use"]) == (0, 0, 0)
+    with pytest.raises(PoolClosed):
+        pool.acquire()
@@ -0,0 +1,71 @@
+from __future__ import annotations
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.graph.exact import ExactStore
+from app.graph.quantized import QuantizedStore, recall_at_k
+from app.graph.semantic import DIM
+
+
+def test_int8_and_pq_recall_with_rescoring(tmp_path):
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((20, DIM))
+    x = (centers[rng.integers(0, 20, 1000)] + 0.5 * rng.standard_normal((1000, DIM))).astype(np.float32)
+    exact = ExactStore(tmp_path / "vectors", DIM)
+    exact.replace([(np.arange(1000), x)])
+    queries = x[:20] + 0.1 * rng.standard_normal((20, DIM)).astype(np.float32)
+
+    int8 = QuantizedStore(exact, "int8")
+    assert int8.search(queries[0], 5)[0].tolist()  # builds lazily
+    assert int8.stats()["bytes_per_vector"] == DIM + 8
+    assert recall_at_k(int8, queries, 10) >= 0.9
+    assert recall_at_k(int8, queries, 10, rescore=40) == 1.0
+
+    pq = QuantizedStore(exact, "pq", pq_m=48)
+    pq.build()
+    assert pq.stats()["bytes_per_vector"] == 48 + 8
+    assert recall_at_k(pq, queries, 10, rescore=100) >= 0.95
+
+    ids, dist, scored = int8.search(queries[0], 3, rescore=30, allowed=np.array([1, 2, 3, 4]))
+    assert set(ids.tolist()) <= {1, 2, 3, 4} and scored == 4
+    assert np.allclose(dist, 1.0 - exact.vectors(ids) @ (queries[0] / np.linalg.norm(queries[0])), atol=1e-5)
+
+    exact.upsert(np.array([5000]), [queries[:1]])  # the store follows writes
+    assert int8.search(queries[0], 1, rescore=10)[0].tolist() == [5000]
+
+
+def test_int8_encodes_new_segments_and_refits_on_new_peaks(tmp_path):
+    x = np.random.default_rng(1).standard_normal((200, DIM)).astype(np.float32)
+    exact = ExactStore(tmp_path / "vectors", DIM)
+    exact.replace([(np.arange(200), x)])
+    store = QuantizedStore(exact, "int8")
+    store.build()
+    first, scale = store._codes[0], store.codec.scale.copy()
+
+    exact.upsert(np.array([1000]), [x[:1] * 0.5])  # same direction: inside the trained range
+    assert store.search(x[0], 2)[0].tolist() == [0, 1000]
+    assert len(store._codes) == 2 and store._codes[0] is first  # only the new segment was encoded
+    assert np.array_equal(store.codec.scale, scale)
+
+    spike = np.zeros((1, DIM), dtype=np.float32)
+    spike[0, 0] = 1.0  # far beyond any trained value of dimension 0
+    exact.upsert(np.array([1001]), [spike])
+    assert store.search(spike[0], 1)[0].tolist() == [1001]
+    assert store._codes[0] is not first and store.codec.scale[0] > scale[0]
+
+
+def test_quantized_engine_and_status(client: TestClient):
+    client.post("/seed", params={"reset": True})
+    client.post("/debug/set_dummy_embeddings")
+    vec = [0.0] * DIM
+    vec[1] = 1.0
+    body = {"vector": vec, "k": 3}
+    exact = client.post("/search/semantic", json={**body, "engine": "exact"}).json()
+    quant = client.post("/search/semantic", json={**body, "engine": "quantized"}).json()
+    assert [r["chunk_id"] for r in quant["items"]] == [r["chunk_id"] for r in exact["items"]]
+    assert quant["search"]["engine"] == "quantized" and quant["search"]["candidates"] == 3
+
+    status = client.get("/debug/quantized", params={"queries": 3, "k": 1}).json()
+    assert status["kind"] == "int8" and status["rows"] == 3
+    assert status["bytes_per_vector"] < status["float32_bytes_per_vector"]
+    assert status["recall_at_k_rescored"] == 1.0
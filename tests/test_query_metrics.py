@@ -0,0 +1,48 @@
+from __future__ import annotations
+from fastapi.testclient import TestClient
+
+
+def test_queries_are_measured_per_statement(client: TestClient):
+    from app.core.kuzu import QUERY_ROWS, QUERY_SECONDS
+
+    client.post("/seed", params={"reset": True})
+    before = QUERY_SECONDS.count("list_chunks", "total")
+    assert client.get("/chunks").status_code == 200
+    assert QUERY_SECONDS.count("list_chunks", "total") == before + 1
+    assert QUERY_ROWS.count("list_chunks") == before + 1
+
+    text = client.get("/metrics").text
+    assert 'kuzu_query_seconds_count{query="list_chunks",phase="fetch"}' in text
+    assert 'kuzu_query_seconds_bucket{query="list_chunks",phase="execute",le="+Inf"}' in text
+    assert 'kuzu_query_rows_sum{query="list_chunks"}' in text
+
+
+def test_slow_query_log_captures_profile(client: TestClient, monkeypatch):
+    from app.core.config import settings
+    from app.core.kuzu import QUERY_ERRORS, connection, execute
+
+    client.post("/seed", params={"reset": True})
+    monkeypatch.setattr(settings, "slow_query_ms", 1e-6)  # everything is slow
+    monkeypatch.setattr(settings, "slow_query_profile", True)
+    assert client.get("/search", params={"q": "graph"}).status_code == 200
+    slow = client.get("/debug/slow_queries").json()["queries"]
+    entry = next(q for q in slow if q["query"] == "search_chunks")
+    assert entry["params"] == ["lim", "pat"]
+    assert {"plan_ms", "execute_ms", "fetch_ms", "total_ms"} <= entry.keys()
+    assert entry["plan"] and "PROFILE failed" not in entry["plan"]
+
+    # Writes are logged but never re-run under PROFILE
+    with connection() as conn:
+        execute(conn, "CREATE (d:Document {title: 'slow write'})", name="test_slow_write")
+    entry = client.get("/debug/slow_queries").json()["queries"][0]
+    assert entry["query"] == "test_slow_write" and entry["plan"] is None
+    with connection() as conn:
+        assert execute(conn, "MATCH (d:Document {title: 'slow write'}) RETURN count(d)").get_next() == [1]
+
+    monkeypatch.setattr(settings, "slow_query_ms", 0)
+    with connection() as conn:
+        try:
+            execute(conn, "MATCH (x:NoSuchTable) RETURN x", name="test_bad_query")
+        except RuntimeError:
+            pass
+    assert QUERY_ERRORS.value("test_bad_query") == 1
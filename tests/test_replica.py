@@ -0,0 +1,81 @@
+from __future__ import annotations
+from multiprocessing.connection import Client
+import kuzu
+import pytest
+from fastapi.testclient import TestClient
+
+
+def test_publish_snapshots(client: TestClient, tmp_path):
+    from app.replica import current_version, publish
+
+    client.post("/seed", params={"reset": True})
+    client.post("/debug/set_dummy_embeddings")
+    assert current_version(tmp_path) == 0
+    for _ in range(3):
+        version = publish(tmp_path, keep=2, grace=0)
+    assert version == current_version(tmp_path) == 3
+    assert sorted(p.name for p in tmp_path.glob("v*")) == ["v000002", "v000003"]
+
+    snap = tmp_path / "v000003"
+    files = {p.name for p in (snap / "vectors").iterdir()}
+    segments = files - {"manifest.json"}
+    assert "manifest.json" in files and segments and all(f.endswith(".npy") for f in segments)
+    conn = kuzu.Connection(kuzu.Database(str(snap / "db.kuzu"), read_only=True))
+    assert conn.execute("MATCH (c:Chunk) RETURN count(c)").get_next() == [3]
+    with pytest.raises(RuntimeError):
+        conn.execute("CREATE (:Document {title: 'nope'})")
+
+
+def test_writer_runs_forwarded_writes(client: TestClient, tmp_path):
+    from app.api.schemas import IngestDocument
+    from app.replica import WriterServer, current_version
+
+    client.post("/seed", params={"reset": True})
+    server = WriterServer(tmp_path)
+    server.start()
+    try:
+        conn = Client(str(tmp_path / "writer.sock"), family="AF_UNIX", authkey=(tmp_path / "writer.key").read_bytes())
+        doc = {"title": "Forwarded", "sections": [{"title": "S", "chunks": ["one", "two"]}]}
+        conn.send(("ingest", (IngestDocument(**doc),), {}))
+        status, result, version = conn.recv()
+        assert (status, result["chunks_created"], version) == ("ok", 2, 1)
+
+        # Duplicate title: the writer re-checks, nothing is published
+        conn.send(("ingest", (IngestDocument(**doc),), {}))
+        status, error, version = conn.recv()
+        assert status == "error" and "already exists" in str(error) and version is None
+        assert current_version(tmp_path) == 1
+        conn.close()
+    finally:
+        server.close()
+    assert client.get("/search", params={"q": "two"}).json()["count"] == 1
+
+
+def test_writer_batches_publishes(client: TestClient, tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    from app.api.schemas import IngestDocument
+    from app.replica import WriterServer, current_version
+
+    client.post("/seed", params={"reset": True})
+    server = WriterServer(tmp_path, delay=0.2)
+    docs = [IngestDocument(title=f"Batched {i}", sections=[]) for i in range(4)]
+    with ThreadPoolExecutor(len(docs)) as pool:
+        versions = list(pool.map(lambda d: server.run("ingest", d)[1], docs))
+    # every write is in the snapshot it was answered with, but they share publishes
+    assert max(versions) == current_version(tmp_path) < len(docs)
+
+
+def test_prune_keeps_snapshots_in_use(tmp_path):
+    import os
+    from app.replica import _lease, prune
+
+    for v in (1, 2, 3, 4):
+        (tmp_path / f"v{v:06d}").mkdir()
+    _lease(tmp_path, 2)  # this process serves v2
+    assert prune(tmp_path, keep=1, grace=0) == [1]
+
+    (tmp_path / "readers" / str(os.getpid())).unlink()
+    (tmp_path / "readers" / "999999999").write_text("2")  # a worker that is gone
+    assert prune(tmp_path, keep=1, grace=3600) == []  # superseded too recently
+    assert prune(tmp_path, keep=1, grace=0) == [2, 3]
+    assert not (tmp_path / "readers" / "999999999").exists()
@@ -0,0 +1,24 @@
+from __future__ import annotations
+from fastapi.testclient import TestClient
+
+
+def test_chunks_columns_shape_matches_records(client: TestClient):
+    client.post("/seed", params={"reset": True})
+
+    records = client.get("/chunks").json()
+    columns = client.get("/chunks", params={"shape": "columns"}).json()
+
+    assert columns["count"] == records["count"] == 3
+    assert "items" not in columns
+    rebuilt = [dict(zip(columns["columns"], row)) for row in columns["rows"]]
+    assert rebuilt == records["items"]
+
+
+def test_rows_helpers():
+    from app.core.results import Rows, dumps, payload
+
+    rows = Rows(columns=["id", "text"], rows=[[1, "a"], [2, "b"]])
+    assert rows.column("text") == ["a", "b"]
+    assert rows.records() == [{"id": 1, "text": "a"}, {"id": 2, "text": "b"}]
+    assert payload(rows, "columns", took_ms=1)["took_ms"] == 1
+    assert dumps({"x": "ü"}) in (b'{"x":"\xc3\xbc"}',)
@@ -0,0 +1,102 @@
+from __future__ import annotations
+from fastapi.testclient import TestClient
+
+
+def test_schema_is_applied_once_per_fingerprint(client: TestClient, monkeypatch):
+    from app.core.kuzu import connection
+    from app.graph import schema
+
+    # conftest already applied it; a reset keeps the record
+    client.post("/seed", params={"reset": True})
+    assert schema.ensure_schema() is False
+    with connection() as conn:
+        assert schema.applied_fingerprint(conn) == schema.schema_fingerprint()
+
+    monkeypatch.setattr(schema, "schema_fingerprint", lambda: "changed-ddl")
+    assert schema.ensure_schema() is True
+    assert schema.ensure_schema() is False
+    monkeypatch.undo()
+    assert schema.ensure_schema() is True  # back to the real DDL
+    assert client.get("/chunks").json()["count"] == 3
+
+
+def test_loaded_extension_is_not_reinstalled(client: TestClient):
+    from app.core.kuzu import QUERY_SECONDS, connection
+    from app.graph.schema import ensure_extension
+
+    def calls() -> list[int]:
+        return [QUERY_SECONDS.count(name, "total") for name in ("install_extension", "load_extension")]
+
+    before = calls()
+    with connection() as conn:
+        ensure_extension(conn, "vector")  # loaded by ensure_schema in conftest
+    assert calls() == before
+
+
+def test_schema_backfills_title_lookup(client: TestClient, monkeypatch):
+    from app.core.kuzu import connection, execute
+    from app.graph import schema
+    from app.graph.repo import document_exists
+
+    client.post("/seed", params={"reset": True})
+    with connection() as conn:
+        execute(conn, "MATCH (t:DocumentTitle) DELETE t")  # as in a database from before DocumentTitle
+    assert not document_exists("Sample Doc")
+
+    monkeypatch.setattr(schema, "schema_fingerprint", lambda: "older-ddl")
+    assert schema.ensure_schema() is True
+    assert document_exists("Sample Doc")
+    assert client.post("/ingest", json={"title": "Sample Doc", "sections": []}).status_code == 409
+    monkeypatch.undo()
+    assert schema.ensure_schema() is True
+
+
+def test_schema_migrates_legacy_chunk_embeddings(client: TestClient, tmp_path):
+    import kuzu
+    from app.core.cache import bump_generation
+    from app.core.kuzu import connection, execute, get_db, use_database
+    from app.graph import schema
+    from app.graph.semantic import DIM, INDEX_NAME, index_status, semantic_search_rows, use_exact_store
+
+    def one_hot(i: int) -> list[float]:
+        v = [0.0] * DIM
+        v[i] = 1.0
+        return v
+
+    home = get_db()
+    use_database(kuzu.Database(str(tmp_path / "legacy.kuzu")))
+    use_exact_store(str(tmp_path / "vectors"))
+    bump_generation()  # cached results are from the other database
+    try:
+        with connection() as conn:
+            # The schema from before ChunkEmbedding: vectors (and their index) on Chunk
+            schema.ensure_extension(conn, "vector")
+            execute(conn, "CREATE NODE TABLE Document(id SERIAL PRIMARY KEY, title STRING)")
+            execute(conn, "CREATE NODE TABLE Section(id SERIAL PRIMARY KEY, title STRING, ord INT32)")
+            execute(conn, f"CREATE NODE TABLE Chunk(id SERIAL PRIMARY KEY, text STRING, ord INT32, embedding FLOAT[{DIM}])")
+            execute(conn, "CREATE REL TABLE ContainsDocSection(FROM Document TO Section, ONE_MANY)")
+            execute(conn, "CREATE REL TABLE ContainsSectionChunk(FROM Section TO Chunk, ONE_MANY)")
+            execute(conn, """
+                CREATE (d:Document {title: 'Old'})-[:ContainsDocSection]->(s:Section {title: 'S', ord: 0}),
+                       (s)-[:ContainsSectionChunk]->(:Chunk {text: 'a', ord: 0}),
+                       (s)-[:ContainsSectionChunk]->(:Chunk {text: 'b', ord: 1}),
+                       (s)-[:ContainsSectionChunk]->(:Chunk {text: 'pending', ord: 2})
+            """)
+            for i, text in ((1, "a"), (2, "b")):
+                execute(conn, "MATCH (c:Chunk {text: $t}) SET c.embedding = $vec", {"t": text, "vec": one_hot(i)})
+            execute(conn, f"CALL CREATE_VECTOR_INDEX('Chunk', '{INDEX_NAME}', 'embedding', metric := 'cosine')")
+
+        assert schema.ensure_schema() is True
+        for engine in ("hnsw", "exact"):
+            rows = semantic_search_rows(one_hot(2), k=1, engine=engine)
+            assert rows.column("text") == ["b"]
+        status = index_status()
+        assert status["index_exists"] and (status["chunks"], status["embedded"]) == (3, 2)
+
+        # Once ChunkEmbedding has rows, the old column is never copied again
+        with connection() as conn:
+            assert schema._migrate_embeddings(conn) == 0
+    finally:
+        use_database(home)
+        use_exact_store(None)
+        bump_generation()
@@ -0,0 +1,42 @@
+from __future__ import annotations
+from fastapi.testclient import TestClient
+
+
+def _one_hot(i: int) -> list[float]:
+    v = [0.0] * 384
+    v[i] = 1.0
+    return v
+
+
+def test_semantic_batch_matches_single_queries(client: TestClient):
+    client.post("/seed", params={"reset": True})
+    client.post("/debug/set_dummy_embeddings")
+
+    body = {
+        "k": 1,
+        "queries": [
+            {"vector": _one_hot(0)},
+            {"vector": _one_hot(1)},
+            {"vector": _one_hot(0), "k": 3},
+            {"vector": _one_hot(1), "doc": "No Such Doc"},
+        ],
+    }
+    r = client.post("/search/semantic/batch", json=body)
+    assert r.status_code == 200
+    out = r.json()
+    assert out["count"] == 4
+    assert [res["count"] for res in out["results"]] == [1, 1, 3, 0]
+    assert out["results"][1]["items"][0]["text"] == "Third chunk"
+    assert all("elapsed_ms" in res for res in out["results"])
+    assert out["timings"]["queries"] == 4
+    assert out["timings"]["max_query_ms"] <= out["timings"]["sum_query_ms"]
+
+    single = client.post("/search/semantic", json={"vector": _one_hot(0), "k": 3}).json()
+    assert single["items"] == out["results"][2]["items"]
+
+
+def test_semantic_batch_rejects_bad_vector(client: TestClient):
+    body = {"queries": [{"vector": _one_hot(0)}, {"vector": [1.0, 2.0]}]}
+    r = client.post("/search/semantic/batch", json=body)
+    assert r.status_code == 400
+    assert "queries[1]" in r.json()["detail"]
@@ -0,0 +1,56 @@
+from __future__ import annotations
+from fastapi.testclient import TestClient
+
+from app.graph.semantic import DIM
+
+
+def test_doc_filter_returns_k_rows(client: TestClient):
+    client.post("/seed", params={"reset": True})
+    big = {"title": "Big", "sections": [{"title": "S", "chunks": [f"big {i}" for i in range(300)]}]}
+    small = {"title": "Small", "sections": [{"title": "S", "chunks": ["a", "b", "c"]}]}
+    client.post("/ingest", json=big)
+    client.post("/ingest", json=small)
+    client.post("/debug/set_dummy_embeddings")  # one-hot by ord
+
+    vec = [0.0] * DIM
+    vec[200] = 1.0  # nearest is "big 200"; every Small chunk is at distance 1
+    body = {"vector": vec, "k": 3, "doc": "Small", "engine": "hnsw"}
+    res = client.post("/search/semantic", json=body).json()
+    assert sorted(r["text"] for r in res["items"]) == ["a", "b", "c"]
+    assert {r["document"] for r in res["items"]} == {"Small"}
+    # 3 of 303 vectors: too selective for the index, so the document is scanned
+    assert res["search"] == {"engine": "hnsw", "candidates": 3, "rounds": 0, "fallback": "exact"}
+
+    big_res = client.post("/search/semantic", json={**body, "doc": "Big"}).json()
+    assert big_res["items"][0]["text"] == "big 200" and len(big_res["items"]) == 3
+    assert big_res["search"]["rounds"] >= 1 and big_res["search"]["candidates"] >= 12
+
+    unfiltered = client.post("/search/semantic", json={"vector": vec, "k": 1}).json()
+    assert unfiltered["items"][0]["text"] == "big 200"
+    assert unfiltered["search"] == {"engine": "hnsw", "candidates": 1, "rounds": 1, "fallback": None}
+
+    exact = client.post("/search/semantic", json={**body, "engine": "auto"}).json()
+    assert exact["search"]["engine"] == "exact" and exact["search"]["candidates"] == 3
+
+
+def test_doc_filter_ignores_chunks_without_embeddings(client: TestClient):
+    import numpy as np
+    from app.graph.semantic import write_embeddings
+
+    client.post("/seed", params={"reset": True})
+    client.post("/ingest", json={"title": "Big", "sections": [{"title": "S", "chunks": [f"big {i}" for i in range(300)]}]})
+    client.post("/ingest", json={"title": "Mixed", "sections": [{"title": "S", "chunks": [f"mixed {i}" for i in range(100)]}]})
+    # Everything but the last 98 chunks of "Mixed" gets a one-hot embedding by ord
+    rows = client.get("/chunks", params={"limit": 1000}).json()["items"]
+    embedded = [r for r in rows if r["document"] != "Mixed" or r["chunk_ord"] < 2]
+    vecs = np.zeros((len(embedded), DIM), dtype=np.float32)
+    vecs[np.arange(len(embedded)), [r["chunk_ord"] % DIM for r in embedded]] = 1.0
+    write_embeddings([([r["chunk_id"] for r in embedded], vecs)])
+
+    vec = [0.0] * DIM
+    vec[0] = 1.0
+    body = {"vector": vec, "k": 3, "doc": "Mixed", "engine": "hnsw"}
+    res = client.post("/search/semantic", json=body).json()
+    assert [r["text"] for r in res["items"]] == ["mixed 0", "mixed 1"]
+    # 2 embedded chunks, not 100: scanned once instead of after index rounds
+    assert res["search"] == {"engine": "hnsw", "candidates": 2, "rounds": 0, "fallback": "exact"}
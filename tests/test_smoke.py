@@ -21,6 +21,7 @@ def test_seed_idempotent(client: TestClient):
     assert t["chunks"] == 3
     assert t["doc_to_section_edges"] == 2
     assert t["section_to_chunk_edges"] == 3
+    assert t["next_chunk_edges"] == 2
     assert len(body["sample"]) == 3
 
     # idempotent re-run (no duplicates)
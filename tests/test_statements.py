@@ -0,0 +1,22 @@
+from __future__ import annotations
+import pytest
+from fastapi.testclient import TestClient
+
+
+def test_statement_registry(client: TestClient):
+    from app.core.kuzu import connection, invalidate, prepared, run, statement
+
+    name = statement("test_count_docs", "MATCH (d:Document) RETURN COUNT(d)")
+    # Re-registering the same text is a no-op; different text is an error
+    assert statement("test_count_docs", "MATCH (d:Document) RETURN COUNT(d)") == name
+    with pytest.raises(ValueError):
+        statement("test_count_docs", "MATCH (s:Section) RETURN COUNT(s)")
+
+    client.post("/seed", params={"reset": True})
+    with connection() as conn:
+        ps = prepared(conn, name)
+        assert prepared(conn, name) is ps  # prepared once per connection
+        assert run(conn, name).get_all() == [[1]]
+
+        invalidate(name)
+        assert prepared(conn, name) is not ps
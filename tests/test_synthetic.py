@@ -0,0 +1,38 @@
+from __future__ import annotations
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.graph.synthetic import synthetic_corpus, synthetic_document, synthetic_embeddings, synthetic_queries
+
+
+def test_synthetic_corpus_is_deterministic():
+    full = list(synthetic_corpus(4, sections=2, chunks=3, seed=7))
+    grown = list(synthetic_corpus(2, sections=2, chunks=3, seed=7)) + \
+        list(synthetic_corpus(2, start=2, sections=2, chunks=3, seed=7))
+    assert full == grown
+    assert [d.title for d in full] == ["synthetic 0", "synthetic 1", "synthetic 2", "synthetic 3"]
+    assert all(len(d.sections) == 2 and all(len(s.chunks) == 3 for s in d.sections) for d in full)
+    assert synthetic_document(0, 2, 3, seed=8) != full[0]
+    assert synthetic_queries(5, seed=7) == synthetic_queries(5, seed=7)
+
+    vecs = synthetic_embeddings(3, 5, seed=7)
+    assert vecs.shape == (5, 384) and vecs.dtype == np.float32
+    assert np.array_equal(vecs, synthetic_embeddings(3, 5, seed=7))
+    unit = vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+    assert (unit @ unit.T).min() > 0.5  # a document's chunks share a topic
+
+
+def test_load_synthetic(client: TestClient):
+    from app.graph.synthetic import load_synthetic
+
+    client.post("/seed", params={"reset": True})
+    out = load_synthetic(3, sections=2, chunks=4, batch_docs=2)
+    assert (out["documents"], out["chunks"], out["embeddings"]["rows"]) == (3, 24, 24)
+    rows = client.get("/chunks", params={"doc": "synthetic 2", "limit": 100}).json()["items"]
+    assert [r["text"] for r in rows] == [c for s in synthetic_document(2, 2, 4).sections for c in s.chunks]
+
+    word = rows[0]["text"].split()[0]
+    assert client.get("/search", params={"q": word, "mode": "bm25"}).json()["count"] > 0
+    vec = synthetic_embeddings(2, 4)[1].tolist()
+    hit = client.post("/search/semantic", json={"vector": vec, "k": 1, "engine": "exact"}).json()["items"][0]
+    assert hit["chunk_id"] == rows[1]["chunk_id"]
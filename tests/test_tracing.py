@@ -0,0 +1,37 @@
+from __future__ import annotations
+import pytest
+
+
+def test_tracing_mode_and_sampler(monkeypatch):
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    from app.core import tracing
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "tracing", "auto")
+    monkeypatch.setattr(settings, "otlp_endpoint", None)
+    assert tracing.tracing_mode() == "console"
+    monkeypatch.setattr(settings, "otlp_endpoint", "http://collector:4317")
+    assert tracing.tracing_mode() == "otlp"
+    monkeypatch.setattr(settings, "tracing", "OFF")
+    assert tracing.tracing_mode() == "off"
+    monkeypatch.setattr(settings, "tracing", "jaeger")
+    with pytest.raises(ValueError):
+        tracing.tracing_mode()
+
+    monkeypatch.setattr(settings, "trace_sample_ratio", 0.25)
+    monkeypatch.setattr(settings, "trace_parent_based", True)
+    assert isinstance(tracing.sampler(), ParentBased)
+    monkeypatch.setattr(settings, "trace_parent_based", False)
+    s = tracing.sampler()
+    assert isinstance(s, TraceIdRatioBased) and s.rate == 0.25
+
+
+def test_tracing_off_leaves_app_uninstrumented(monkeypatch):
+    from fastapi import FastAPI
+    from app.core import tracing
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "tracing", "off")
+    app = FastAPI()
+    tracing.init_tracing(app)
+    assert not getattr(app, "_is_instrumented_by_opentelemetry", False)
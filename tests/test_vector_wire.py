@@ -0,0 +1,45 @@
+from __future__ import annotations
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.graph.semantic import DIM, decode_vector, encode_vector
+
+
+def test_decode_vector_roundtrip_and_checks():
+    v = np.arange(DIM, dtype=np.float32) / DIM
+    raw = v.astype("<f4").tobytes()
+    out = decode_vector(raw)
+    assert out.dtype == np.dtype("<f4") and np.array_equal(out, v)
+    assert np.array_equal(decode_vector(encode_vector(v)), v)
+
+    with pytest.raises(ValueError, match="bytes"):
+        decode_vector(raw[:-4])
+    with pytest.raises(ValueError, match="base64"):
+        decode_vector("not base64!")
+
+
+def test_semantic_search_accepts_b64_and_raw_bodies(client: TestClient):
+    client.post("/seed", params={"reset": True})
+    client.post("/debug/set_dummy_embeddings")
+    vec = [0.0] * DIM
+    vec[1] = 1.0
+
+    as_list = client.post("/search/semantic", json={"vector": vec, "k": 2}).json()
+    as_b64 = client.post("/search/semantic", json={"vector_b64": encode_vector(vec), "k": 2}).json()
+    raw = client.post(
+        "/search/semantic/raw",
+        params={"k": 2},
+        content=np.asarray(vec, dtype="<f4").tobytes(),
+        headers={"Content-Type": "application/octet-stream"},
+    ).json()
+    assert as_list == as_b64 == raw
+    assert as_list["items"][0]["text"] == "Third chunk"
+
+    hybrid = client.post("/search/hybrid", json={"q": "chunk", "vector_b64": encode_vector(vec)})
+    assert hybrid.status_code == 200
+
+    assert client.post("/search/semantic", json={"vector_b64": "AAAA"}).status_code == 400
+    assert client.post("/search/semantic/raw", content=b"\x00" * 12).status_code == 400
+    both = {"vector": vec, "vector_b64": encode_vector(vec)}
+    assert client.post("/search/semantic", json=both).status_code == 422